@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Smoke checks for CLI paths the other benches do not take.
+
+Runs the real ``pipeline.py`` with ``--no-service`` in a scratch working
+directory:
+
+- ``init`` with no ``--state-dir``, twice. The default shared state dir is
+  used, and the second ``init`` warns that it is reusing it.
+- ``wait`` on a run that was never initialised, in each store. It must
+  exit 1 with "Run init first" rather than time out or crash.
+- ``status`` against a socket whose service hangs up without a reply, and
+  one whose service never answers. The CLI must fall back to running the
+  verb itself, after at most ``CLIENT_TIMEOUT_S`` for the silent one.
+- A real ``serve`` with a client that connects and never half-closes. The
+  service must drop it with "Bad request" after ``REQUEST_TIMEOUT_S`` and
+  then answer the next CLI call.
+- ``runs --ready scout`` on a sqlite run with twelve scouts lists them in
+  slot order (``scout-2`` before ``scout-10``), the same as plain ``runs``.
+
+    python3 bench/cli_smoke.py
+
+Exits 1 if any check fails.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "elegance_pipeline"))
+from paths import PIPELINE_SCRIPT, SOCKET_ENV  # noqa: E402
+from service import CLIENT_TIMEOUT_S, REQUEST_TIMEOUT_S  # noqa: E402
+
+
+def pipeline(workdir: Path, *args: str, service: bool = False) -> subprocess.CompletedProcess:
+    flags = [] if service else ["--no-service"]
+    return subprocess.run(
+        [sys.executable, str(PIPELINE_SCRIPT), *flags, *args], cwd=workdir, capture_output=True, text=True
+    )
+
+
+def check_default_state_dir(workdir: Path) -> List[str]:
+    failures: List[str] = []
+    init = ("init", "--project-anchor", "CLAUDE.md", "--scope", "src")
+    first, second = pipeline(workdir, *init), pipeline(workdir, *init)
+    for name, proc in (("first", first), ("second", second)):
+        if proc.returncode != 0 or "(default shared state)" not in proc.stdout:
+            failures.append(f"default state dir: {name} init exited {proc.returncode}\n{proc.stderr}")
+    if "Warning: reusing default shared state" in first.stdout:
+        failures.append("default state dir: the first init warned about reuse")
+    if "Warning: reusing default shared state" not in second.stdout:
+        failures.append("default state dir: the second init did not warn about reuse")
+    return failures
+
+
+def check_wait_uninitialised(workdir: Path) -> List[str]:
+    failures: List[str] = []
+    for spec in ("files", f"sqlite:{workdir / 'runs.db'}"):
+        proc = pipeline(workdir, "--store", spec, "--state-dir", str(workdir / "never-initialised"),
+                        "wait", "--stage", "judge", "--timeout", "0.2")
+        if proc.returncode != 1 or "Run init first" not in proc.stderr:
+            failures.append(f"wait on a missing run ({spec}): exit {proc.returncode}\n{proc.stderr}")
+    return failures
+
+
+def check_broken_service(workdir: Path) -> List[str]:
+    failures: List[str] = []
+    state = ("--state-dir", str(workdir / "broken"))
+    pipeline(workdir, *state, "init", "--project-anchor", "CLAUDE.md", "--scope", "src")
+    for name, answer in (("hangs up", lambda conn: conn.close()), ("never answers", lambda conn: None)):
+        path = workdir / f"{name.replace(' ', '-')}.sock"
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(str(path))
+        listener.listen()
+        held: List[socket.socket] = []
+
+        def accept() -> None:
+            conn, _ = listener.accept()
+            held.append(conn)
+            answer(conn)
+
+        threading.Thread(target=accept, daemon=True).start()
+        os.environ[SOCKET_ENV] = str(path)
+        started = time.monotonic()
+        proc = pipeline(workdir, *state, "status", service=True)
+        elapsed = time.monotonic() - started
+        del os.environ[SOCKET_ENV]
+        listener.close()
+        for conn in held:
+            conn.close()
+        if proc.returncode != 0 or "scout-1" not in proc.stdout:
+            failures.append(f"service that {name}: status exited {proc.returncode}\n{proc.stderr}")
+        if elapsed > CLIENT_TIMEOUT_S + 5:
+            failures.append(f"service that {name}: status took {elapsed:.1f}s")
+    return failures
+
+
+def check_idle_client(workdir: Path) -> List[str]:
+    path = workdir / "serve.sock"
+    env = dict(os.environ, **{SOCKET_ENV: str(path)})
+    server = subprocess.Popen([sys.executable, str(PIPELINE_SCRIPT), "serve"], cwd=workdir, env=env,
+                              stderr=subprocess.PIPE)
+    failures: List[str] = []
+    try:
+        if b"Serving" not in server.stderr.readline():
+            return ["idle client: the service did not start"]
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle:
+            idle.settimeout(REQUEST_TIMEOUT_S + 5)
+            idle.connect(str(path))
+            try:
+                reply = idle.makefile("rb").readline()
+            except OSError as exc:
+                reply = repr(exc).encode()
+        if b"Bad request" not in reply:
+            failures.append(f"idle client: the service replied {reply[:200]!r}")
+        proc = subprocess.run([sys.executable, str(PIPELINE_SCRIPT), "--state-dir", str(workdir / "served"),
+                               "init", "--project-anchor", "CLAUDE.md", "--scope", "src"],
+                              cwd=workdir, env=env, capture_output=True, text=True, timeout=60)
+        if proc.returncode != 0:
+            failures.append(f"idle client: the next call exited {proc.returncode}\n{proc.stderr}")
+    finally:
+        server.terminate()
+        server.wait()
+    return failures
+
+
+def check_runs_ready_order(workdir: Path) -> List[str]:
+    store = ("--store", f"sqlite:{workdir / 'order.db'}", "--state-dir", str(workdir / "order"))
+    init = pipeline(workdir, *store, "init", "--project-anchor", "CLAUDE.md", "--scope", "src", "--scouts", "12")
+    if init.returncode != 0:
+        return [f"runs order: init exited {init.returncode}\n{init.stderr}"]
+    expected = ", ".join(f"scout-{index}" for index in range(1, 13))
+    failures: List[str] = []
+    for args in (("runs",), ("runs", "--ready", "scout")):
+        proc = pipeline(workdir, *store, *args)
+        if proc.returncode != 0 or expected not in proc.stdout:
+            failures.append(f"{' '.join(args)}: scouts not in slot order\n{proc.stdout}{proc.stderr}")
+    return failures
+
+
+def main() -> int:
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-smoke-"))
+    try:
+        failures = (
+            check_default_state_dir(workdir)
+            + check_wait_uninitialised(workdir)
+            + check_broken_service(workdir)
+            + check_idle_client(workdir)
+            + check_runs_ready_order(workdir)
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    for failure in failures:
+        print("FAIL: " + failure)
+    if not failures:
+        print("OK: init works on the default state dir and warns when reusing it; wait needs an initialised run; "
+              "a broken service falls back in-process; "
+              "an idle client cannot wedge the service; runs --ready lists slots in order")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Offline end-to-end check of ``pipeline.py run`` with ``bench/stub_agent.py``.
+
+Runs the real CLI over a fresh state dir with SCOUTSxJUDGES slots. Scout think
+times are skewed and two slots misbehave: one fails its first attempt, and one
+hangs on it until ``--timeout`` kills it. The run must finish with every slot
+submitted, the implementer included, and must exit 0. The check also looks at
+the driver's log. The first judge must start within ``UNLOCK_SLACK_S`` of the
+last scout's submit. Total wall time must come in under the serial sum of all
+think times. A second run with ``STUB_VERDICT=no`` must stop before the
+implementer and still exit 0.
+
+Two more runs have one straggler scout and slow judges, with no failures. The
+first waits for every scout. The second is initialised with
+``--judge-quorum QUORUM``. The judges of the quorum run must start before the
+straggler submits, the straggler must be recorded as late, and the quorum run
+must finish at least ``QUORUM_GAIN_S`` sooner.
+
+    python3 bench/driver_e2e.py [--scouts 12] [--judges 3] [--concurrency 6]
+
+Exits 1 if any check fails.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "elegance_pipeline"))
+from paths import PIPELINE_SCRIPT  # noqa: E402
+
+STUB = Path(__file__).resolve().parent / "stub_agent.py"
+UNLOCK_SLACK_S = 0.2
+TIMEOUT_S = 2
+STRAGGLER_S = 2.0
+QUORUM = "3/4"
+QUORUM_GAIN_S = 0.5
+LOG_LINE = re.compile(r"^\[\s*([\d.]+)s\] (\S+) (started|submitted)")
+
+
+def pipeline(state_dir: Path, *args: str, env: Dict[str, str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, str(PIPELINE_SCRIPT), "--no-service", "--state-dir", str(state_dir), *args],
+        env=env, capture_output=True, text=True,
+    )
+
+
+def events(log: str) -> List[Tuple[float, str, str]]:
+    return [(float(m.group(1)), m.group(2), m.group(3)) for m in map(LOG_LINE.match, log.splitlines()) if m]
+
+
+def straggler_runs(workdir: Path, args: argparse.Namespace, base_env: Dict[str, str]) -> List[str]:
+    """The quorum checks: the same skewed run without and with ``--judge-quorum``."""
+    failures: List[str] = []
+    straggler = f"scout-{args.scouts}"
+    delays = {"scout": 0.1, straggler: STRAGGLER_S, "judge": 1.0, "planner": 0.2, "verifier": 0.1, "implementer": 0.1}
+    env = dict(base_env, STUB_DELAY=",".join(f"{key}={value}" for key, value in delays.items()), STUB_FLAKY="",
+               STUB_HANG="", STUB_VERDICT="yes")
+    walls: Dict[str, float] = {}
+    for name, quorum in (("all scouts", []), (f"quorum {QUORUM}", ["--judge-quorum", QUORUM])):
+        state_dir = workdir / f"straggler-{len(walls)}"
+        pipeline(state_dir, "init", "--project-anchor", "CLAUDE.md", "--scope", "src",
+                 "--scouts", str(args.scouts), "--judges", str(args.judges), *quorum, env=env)
+        start = time.perf_counter()
+        proc = pipeline(state_dir, "run", "--agent-cmd", f"{shlex.quote(sys.executable)} {shlex.quote(str(STUB))}",
+                        "--concurrency", str(args.concurrency), env=env)
+        walls[name] = time.perf_counter() - start
+        status = pipeline(state_dir, "status", env=env).stdout
+        if proc.returncode != 0 or re.search(r"^- \S+: pending", status, flags=re.MULTILINE):
+            failures.append(f"{name}: exit {proc.returncode}, not every slot submitted\n{proc.stderr}")
+            continue
+        log = events(proc.stdout)
+        last_scout = max(t for t, slot, what in log if slot == straggler and what == "submitted")
+        first_judge = min(t for t, slot, what in log if slot.startswith("judge-") and what == "started")
+        print(f"straggler, {name}: {walls[name]:.1f}s wall, "
+              f"first judge {first_judge - last_scout:+.2f}s after the straggler")
+        late = f"- {straggler}: submitted late" in status
+        if quorum and (first_judge >= last_scout or not late):
+            failures.append(f"{name}: judges waited for the straggler, or it was not flagged late")
+        if not quorum and late:
+            failures.append(f"{name}: {straggler} flagged late without a quorum")
+    if len(walls) == 2 and walls["all scouts"] - walls[f"quorum {QUORUM}"] < QUORUM_GAIN_S:
+        failures.append(f"the quorum saved {walls['all scouts'] - walls[f'quorum {QUORUM}']:.2f}s, "
+                        f"under {QUORUM_GAIN_S}s")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scouts", type=int, default=12)
+    parser.add_argument("--judges", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=6)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-driver-"))
+    failures: List[str] = []
+    delays = {f"scout-{n}": 0.1 + 0.05 * n for n in range(1, args.scouts + 1)}
+    delays.update(judge=0.2, planner=0.2, verifier=0.1, implementer=0.1)
+    env = dict(
+        os.environ,
+        STUB_DELAY=",".join(f"{key}={value}" for key, value in delays.items()),
+        STUB_FLAKY="scout-2",
+        STUB_HANG="judge-1",
+    )
+    run_args = ["run", "--agent-cmd", f"{shlex.quote(sys.executable)} {shlex.quote(str(STUB))}",
+                "--concurrency", str(args.concurrency), "--timeout", str(TIMEOUT_S), "--retries", "1"]
+    try:
+        for verdict in ("yes", "no"):
+            state_dir = workdir / verdict
+            init = ["init", "--project-anchor", "CLAUDE.md", "--scope", "src",
+                    "--scouts", str(args.scouts), "--judges", str(args.judges)]
+            pipeline(state_dir, *init, env=env)
+            start = time.perf_counter()
+            proc = pipeline(state_dir, *run_args, env=dict(env, STUB_VERDICT=verdict))
+            wall = time.perf_counter() - start
+            status = pipeline(state_dir, "status", env=env).stdout
+            pending = re.findall(r"^- (\S+): pending", status, flags=re.MULTILINE)
+            expected = [] if verdict == "yes" else ["implementer-1"]
+            if proc.returncode != 0 or pending != expected:
+                failures.append(f"verdict {verdict}: exit {proc.returncode}, pending {pending}\n{proc.stderr}")
+                continue
+            log = events(proc.stdout)
+            last_scout = max(t for t, slot, what in log if slot.startswith("scout-") and what == "submitted")
+            first_judge = min(t for t, slot, what in log if slot.startswith("judge-") and what == "started")
+            serial = (  # one agent at a time, plus the hung attempt's timeout
+                sum(delays[f"scout-{n}"] for n in range(1, args.scouts + 1)) + delays["judge"] * args.judges
+                + delays["planner"] + delays["verifier"] + delays["implementer"] + TIMEOUT_S
+            )
+            print(f"verdict {verdict}: {wall:.1f}s wall, serial think time {serial:.1f}s, "
+                  f"first judge {first_judge - last_scout:+.2f}s after the last scout")
+            if first_judge - last_scout > UNLOCK_SLACK_S:
+                failures.append(f"verdict {verdict}: judges started {first_judge - last_scout:.2f}s late")
+            if wall >= serial:
+                failures.append(f"verdict {verdict}: {wall:.1f}s wall is no better than serial {serial:.1f}s")
+            for slot, reason in (("scout-2", "exit 1"), ("judge-1", f"timed out after {TIMEOUT_S}s")):
+                if f"{slot} attempt 1 failed: {reason}" not in proc.stdout:
+                    failures.append(f"verdict {verdict}: no retry logged for {slot} ({reason})")
+        failures += straggler_runs(workdir, args, env)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    for failure in failures:
+        print("FAIL: " + failure)
+    if not failures:
+        print("OK: the driver ran every stage, retried the flaky and hung slots, unlocked stages at once, "
+              "and started the judges on a quorum")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Benchmark and regression check for the prompt template renderer.
+
+Renders the judge, planner and implementer templates with multi-MB scout and
+judge outputs, comparing the compiled single-pass ``TemplateRenderer`` with the
+pre-1.3.0 renderer (re-read the file, one ``str.replace`` per context key).
+It also checks that outputs without placeholders render the same both ways,
+that the second render of a template reuses the parsed form, and that a
+template edited on disk is re-parsed.
+
+The regression check for double substitution gives a scout an output that
+quotes ``{judge_outputs}``, ``{pipeline_cmd}`` and ``{planner_output}``. The old
+renderer expanded those markers a second time, when the later keys were
+replaced. The new renderer must keep them as literal text.
+
+It then builds each role's prompt context from a real state dir with those
+outputs submitted, once lazily (only the template's placeholders, as
+``prompt`` does) and once eagerly. It reports the output bytes each way reads,
+and checks that the lazy prompt is identical to the eager one and that a scout
+prompt reads no outputs at all. With ``--max-tokens``-style budgets it checks
+several things. The estimated judge prompt must stay within the budget. Every
+output that was cut must end in a truncation marker. What is kept of it must
+be a prefix of the original that ends on a section boundary. A short output
+must be kept whole while a long one is cut. A planner prompt that opened on
+a judge quorum, with one judge late and five missing, must also fit, notes
+included.
+
+    python3 bench/render_bench.py [--mib 4] [--repeat 5]
+
+Exits 1 if any check fails.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "elegance_pipeline"))
+import renderer  # noqa: E402
+from coordinator import WorkflowCoordinator  # noqa: E402
+from paths import TEMPLATE_DIR  # noqa: E402
+from budget import Budget, estimate_tokens  # noqa: E402
+from prompts import build_context, join_outputs  # noqa: E402
+
+FINDING = "- `src/pkg/module.py::handler` difficulty 4, cleanliness 5: one dispatch table, no flags.\n"
+QUOTING = "Scout note: the template placeholders are {judge_outputs}, {pipeline_cmd} and {planner_output}.\n"
+
+
+def legacy_render(name: str, context: Dict[str, str]) -> str:
+    """The renderer as it was before 1.3.0, kept here as the baseline."""
+    text = (TEMPLATE_DIR / f"{name}.md").read_text(encoding="utf-8")
+    for key, value in context.items():
+        text = text.replace("{" + key + "}", value)
+    return text
+
+
+def context(mib: float, scout_extra: str = "") -> Dict[str, str]:
+    size = int(mib * 1024 * 1024)
+    scout = (FINDING * (size // len(FINDING) // 4 + 1))[: size // 4]
+    judge = scout[: size // 8]
+    return {
+        "project_anchor": "CLAUDE.md",
+        "package_or_folder_scope": "src/pkg",
+        "slot_name": "judge-1",
+        "scout_outputs": join_outputs("Scout outputs", [scout_extra + scout] * 4),
+        "judge_outputs": join_outputs("Judge outputs", [judge] * 2),
+        "planner_output": "1. Collapse the flag ladder in module.py into the dispatch table.",
+        "verifier_output": "Implementation approved: yes",
+        "implementation_signal": "READY",
+        "ready_agents": "planner-1",
+        "pipeline_cmd": "python pipeline.py --state-dir .claude/elegance_pipeline/state",
+    }
+
+
+def best(call: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def check_mtime_invalidation() -> bool:
+    """An edited template must be re-parsed; an untouched one must not be."""
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-render-"))
+    saved = renderer.TEMPLATE_DIR
+    try:
+        renderer.TEMPLATE_DIR = workdir
+        path = workdir / "t.md"
+        path.write_text("A {x}", encoding="utf-8")
+        render = renderer.TemplateRenderer()
+        first = render.compile("t")
+        same = render.compile("t") is first
+        path.write_text("B {x} {x}", encoding="utf-8")
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 10**9))  # a distinct mtime on coarse clocks
+        return same and render.render("t", {"x": "1"}) == "B 1 1"
+    finally:
+        renderer.TEMPLATE_DIR = saved
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def check_lazy_context(mib: float, failures: list) -> None:
+    """Bytes of outputs read per role, lazy vs eager; lazy must render the same prompt."""
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-context-"))
+    try:
+        coordinator = WorkflowCoordinator(state_dir=workdir, explicit_state_dir=True)
+        with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+            coordinator.init("CLAUDE.md", ["src/pkg"], str(workdir))
+            body = context(mib)["scout_outputs"]
+            for role, slots in (("scout", 4), ("judge", 2), ("planner", 1)):
+                for index in range(1, slots + 1):
+                    coordinator.submit(role, f"{role}-{index}", body[: len(body) // 4])
+        store = coordinator.store
+        cfg = store.load_config()
+        state = store.load_state(cfg)
+        read = store.read_output
+        counted = [0]
+
+        def counting(state_, slot):
+            text = read(state_, slot)
+            counted[0] += len(text)
+            return text
+
+        store.read_output = counting
+        print(f"\n{'prompt':>12} {'eager MiB read':>15} {'lazy MiB read':>14}")
+        for role, slot in (("scout", "scout-1"), ("judge", "judge-1"), ("planner", "planner-1"),
+                           ("verifier", "verifier-1"), ("implementer", "implementer-1")):
+            record = state.agents[slot]
+            template = coordinator.renderer.compile(role)
+            counted[0] = 0
+            eager = coordinator.renderer.render(role, build_context(store, cfg, state, record, "cmd"))
+            eager_read = counted[0]
+            counted[0] = 0
+            lazy = coordinator.renderer.render(
+                role, build_context(store, cfg, state, record, "cmd", template.placeholders)
+            )
+            print(f"{role:>12} {eager_read / 2**20:>15.2f} {counted[0] / 2**20:>14.2f}")
+            if lazy != eager:
+                failures.append(f"lazy context: the {role} prompt differs from the eager one")
+            if role == "scout" and counted[0]:
+                failures.append("lazy context: a scout prompt read agent outputs")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def check_budget(failures: list) -> None:
+    """Fit uneven scout outputs into several budgets and check the accounting."""
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-budget-"))
+    try:
+        coordinator = WorkflowCoordinator(state_dir=workdir, explicit_state_dir=True)
+        sizes = {"scout-1": 20, "scout-2": 400, "scout-3": 4000, "scout-4": 60}
+        texts = {
+            slot: "".join(f"## Finding {n}\n\nmodule_{n}.py: one table, no flags.\n\n" for n in range(count))
+            for slot, count in sizes.items()
+        }
+        with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+            coordinator.init("CLAUDE.md", ["src/pkg"], str(workdir))
+            for slot, text in texts.items():
+                coordinator.submit("scout", slot, text)
+        cfg = coordinator.store.load_config()
+        state = coordinator.store.load_state(cfg)
+        template = coordinator.renderer.compile("judge")
+        print(f"\n{'budget':>8} {'prompt ~tokens':>15}  truncated")
+        for max_tokens in (2000, 8000, 32000, 200000):
+            budget = Budget(max_tokens, template)
+            ctx = build_context(coordinator.store, cfg, state, state.agents["judge-1"], "cmd",
+                                template.placeholders, budget)
+            prompt = coordinator.renderer.render("judge", ctx)
+            cut = [usage.slot for usage in budget.slots if usage.truncated]
+            print(f"{max_tokens:>8} {estimate_tokens(prompt):>15}  {', '.join(cut) or '-'}")
+            if estimate_tokens(prompt) > max_tokens:
+                failures.append(f"budget {max_tokens}: prompt is ~{estimate_tokens(prompt)} tokens")
+            if max_tokens >= 8000 and "scout-1" in cut:
+                failures.append(f"budget {max_tokens}: the short scout-1 output was cut")
+            for slot in cut:
+                marker = f"[... {slot} truncated"
+                kept = ctx["scout_outputs"].split(marker)[0].rsplit("\n\n---\n\n", 1)[-1].strip()
+                if marker not in prompt or not texts[slot].startswith(kept) or not kept.endswith("flags."):
+                    failures.append(f"budget {max_tokens}: {slot} was not cut cleanly at a section boundary")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def check_budget_quorum(failures: list) -> None:
+    """A planner opened on a judge quorum: the late and missing notes must fit the budget too."""
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-quorum-"))
+    try:
+        coordinator = WorkflowCoordinator(state_dir=workdir, explicit_state_dir=True)
+        long = "".join(f"## Verdict {n}\n\nmodule_{n}.py: keep the table, drop the flag.\n\n" for n in range(400))
+        with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+            coordinator.init("CLAUDE.md", ["src/pkg"], str(workdir), judges=8, planner_quorum="2")
+            for index in range(1, 5):
+                coordinator.submit("scout", f"scout-{index}", "## Finding\n\nnone.\n")
+            for index in range(1, 4):  # judge-3 arrives after the planner opened on judge-1 and judge-2
+                coordinator.submit("judge", f"judge-{index}", long)
+        cfg = coordinator.store.load_config()
+        state = coordinator.store.load_state(cfg)
+        if not state.agents["judge-3"].late:
+            failures.append("quorum budget: judge-3 was not recorded as late")
+        template = coordinator.renderer.compile("planner")
+        for max_tokens in (2000, 8000):
+            budget = Budget(max_tokens, template)
+            ctx = build_context(coordinator.store, cfg, state, state.agents["planner-1"], "cmd",
+                                template.placeholders, budget)
+            prompt = coordinator.renderer.render("planner", ctx)
+            if "came in late" not in prompt or "is not in yet" not in prompt:
+                failures.append(f"quorum budget {max_tokens}: the quorum notes are missing")
+            if estimate_tokens(prompt) > max_tokens:
+                failures.append(f"quorum budget {max_tokens}: prompt is ~{estimate_tokens(prompt)} tokens")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mib", type=float, default=4.0, help="total size of the injected outputs")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N")
+    args = parser.parse_args()
+
+    failures = []
+    render = renderer.TemplateRenderer()
+    ctx = context(args.mib)
+    print(f"{'template':>12} {'MiB':>6} {'legacy ms':>10} {'compiled ms':>12} {'speed-up':>9}")
+    for name in ("judge", "planner", "implementer", "scout"):
+        if render.render(name, ctx) != legacy_render(name, ctx):
+            failures.append(f"{name}: compiled output differs from the legacy renderer")
+        old = best(lambda: legacy_render(name, ctx), args.repeat)
+        new = best(lambda: render.render(name, ctx), args.repeat)
+        size = len(render.render(name, ctx).encode("utf-8")) / 2**20
+        print(f"{name:>12} {size:>6.1f} {old * 1e3:>10.2f} {new * 1e3:>12.2f} {old / new:>8.1f}x")
+
+    quoting = context(0.01, scout_extra=QUOTING)
+    prompt = render.render("planner", quoting) + render.render("judge", quoting)
+    if QUOTING.strip() not in prompt:
+        failures.append("double substitution: a placeholder inside a scout output was expanded")
+    if QUOTING.strip() in legacy_render("judge", quoting):
+        failures.append("regression check is vacuous: the legacy renderer no longer double-substitutes")
+    if render.compile("judge") is not render.compile("judge"):
+        failures.append("cache: an unchanged template was parsed twice")
+    if not check_mtime_invalidation():
+        failures.append("cache: an edited template was not re-parsed")
+
+    check_lazy_context(args.mib, failures)
+    check_budget(failures)
+    check_budget_quorum(failures)
+
+    for failure in failures:
+        print("FAIL: " + failure)
+    if not failures:
+        print("OK: same output as the legacy renderer, no double substitution, cache hits and invalidates,"
+              " lazy context renders the same prompts, budgets hold")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
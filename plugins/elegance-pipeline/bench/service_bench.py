@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Equivalence and latency check for ``pipeline.py serve``.
+
+Starts a service on a private socket, then drives two identical runs through
+the real CLI: one forwarded to the service, one run directly with
+``--no-service``. Each run goes through init, status, prompt, submit (one slot
+at a time, then ``--dir``), signal and a final status. Every verb must print
+the same thing both ways, once state dir paths and timestamps are normalised.
+In the served run scout-1 is submitted behind the service's back with
+``--no-service``, and the service's next ``status`` has to show it. Reports
+the mean wall time per verb each way.
+
+    python3 bench/service_bench.py [--scouts 16] [--judges 4] [--kib 64]
+
+Exits 1 if any output differs, the external write goes unseen, or the service
+does not start.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+PIPELINE = Path(__file__).resolve().parent.parent / "elegance_pipeline" / "pipeline.py"
+FINDING = "- `src/pkg/module.py::handler` difficulty 4, cleanliness 5: one dispatch table, no flags.\n"
+TIMESTAMP = re.compile(r"\d{4}-\d\d-\d\dT[\d:.+]+")
+
+
+def run(workdir: Path, env: Dict[str, str], args: List[str], stdin: str = "") -> str:
+    proc = subprocess.run(
+        [sys.executable, str(PIPELINE), *args], cwd=workdir, env=env, input=stdin, capture_output=True, text=True
+    )
+    return f"exit={proc.returncode}\n{proc.stdout}{proc.stderr}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scouts", type=int, default=16)
+    parser.add_argument("--judges", type=int, default=4)
+    parser.add_argument("--kib", type=int, default=64, help="size of each scout output")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-service-"))
+    env = dict(os.environ, ELEGANCE_PIPELINE_SOCKET=str(workdir / "serve.sock"))
+    server = subprocess.Popen([sys.executable, str(PIPELINE), "serve"], cwd=workdir, env=env, stderr=subprocess.PIPE)
+    failures: List[str] = []
+    timings: Dict[str, Dict[str, List[float]]] = {"served": {}, "direct": {}}
+    try:
+        if b"Serving" not in server.stderr.readline():
+            print("FAIL: the service did not start")
+            return 1
+        output = FINDING * (args.kib * 1024 // len(FINDING))
+        transcripts: Dict[str, List[str]] = {}
+        # Same-length names: the state dir is part of each prompt, so of its token estimate.
+        for mode, flags in (("served", []), ("direct", ["--no-service"])):
+            state = workdir / mode
+
+            def verb(name: str, *rest: str, stdin: str = "", bypass: bool = False) -> None:
+                start = time.perf_counter()
+                extra = ["--no-service"] if bypass else flags
+                text = run(workdir, env, [*extra, "--state-dir", str(state), name, *rest], stdin)
+                timings[mode].setdefault(name, []).append(time.perf_counter() - start)
+                text = TIMESTAMP.sub("<time>", text.replace(str(state), "<state>"))
+                transcripts.setdefault(mode, []).append(text)
+
+            verb("init", "--project-anchor", "CLAUDE.md", "--scope", "src",
+                 "--scouts", str(args.scouts), "--judges", str(args.judges))
+            for index in range(1, args.scouts):
+                verb("prompt", "--role", "scout", "--slot", f"scout-{index}")
+                # scout-1 goes around the service: its next status must still show it
+                verb("submit", "--role", "scout", "--slot", f"scout-{index}", "--stdin", stdin=output,
+                     bypass=index == 1)
+                verb("status")
+            batch = workdir / f"{mode}-batch"
+            batch.mkdir()
+            (batch / f"scout-{args.scouts}.md").write_text(output, encoding="utf-8")
+            verb("submit", "--dir", str(batch))
+            for index in range(1, args.judges + 1):
+                verb("prompt", "--role", "judge", "--slot", f"judge-{index}")
+            verb("prompt", "--all-ready", "--max-tokens", "20000")
+            verb("signal", "on")
+            verb("status")
+        for position, (served, direct) in enumerate(zip(transcripts["served"], transcripts["direct"])):
+            if served != direct:
+                failures.append(f"call {position}: the served output differs from the direct one")
+                break
+        if "- scout-1: submitted" not in transcripts["served"][3]:
+            failures.append("the service did not see scout-1, submitted behind its back")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'verb':>8} {'served ms':>10} {'direct ms':>10}")
+    for name in timings["direct"]:
+        served, direct = timings["served"][name], timings["direct"][name]
+        print(f"{name:>8} {sum(served) / len(served) * 1e3:>10.1f} {sum(direct) / len(direct) * 1e3:>10.1f}")
+    for failure in failures:
+        print("FAIL: " + failure)
+    if not failures:
+        print("OK: served and direct runs print the same, and the service sees writes made around it")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Offline stand-in for a real agent, for ``pipeline.py run --agent-cmd``.
+
+Reads the prompt on stdin and checks that it was rendered for the slot in
+``ELEGANCE_SLOT``. Then prints a small, role-shaped Markdown result. The
+verifier's result carries the verdict line that opens the implementer gate.
+Behaviour is steered through environment variables, each a comma-separated
+list:
+
+    STUB_DELAY=scout=0.2,scout-3=1.5   seconds to think, per role or per slot
+    STUB_FLAKY=scout-2,judge-1         fail (exit 1) on the slot's first attempt
+    STUB_HANG=scout-4                  hang on the slot's first attempt (for --timeout)
+    STUB_VERDICT=no                    the verifier's verdict (default yes)
+
+First attempts are remembered as marker files in ``STUB_SCRATCH`` (default:
+the state dir). Exits 3 if the prompt is not the one for this slot.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def listed(name: str) -> list:
+    return [item.strip() for item in os.environ.get(name, "").split(",") if item.strip()]
+
+
+def first_attempt(slot: str) -> bool:
+    scratch = Path(os.environ.get("STUB_SCRATCH") or os.environ["ELEGANCE_STATE_DIR"])
+    marker = scratch / f".stub-attempted-{slot}"
+    if marker.exists():
+        return False
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.touch()
+    return True
+
+
+def main() -> int:
+    role, slot = os.environ["ELEGANCE_ROLE"], os.environ["ELEGANCE_SLOT"]
+    prompt = sys.stdin.read()
+    if slot not in prompt:
+        print(f"stub: the prompt on stdin is not for {slot}", file=sys.stderr)
+        return 3
+    delays = dict(item.split("=", 1) for item in listed("STUB_DELAY"))
+    time.sleep(float(delays.get(slot, delays.get(role, 0))))
+    flaky, hangs = slot in listed("STUB_FLAKY"), slot in listed("STUB_HANG")
+    if (flaky or hangs) and first_attempt(slot):
+        if hangs:
+            time.sleep(3600)
+        print(f"stub: {slot} fails its first attempt", file=sys.stderr)
+        return 1
+    print(f"## {slot}\n\nStub {role} result for a {len(prompt)}-character prompt.\n")
+    print(f"- `stub/{slot}.py::handle` difficulty 3, cleanliness 4: one table instead of a flag ladder.")
+    if role == "verifier":
+        print(f"\nImplementation approved: {os.environ.get('STUB_VERDICT', 'yes')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Concurrency stress check for parallel ``submit`` into one elegance pipeline state dir.
+
+Each round re-initializes a scratch state dir, then every scout slot is submitted
+by its own process at the same instant (a barrier releases them together), the
+way the four parallel scouts finish, while another process flips the manual
+implementation signal and reader processes keep parsing ``workflow_state.json``.
+The store holds only if, after every round, every scout slot is ``submitted``
+with its own output, and no read ever saw half-written JSON.
+
+    python3 bench/submit_stress.py [--rounds 30] [--readers 2] [--legacy] [--journal N] [--sqlite]
+
+Exits 1 on any lost submission or torn read. ``--legacy`` runs the pre-1.3.0
+store (no lock, writes in place) for comparison; it loses submissions within a
+few rounds on most machines. ``--journal N`` runs every round in journal mode
+with a snapshot every N events, and also checks that the journal holds one
+event per submit and signal. ``--sqlite`` runs the rounds against
+``--store sqlite:`` (one WAL database) instead of the state dir files.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "elegance_pipeline"))
+import store  # noqa: E402
+from coordinator import WorkflowCoordinator  # noqa: E402
+from models import SCOUT_SLOTS  # noqa: E402
+
+
+def _use_legacy_store() -> None:
+    store.FileStore.lock = lambda self: contextlib.nullcontext()
+    store.atomic_write = lambda path, text: path.write_text(text, encoding="utf-8")
+
+
+def _quiet_coordinator(state_dir: Path, spec: str) -> WorkflowCoordinator:
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    return WorkflowCoordinator(state_dir=state_dir, explicit_state_dir=True, store_spec=spec)
+
+
+def submitter(state_dir: Path, spec: str, slot: str, text: str, barrier, legacy: bool) -> None:
+    if legacy:
+        _use_legacy_store()
+    coordinator = _quiet_coordinator(state_dir, spec)
+    barrier.wait()
+    try:
+        coordinator.submit("scout", slot, text)
+    except ValueError:  # legacy store: read a half-written state file; counted as lost
+        pass
+
+
+def signaller(state_dir: Path, spec: str, barrier, legacy: bool) -> None:
+    if legacy:
+        _use_legacy_store()
+    coordinator = _quiet_coordinator(state_dir, spec)
+    barrier.wait()
+    for on in (True, False, True):
+        try:
+            coordinator.signal(on)
+        except ValueError:
+            pass
+
+
+def reader(state_dir: Path, stop, torn) -> None:
+    path = state_dir / "workflow_state.json"
+    while not stop.is_set():
+        try:
+            json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            continue
+        except ValueError:
+            with torn.get_lock():
+                torn.value += 1
+
+
+def run_round(state_dir: Path, spec: str, index: int, legacy: bool, journal: int) -> list[str]:
+    """Return the slots whose submission was lost in this round."""
+    if legacy:
+        _use_legacy_store()
+    shutil.rmtree(state_dir, ignore_errors=True)
+    with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+        WorkflowCoordinator(state_dir=state_dir, explicit_state_dir=True, store_spec=spec).init(
+            "CLAUDE.md", [f"scope-{n}" for n in range(len(SCOUT_SLOTS))], str(state_dir),
+            journal=bool(journal), snapshot_every=journal or 32,
+        )
+    texts = {slot: f"round {index} {slot}" for slot in SCOUT_SLOTS}
+    barrier = multiprocessing.Barrier(len(SCOUT_SLOTS) + 1)
+    procs = [
+        multiprocessing.Process(target=submitter, args=(state_dir, spec, slot, text, barrier, legacy))
+        for slot, text in texts.items()
+    ]
+    procs.append(multiprocessing.Process(target=signaller, args=(state_dir, spec, barrier, legacy)))
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+    fs = store.open_store(spec, state_dir)
+    cfg = fs.load_config()
+    state = fs.load_state(cfg)
+    lost = [
+        slot for slot, text in texts.items()
+        if state.agents[slot].status != "submitted" or fs.read_output(state, slot) != text
+    ]
+    if cfg.journal or spec != "files":  # init + one event per submit + three signal flips
+        submits = {event["agent"]["slot"] for event in fs.events() if event["event"] == "submit"}
+        lost += [f"{slot} (journal)" for slot in SCOUT_SLOTS if slot not in submits]
+        if len(fs.events()) != 1 + len(SCOUT_SLOTS) + 3:
+            lost.append("journal event count")
+    return lost
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--legacy", action="store_true", help="no lock, in-place writes, as before 1.3.0")
+    parser.add_argument("--journal", type=int, default=0, metavar="N", help="journal mode, snapshot every N events")
+    parser.add_argument("--sqlite", action="store_true", help="use --store sqlite: instead of state dir files")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-stress-"))
+    state_dir = workdir / "state"
+    spec = f"sqlite:{workdir / 'runs.db'}" if args.sqlite else "files"
+    stop, torn = multiprocessing.Event(), multiprocessing.Value("i", 0)
+    readers = [multiprocessing.Process(target=reader, args=(state_dir, stop, torn)) for _ in range(args.readers)]
+    for proc in readers:
+        proc.start()
+    started = time.monotonic()
+    lost_rounds = lost_slots = 0
+    try:
+        for index in range(args.rounds):
+            lost = run_round(state_dir, spec, index, args.legacy, args.journal)
+            lost_rounds += bool(lost)
+            lost_slots += len(lost)
+    finally:
+        stop.set()
+        for proc in readers:
+            proc.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        f"rounds={args.rounds} submitters/round={len(SCOUT_SLOTS)} readers={args.readers} "
+        f"in {time.monotonic() - started:.1f}s{' (legacy store)' if args.legacy else ''}"
+        f"{f' (journal, snapshot every {args.journal})' if args.journal else ''}{' (sqlite)' if args.sqlite else ''}"
+    )
+    print(f"  {lost_slots} lost submissions in {lost_rounds} rounds, {torn.value} torn reads")
+    if lost_slots or torn.value:
+        print("FAIL: concurrent submits lost a slot or exposed a partial state file")
+        return 1
+    print("OK: every submission survived and every read parsed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Latency budget for wide elegance pipeline topologies.
+
+Drives a whole run through ``WorkflowCoordinator`` -- the code behind each CLI
+verb, minus interpreter start-up -- at several fan-outs, from the default
+4 -> 2 up to 128 scouts -> 32 judges (163 slots). Every ``submit``, ``status``
+and ``prompt`` is timed, in CPU time and in wall time. After each submit,
+``ready_agents`` is checked against a brute-force rescan of the stage graph.
+The check runs both on the freshly loaded state and on one in-memory state
+that is updated through ``mark_submitted`` only, so the per-stage counters can
+never drift from the records. ``--judge-quorum`` initialises every run with
+that quorum, so the check also covers judges opening before the last scout.
+
+    python3 bench/topology_bench.py [--widths 4x2,64x16,128x32] [--store files|sqlite] [--scale 1.0]
+                                    [--judge-quorum 3/4]
+
+Fails (exit 1) if the readiness check ever disagrees, or if the slowest call of
+a verb at any width goes over ``BUDGETS_MS`` of CPU time. The budgets are on
+CPU time because the wall time of a files-store submit is mostly the
+filesystem. On ext4, for example, each rename over an existing file flushes
+that file's data, which can take tens of milliseconds on a busy disk. That
+cost is printed, but it is not what grows with the number of slots.
+``--scale`` multiplies every budget, for slow CI machines.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "elegance_pipeline"))
+from coordinator import WorkflowCoordinator  # noqa: E402
+from models import WorkflowState, build_fresh_state  # noqa: E402
+from readiness import mark_submitted, ready_agents  # noqa: E402
+
+# Slowest single call per verb, in CPU milliseconds, ~3x a laptop at 128x32.
+BUDGETS_MS = {"submit": 30.0, "status": 30.0, "prompt": 30.0}
+OUTPUT = "Finding: `module.function` handles a hard case simply.\n" * 40
+
+
+def brute_force_ready(state: WorkflowState) -> List[str]:
+    """Readiness recomputed from scratch: the reference the counters must match."""
+    ready: List[str] = []
+    for position, stage in enumerate(state.stages):
+        if stage.gate == "signal":
+            open_ = state.implementation_signal
+        elif position == 0:
+            open_ = True
+        else:
+            previous = state.stages[position - 1].slots
+            submitted = sum(state.agents[slot].status == "submitted" for slot in previous)
+            open_ = submitted >= (stage.quorum or len(previous))
+        if open_:
+            ready += [slot for slot in stage.slots if state.agents[slot].status == "pending"]
+    return ready
+
+
+def run_width(
+    workdir: Path, spec: str, scouts: int, judges: int, judge_quorum: Optional[str] = None
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Slowest (CPU, wall) ms per verb over one full run; raises on a readiness mismatch."""
+    state_dir = workdir / f"{scouts}x{judges}"
+    coordinator = WorkflowCoordinator(state_dir=state_dir, explicit_state_dir=True, store_spec=spec)
+    cpu, wall = dict.fromkeys(BUDGETS_MS, 0.0), dict.fromkeys(BUDGETS_MS, 0.0)
+
+    def timed(verb: str, call) -> None:
+        start, start_cpu = time.perf_counter(), time.process_time()
+        call()
+        cpu[verb] = max(cpu[verb], (time.process_time() - start_cpu) * 1e3)
+        wall[verb] = max(wall[verb], (time.perf_counter() - start) * 1e3)
+
+    with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+        coordinator.init(
+            "CLAUDE.md", [f"src/pkg-{n}" for n in range(scouts)], str(workdir), scouts, judges,
+            judge_quorum=judge_quorum,
+        )
+        shadow = build_fresh_state(coordinator.store.load_config())
+        ready_agents(shadow)  # build the counters now, so every later change goes through them
+        order = [(role, slot) for role in ("scout", "judge", "planner", "verifier") for slot in shadow.slots(role)]
+        for role, slot in order:
+            timed("prompt", lambda: coordinator.prompt(role, slot))
+            text = OUTPUT + ("Implementation approved: yes\n" if role == "verifier" else "")
+            timed("submit", lambda: coordinator.submit(role, slot, text))
+            timed("status", coordinator.status)
+            mark_submitted(shadow, slot)
+            shadow.implementation_signal = role == "verifier"
+            state = coordinator.store.load_state(coordinator.store.load_config())
+            expected = brute_force_ready(state)
+            if ready_agents(state) != expected or ready_agents(shadow) != expected:
+                raise SystemExit(f"readiness drifted after {slot}: {ready_agents(state)} != {expected}")
+        timed("prompt", lambda: coordinator.prompt("implementer", "implementer-1"))
+    return cpu, wall
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--widths", default="4x2,64x16,128x32", help="comma-separated SCOUTSxJUDGES")
+    parser.add_argument("--store", choices=["files", "sqlite"], default="files")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    parser.add_argument("--judge-quorum", metavar="K/N", help="open the judges on this quorum of scouts")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-topology-"))
+    spec = f"sqlite:{workdir / 'runs.db'}" if args.store == "sqlite" else "files"
+    failures = 0
+    print(f"{'width':>8} {'slots':>6}  " + "  ".join(f"{verb + ' cpu/wall ms':>22}" for verb in BUDGETS_MS))
+    try:
+        for width in args.widths.split(","):
+            scouts, judges = (int(part) for part in width.split("x"))
+            cpu, wall = run_width(workdir, spec, scouts, judges, args.judge_quorum)
+            over = [verb for verb, ms in cpu.items() if ms > BUDGETS_MS[verb] * args.scale]
+            failures += bool(over)
+            cells = "  ".join(f"{cpu[verb]:>10.2f} /{wall[verb]:>10.2f}" for verb in BUDGETS_MS)
+            verdict = "ok" if not over else "OVER BUDGET: " + ", ".join(over)
+            print(f"{width:>8} {scouts + judges + 3:>6}  {cells}  {verdict}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("CPU budgets (ms): " + ", ".join(f"{verb} {ms * args.scale:.0f}" for verb, ms in BUDGETS_MS.items()))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Wake-up latency and idle cost of ``pipeline.py wait``.
+
+For each store, starts ``wait --stage judge`` as a real CLI process. The scouts
+are then submitted through ``WorkflowCoordinator`` after an idle spell of
+``--idle`` seconds. The check measures how long ``wait`` takes to exit once
+the last submit has started, and how much CPU the waiter burned while idle. A
+``status``-polling loop would spend that CPU re-parsing the state on every
+turn. Also checks that the JSON ``wait`` prints names both judges.
+
+    python3 bench/wait_bench.py [--idle 3] [--scouts 64]
+
+Exits 1 if a wake-up takes longer than the longest poll interval plus
+``SLACK_S``, if the idle waiter used more than ``IDLE_CPU_SHARE`` of one CPU,
+or if the output is wrong.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "elegance_pipeline"))
+from coordinator import POLL_MAX_S, WorkflowCoordinator  # noqa: E402
+from paths import PIPELINE_SCRIPT  # noqa: E402
+
+SLACK_S = 0.25  # process start-up and scheduling on top of the poll interval
+IDLE_CPU_SHARE = 0.05
+
+
+def run_store(workdir: Path, spec: str, scouts: int, idle: float) -> tuple:
+    """``(wake-up seconds after the last submit began, waiter CPU seconds, parsed output)`` for one store."""
+    state_dir = workdir / spec.split(":")[0]
+    coordinator = WorkflowCoordinator(state_dir=state_dir, explicit_state_dir=True, store_spec=spec)
+    with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+        coordinator.init("CLAUDE.md", ["src"], str(workdir), scouts, 2)
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    waiter = subprocess.Popen(
+        [sys.executable, str(PIPELINE_SCRIPT), "--store", spec, "--state-dir", str(state_dir), "--no-service",
+         "wait", "--stage", "judge", "--timeout", str(idle + 30)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    time.sleep(idle)
+    with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+        for index in range(1, scouts + 1):
+            last = time.perf_counter()  # the waiter may exit before this submit returns
+            coordinator.submit("scout", f"scout-{index}", "Finding.\n")
+    out, _ = waiter.communicate()
+    woke = time.perf_counter() - last
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+    return woke, cpu, json.loads(out)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--idle", type=float, default=3.0, help="seconds the waiter idles before the scouts land")
+    parser.add_argument("--scouts", type=int, default=64)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="elegance-wait-"))
+    failures = []
+    print(f"{'store':>8} {'wake-up ms':>11} {'waiter cpu ms':>14} {'idle cpu share':>15}")
+    try:
+        for spec in ("files", f"sqlite:{workdir / 'runs.db'}"):
+            woke, cpu, result = run_store(workdir, spec, args.scouts, args.idle)
+            name = spec.split(":")[0]
+            share = cpu / args.idle  # includes start-up, so an upper bound on the idle share
+            print(f"{name:>8} {woke * 1e3:>11.1f} {cpu * 1e3:>14.1f} {share:>15.3f}")
+            if woke > POLL_MAX_S + SLACK_S:
+                failures.append(f"{name}: woke {woke:.3f}s after the last submit")
+            if share > IDLE_CPU_SHARE:
+                failures.append(f"{name}: the idle waiter used {share:.1%} of a CPU")
+            if result.get("status") != "ready" or result.get("ready") != ["judge-1", "judge-2"]:
+                failures.append(f"{name}: unexpected wait output {result}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    for failure in failures:
+        print("FAIL: " + failure)
+    if not failures:
+        print(f"OK: wait wakes within {POLL_MAX_S + SLACK_S:.2f}s and idles under {IDLE_CPU_SHARE:.0%} of a CPU")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
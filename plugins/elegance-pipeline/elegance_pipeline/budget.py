@@ -0,0 +1,121 @@
+"""Token budgets for prompt context: estimate, share fairly, cut at section boundaries.
+
+``prompt --max-tokens N`` fits a prompt into roughly N tokens. The template
+text and the small entries (anchor, scope, command) are fixed; what remains is
+shared among the agent outputs the template injects, max-min fairly per slot,
+so one verbose scout cannot crowd out the other three. An output over its share
+keeps whole leading sections -- a Markdown heading and its body, or a
+paragraph when the output has no headings; single lines only when even the
+first section is too big -- and ends with a marker saying how much was cut and
+where the full text is.
+
+The estimator is local and dependency-free: the larger of one token per word or
+symbol and one per four characters, which tracks BPE tokenizers on prose and
+code closely enough to budget by. It is an estimate, so the report says "~".
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+_HEADING = re.compile(r"(?m)^(?=#{1,6} )")
+_PARAGRAPH = re.compile(r"(?<=\n\n)(?=\S)")
+MARKER_TOKENS = 40  # reserved for the truncation marker when an output is cut
+
+
+def estimate_tokens(text: str) -> int:
+    return max(len(_PIECE.findall(text)), (len(text) + 3) // 4)
+
+
+@dataclass
+class SlotUsage:
+    slot: str
+    tokens: int
+    allotted: int
+    kept_tokens: int
+    kept_sections: int
+    sections: int
+
+    @property
+    def truncated(self) -> bool:
+        return self.kept_tokens < self.tokens
+
+
+@dataclass
+class Budget:
+    """A prompt's token budget in; its accounting out, filled in by ``prompts.build_context``.
+
+    ``template`` is the ``renderer.CompiledTemplate`` being filled, to measure the fixed part.
+    """
+
+    max_tokens: int
+    template: Any = field(repr=False)
+    fixed_tokens: int = 0
+    total_tokens: int = 0
+    slots: List[SlotUsage] = field(default_factory=list)
+
+    def summary(self) -> str:
+        cut = [usage for usage in self.slots if usage.truncated]
+        line = f"~{self.total_tokens} of {self.max_tokens} tokens (fixed ~{self.fixed_tokens})"
+        if not cut:
+            return line + ", no output truncated"
+        return line + "; truncated " + ", ".join(
+            f"{u.slot} to ~{u.kept_tokens}/{u.tokens} ({u.kept_sections}/{u.sections} sections)" for u in cut
+        )
+
+
+def allocate(needs: Dict[str, int], available: int) -> Dict[str, int]:
+    """Max-min fair shares of ``available``: small outputs get all they need, the rest split what's left."""
+    shares: Dict[str, int] = {}
+    remaining = max(available, 0)
+    ordered = sorted(needs.items(), key=lambda item: item[1])
+    for position, (slot, need) in enumerate(ordered):
+        share = min(need, remaining // (len(ordered) - position))
+        shares[slot] = share
+        remaining -= share
+    return shares
+
+
+def _sections(text: str) -> List[str]:
+    """Heading-led sections; paragraphs when there is at most one heading."""
+    parts = [part for part in _HEADING.split(text) if part]
+    if len(parts) <= 1:
+        parts = [part for part in _PARAGRAPH.split(text) if part]
+    return parts
+
+
+def fit(text: str, allotted: int, tokens: int) -> Tuple[str, int, int, int]:
+    """``(kept text, kept tokens, kept sections, total sections)`` of ``text`` within ``allotted`` tokens.
+
+    ``tokens`` is ``estimate_tokens(text)``. The kept text is always a prefix of ``text``
+    ending on a section (else line) boundary.
+    """
+    sections = _sections(text)
+    if tokens <= allotted:
+        return text, tokens, len(sections), len(sections)
+    room = allotted - MARKER_TOKENS
+    kept, used = [], 0
+    for section in sections:
+        cost = estimate_tokens(section)
+        if used + cost > room:
+            break
+        kept.append(section)
+        used += cost
+    count = len(kept)
+    if not kept and sections:  # the first section alone is too big: keep its leading lines
+        for line in sections[0].splitlines(keepends=True):
+            cost = estimate_tokens(line)
+            if used + cost > room:
+                break
+            kept.append(line)
+            used += cost
+    return "".join(kept), used, count, len(sections)
+
+
+def truncation_marker(usage: SlotUsage, location: str) -> str:
+    return (
+        f"[... {usage.slot} truncated to fit the prompt budget: kept {usage.kept_sections} of "
+        f"{usage.sections} sections, ~{usage.kept_tokens} of ~{usage.tokens} tokens. Full output: {location}]"
+    )
@@ -1,52 +1,99 @@
 """Workflow orchestration: the command surface behind the CLI subcommands.
 
 Thin layer over the store, readiness gate, prompt builder, plus view. Each
-public method maps to one CLI verb (init / status / prompt / submit / signal).
+public method maps to one CLI verb (init / status / prompt / submit / signal /
+wait / history / runs).
 """
 from __future__ import annotations
 
+import json
 import os
 import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import view
-from models import AgentRecord, WorkflowConfig, WorkflowState, build_fresh_state, normalize_scopes
+from budget import Budget
+from models import (
+    JUDGE_COUNT,
+    SCOUT_COUNT,
+    AgentRecord,
+    WorkflowConfig,
+    WorkflowState,
+    build_fresh_state,
+    normalize_scopes,
+    resolve_quorum,
+)
 from prompts import build_context, parse_signal
-from readiness import downstream_submitted, ready_agents
+from readiness import (
+    arrives_late,
+    downstream_submitted,
+    is_ready,
+    mark_submitted,
+    not_ready_reason,
+    ready_agents,
+)
 from renderer import TemplateRenderer
-from store import FileStore
+from store import open_store
 
-_NOT_READY = {
-    "judge": "All 4 scouts must be submitted first.",
-    "planner": "Both judges must be submitted first.",
-    "verifier": "Planner must be submitted first.",
-    "implementer": "Verifier must approve implementation first or set signal manually.",
-}
+# ``wait`` polls the store's version token this often, doubling while nothing changes.
+POLL_MIN_S = 0.01
+POLL_MAX_S = 0.5
 
 
 class WorkflowCoordinator:
-    def __init__(self, state_dir: Path, explicit_state_dir: bool) -> None:
-        self.store = FileStore(state_dir)
-        self.renderer = TemplateRenderer()
+    def __init__(
+        self,
+        state_dir: Path,
+        explicit_state_dir: bool,
+        store_spec: str = "files",
+        renderer: Optional[TemplateRenderer] = None,
+    ) -> None:
+        self.store = open_store(store_spec, state_dir)
+        self.renderer = renderer or TemplateRenderer()
         self.explicit_state_dir = explicit_state_dir
 
-    def init(self, project_anchor: str, scopes: List[str], project_root: Optional[str]) -> None:
+    def init(
+        self,
+        project_anchor: str,
+        scopes: List[str],
+        project_root: Optional[str],
+        scouts: int = SCOUT_COUNT,
+        judges: int = JUDGE_COUNT,
+        journal: bool = False,
+        snapshot_every: int = 32,
+        judge_quorum: Optional[str] = None,
+        planner_quorum: Optional[str] = None,
+    ) -> None:
         anchor = project_anchor.strip()
         if not anchor:
             raise SystemExit("project_anchor must not be empty")
+        if scouts < 1 or judges < 1:
+            raise SystemExit("--scouts and --judges must be at least 1")
+        if snapshot_every < 1:
+            raise SystemExit("--snapshot-every must be at least 1")
+        quorums: Dict[str, int] = {}
+        if judge_quorum is not None:
+            quorums["judge"] = resolve_quorum(judge_quorum, scouts, "--judge-quorum")
+        if planner_quorum is not None:
+            quorums["planner"] = resolve_quorum(planner_quorum, judges, "--planner-quorum")
         cfg = WorkflowConfig(
             project_anchor=anchor,
-            scopes=normalize_scopes(scopes),
+            scopes=normalize_scopes(scopes, scouts),
             project_root=(project_root or os.getcwd()).strip(),
+            scouts=scouts,
+            judges=judges,
+            journal=journal,
+            snapshot_every=snapshot_every,
+            quorums=quorums,
         )
         view.warn_on_shared_reuse(self.store, self.explicit_state_dir)
-        self.store.save_config(cfg)
-        self.store.save_state(build_fresh_state(cfg))
+        self.store.start(cfg, build_fresh_state(cfg))
         view.report_init(cfg, self._label())
 
-    def status(self) -> None:
+    def status(self, max_tokens: Optional[int] = None) -> None:
         cfg = self.store.load_config()
         state = self.store.load_state(cfg)
         print(f"Project anchor: {cfg.project_anchor}")
@@ -54,48 +101,191 @@ class WorkflowCoordinator:
         print(f"State dir: {self._label()}")
         print(f"Implementation signal: {view.signal_line(state)}")
         print("")
-        for slot in sorted(state.agents.keys()):
-            print(view.agent_line(state.agents[slot]))
+        for stage in state.stages:
+            for slot in stage.slots:
+                print(view.agent_line(state.agents[slot]))
         print("")
         view.print_ready(state)
+        if max_tokens is not None:
+            print("")
+            print(f"Prompt budget ({max_tokens} tokens):")
+            for slot in ready_agents(state):
+                budget = Budget(max_tokens, self.renderer.compile(state.agents[slot].role))
+                self._context(cfg, state, state.agents[slot], budget)
+                print(f"  - {slot}: {budget.summary()}")
 
-    def prompt(self, role: str, slot: str) -> None:
+    def prompt_all_ready(self, max_tokens: Optional[int] = None) -> None:
+        """Every ready slot's prompt as one JSON object keyed by slot, from one load."""
+        cfg = self.store.load_config()
+        state = self.store.load_state(cfg)
+        outputs: Dict[str, str] = {}  # judges share the scouts' outputs: read each once
+        prompts: Dict[str, Dict[str, str]] = {}
+        for slot in ready_agents(state):
+            record = state.agents[slot]
+            budget = None if max_tokens is None else Budget(max_tokens, self.renderer.compile(record.role))
+            context = self._context(cfg, state, record, budget, outputs)
+            prompts[slot] = {"role": record.role, "prompt": self.renderer.render(record.role, context)}
+            if budget is not None:
+                prompts[slot]["budget"] = budget.summary()
+        json.dump(prompts, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    def prompt(self, role: str, slot: str, max_tokens: Optional[int] = None) -> None:
         cfg = self.store.load_config()
         state = self.store.load_state(cfg)
         record = self._record_for_slot(state, slot, role)
         self._assert_ready(state, record)
-        cmd = view.pipeline_cmd(self.store.state_dir, self.explicit_state_dir)
-        context = build_context(self.store, cfg, state, record, cmd)
-        print(self.renderer.render(role, context))
+        budget = None if max_tokens is None else Budget(max_tokens, self.renderer.compile(role))
+        context = self._context(cfg, state, record, budget)
+        self.renderer.write(role, context, sys.stdout)
+        sys.stdout.write("\n")
+        if budget is not None:
+            print(f"Prompt budget for {slot}: {budget.summary()}", file=sys.stderr)
 
-    def submit(self, role: str, slot: str, text: str) -> None:
+    def prompt_text(
+        self, slot: str, max_tokens: Optional[int] = None
+    ) -> Tuple[AgentRecord, str, Optional[Budget]]:
+        """``(record, rendered prompt, budget or None)`` for a ready ``slot``, without printing."""
         cfg = self.store.load_config()
         state = self.store.load_state(cfg)
-        record = self._record_for_slot(state, slot, role)
-        if record.status == "submitted" and downstream_submitted(state, slot):
-            raise SystemExit(
-                f"{slot} is already submitted and a later stage has advanced. "
-                "Re-init or roll back the downstream slots before re-submitting."
-            )
-        record.output_file = self.store.write_output(slot, text)
-        record.status = "submitted"
-        record.submitted_at = datetime.now(timezone.utc).isoformat()
-        if role == "verifier":
-            self._apply_verifier_verdict(state, slot, text)
-        self.store.save_state(state)
-        print(f"Saved output to {self.store.state_dir / record.output_file}")
+        record = state.agents.get(slot)
+        if record is None:
+            raise SystemExit(f"Unknown slot: {slot}")
+        self._assert_ready(state, record)
+        budget = None if max_tokens is None else Budget(max_tokens, self.renderer.compile(record.role))
+        return record, self.renderer.render(record.role, self._context(cfg, state, record, budget)), budget
+
+    def submit(self, role: str, slot: str, text: str) -> None:
+        state, record = self.record_submission(role, slot, text)
+        print(f"Saved output to {self.store.location(record.output_file)}")
+        view.print_ready(state)
+
+    def record_submission(self, role: str, slot: str, text: str) -> Tuple[WorkflowState, AgentRecord]:
+        """``submit`` without the printing: the updated state and the slot's record."""
+        with self.store.lock():
+            cfg = self.store.load_config()
+            state = self.store.load_state(cfg)
+            record = self._record_for_slot(state, slot, role)
+            self._assert_resubmittable(state, record)
+            self._apply_submission(state, record, text, arrives_late(state, slot))
+            self.store.record(cfg, state, "submit", slot)
+        return state, record
+
+    def submit_dir(self, directory: Path, role: Optional[str] = None) -> None:
+        """Submit every ``<slot>.md`` in ``directory`` under one lock with one state write.
+
+        All files are checked before anything is written: one bad slot rejects the batch.
+        """
+        files = sorted(directory.glob("*.md"))
+        if not files:
+            raise SystemExit(f"No <slot>.md files in {directory}")
+        with self.store.lock():
+            cfg = self.store.load_config()
+            state = self.store.load_state(cfg)
+            records = []
+            for path in files:
+                record = state.agents.get(path.stem)
+                if record is None:
+                    raise SystemExit(f"Unknown slot: {path.stem} (from {path})")
+                self._record_for_slot(state, path.stem, role or record.role)
+                self._assert_resubmittable(state, record)
+                records.append((record, path.read_text(encoding="utf-8")))
+            order = {slot: position for position, slot in enumerate(state.agents)}
+            records.sort(key=lambda item: order[item[0].slot])  # stage order: a verifier verdict lands last
+            # Judged against the state before the batch: slots landing together are never late to each other.
+            late = {record.slot for record, _ in records if arrives_late(state, record.slot)}
+            for record, text in records:
+                self._apply_submission(state, record, text, record.slot in late)
+            self.store.record(cfg, state, "submit", *(record.slot for record, _ in records))
+        for record, _ in records:
+            print(f"Saved output to {self.store.location(record.output_file)}")
         view.print_ready(state)
 
     def signal(self, on: bool) -> None:
-        cfg = self.store.load_config()
-        state = self.store.load_state(cfg)
-        state.implementation_signal = on
-        state.verifier_signal_source = "manual"
-        self.store.save_state(state)
+        with self.store.lock():
+            cfg = self.store.load_config()
+            state = self.store.load_state(cfg)
+            state.implementation_signal = on
+            state.verifier_signal_source = "manual"
+            self.store.record(cfg, state, "signal")
         print(f"Implementation signal set to {view.signal_line(state)}")
 
+    def wait(self, slot: Optional[str], stage: Optional[str], timeout: float) -> None:
+        """Block until ``slot``, or any slot of the role ``stage``, is ready, then print one JSON line.
+
+        Only the store's version token is polled. State is reloaded and readiness
+        re-checked only after that token changes. ``status`` in the output is
+        ``ready``, ``submitted`` (the target has nothing left to wait for), or
+        ``timeout``, which also exits 2.
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        delay, seen = POLL_MIN_S, self.store.version()  # read before the load: a change in between reloads
+        state = self.store.load_state(self.store.load_config())  # "Run init first" before any waiting
+        outcome, ready = self._wait_outcome(state, slot, stage)
+        while outcome is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, POLL_MAX_S)
+            version = self.store.version()
+            if version != seen:
+                seen, delay = version, POLL_MIN_S
+                state = self.store.load_state(self.store.load_config())
+                outcome, ready = self._wait_outcome(state, slot, stage)
+        result: Dict[str, object] = {
+            "target": slot or stage,
+            "status": outcome or "timeout",
+            "ready": ready,
+            "waited_s": round(time.monotonic() - start, 3),
+        }
+        if outcome is None and slot is not None:
+            result["reason"] = not_ready_reason(state, slot)
+        print(json.dumps(result))
+        if outcome is None:
+            raise SystemExit(2)
+
+    def history(self) -> None:
+        cfg = self.store.load_config()
+        if not cfg.journal and self.store.spec == "files":
+            raise SystemExit("No event journal for this run. Re-init with --journal to record one.")
+        for event in self.store.events():
+            print(view.event_line(event))
+
+    def runs(self, ready_role: Optional[str]) -> None:
+        for run, ready in self.store.runs(ready_role):
+            print(view.run_line(run, ready))
+
     # -- helpers --------------------------------------------------------
 
+    def _context(
+        self,
+        cfg: WorkflowConfig,
+        state: WorkflowState,
+        record: AgentRecord,
+        budget: Optional[Budget],
+        outputs: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, str]:
+        cmd = view.pipeline_cmd(self.store.state_dir, self.explicit_state_dir, self.store.spec)
+        placeholders = self.renderer.compile(record.role).placeholders
+        return build_context(self.store, cfg, state, record, cmd, placeholders, budget, outputs)
+
+    def _assert_resubmittable(self, state: WorkflowState, record: AgentRecord) -> None:
+        if record.status == "submitted" and downstream_submitted(state, record.slot):
+            raise SystemExit(
+                f"{record.slot} is already submitted and a later stage has advanced. "
+                "Re-init or roll back the downstream slots before re-submitting."
+            )
+
+    def _apply_submission(self, state: WorkflowState, record: AgentRecord, text: str, late: bool = False) -> None:
+        record.output_file = self.store.write_output(record.slot, text)
+        mark_submitted(state, record.slot)
+        record.submitted_at = datetime.now(timezone.utc).isoformat()
+        record.late = record.late or late  # a re-submit keeps the flag of the first, late one
+        if record.role == "verifier":
+            self._apply_verifier_verdict(state, record.slot, text)
+
     def _label(self) -> str:
         return view.state_dir_label(self.store.state_dir, self.explicit_state_dir)
 
@@ -119,7 +309,27 @@ class WorkflowCoordinator:
             raise SystemExit(f"Slot {slot} is role={record.role}, not role={role}")
         return record
 
+    def _wait_outcome(
+        self, state: WorkflowState, slot: Optional[str], stage: Optional[str]
+    ) -> Tuple[Optional[str], List[str]]:
+        """``(outcome, ready slots)`` for ``wait``; outcome None while the target is still blocked."""
+        if slot is not None:
+            if slot not in state.agents:
+                raise SystemExit(f"Unknown slot: {slot}")
+            if state.agents[slot].status == "submitted":
+                return "submitted", []
+            return ("ready", [slot]) if is_ready(state, slot) else (None, [])
+        slots = state.slots(stage)
+        if not slots:
+            raise SystemExit(f"This run has no {stage} slots")
+        ready = [name for name in ready_agents(state) if state.agents[name].role == stage]
+        if ready:
+            return "ready", ready
+        if all(state.agents[name].status == "submitted" for name in slots):
+            return "submitted", []
+        return None, []
+
     def _assert_ready(self, state: WorkflowState, record: AgentRecord) -> None:
-        if record.status == "submitted" or record.slot in ready_agents(state):
+        if record.status == "submitted" or is_ready(state, record.slot):
             return
-        raise SystemExit(_NOT_READY.get(record.role, "This slot is not ready yet."))
+        raise SystemExit(not_ready_reason(state, record.slot))
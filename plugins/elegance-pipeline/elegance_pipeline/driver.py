@@ -0,0 +1,175 @@
+"""``pipeline.py run``: drive the whole relay with an agent command, no orchestrator needed.
+
+For every ready slot, the driver starts ``--agent-cmd`` through the shell and
+pipes the slot's rendered prompt to its stdin. ``ELEGANCE_ROLE``,
+``ELEGANCE_SLOT`` and ``ELEGANCE_STATE_DIR`` are set in its environment. An
+agent that exits 0 with output on stdout has that output submitted as soon as
+it finishes. Readiness is then re-evaluated, so a stage starts the moment
+``ready_agents`` unlocks it and does not wait for the driver to come round.
+Each attempt is bounded by ``--timeout``. A failed attempt (a non-zero exit,
+no output, or a timeout) is retried up to ``--retries`` times, with backoff.
+At most ``--concurrency`` agents run at once.
+
+The event loop is the only thread that touches the coordinator. Prompts are
+rendered and outputs submitted synchronously between awaits, so the store's
+lock and its cached state never see concurrent callers. Only the agents run
+concurrently.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import view
+from coordinator import WorkflowCoordinator
+from readiness import ready_agents
+
+RETRY_BACKOFF_S = 1.0  # doubled after each failed attempt
+
+
+@dataclass
+class Attempt:
+    ok: bool
+    output: str = ""
+    reason: str = ""
+
+
+class PipelineDriver:
+    def __init__(
+        self,
+        coordinator: WorkflowCoordinator,
+        agent_cmd: str,
+        concurrency: int,
+        timeout: float,
+        retries: int,
+        max_tokens: Optional[int] = None,
+    ) -> None:
+        if concurrency < 1 or retries < 0 or timeout <= 0:
+            raise SystemExit("--concurrency must be at least 1, --retries at least 0, --timeout positive")
+        self.coordinator = coordinator
+        self.agent_cmd = agent_cmd
+        self.timeout = timeout
+        self.retries = retries
+        self.max_tokens = max_tokens
+        self.concurrency = concurrency
+        self.slots: Optional[asyncio.Semaphore] = None  # made inside the loop that uses it
+        self.started = time.monotonic()
+
+    def log(self, message: str) -> None:
+        print(f"[{time.monotonic() - self.started:7.1f}s] {message}", flush=True)
+
+    async def run(self) -> Dict[str, str]:
+        """Drive until nothing is ready or running; returns the slots that failed, with why."""
+        store = self.coordinator.store
+        self.slots = asyncio.Semaphore(self.concurrency)
+        running: Dict[str, asyncio.Task] = {}
+        failed: Dict[str, str] = {}
+        while True:
+            state = store.load_state(store.load_config())
+            for slot in ready_agents(state):
+                if slot not in running and slot not in failed:
+                    running[slot] = asyncio.create_task(self._run_slot(slot), name=slot)
+            if not running:
+                break
+            done, _ = await asyncio.wait(running.values(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                slot = task.get_name()
+                del running[slot]
+                attempt = task.result()
+                if not attempt.ok:
+                    failed[slot] = attempt.reason
+                    self.log(f"{slot} failed: {attempt.reason}")
+                    continue
+                try:
+                    self.coordinator.record_submission(state.agents[slot].role, slot, attempt.output)
+                except SystemExit as exc:  # e.g. the downstream guard: record it, keep driving the rest
+                    failed[slot] = str(exc.code)
+                    self.log(f"{slot} not submitted: {exc.code}")
+                    continue
+                self.log(f"{slot} submitted ({len(attempt.output)} chars)")
+        return failed
+
+    async def _run_slot(self, slot: str) -> Attempt:
+        assert self.slots is not None
+        attempt = Attempt(False)
+        for number in range(1, self.retries + 2):
+            async with self.slots:
+                # Rendered once a concurrency slot is free, so queued prompts do not pile up in memory.
+                try:
+                    record, prompt, budget = self.coordinator.prompt_text(slot, self.max_tokens)
+                except SystemExit as exc:  # a BaseException: uncaught, it would escape the event loop
+                    return Attempt(False, reason=str(exc.code))
+                budget_note = f", {budget.summary()}" if budget is not None else ""
+                self.log(f"{slot} started (attempt {number}/{self.retries + 1}{budget_note})")
+                attempt = await self._attempt(record.role, slot, prompt)
+            if attempt.ok:
+                return attempt
+            if number <= self.retries:
+                delay = RETRY_BACKOFF_S * 2 ** (number - 1)
+                self.log(f"{slot} attempt {number} failed: {attempt.reason}; retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+        return attempt
+
+    async def _attempt(self, role: str, slot: str, prompt: str) -> Attempt:
+        env = dict(
+            os.environ,
+            ELEGANCE_ROLE=role,
+            ELEGANCE_SLOT=slot,
+            ELEGANCE_STATE_DIR=str(self.coordinator.store.state_dir),
+        )
+        proc = await asyncio.create_subprocess_shell(
+            self.agent_cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            start_new_session=True,  # its own process group, so a kill reaches what the shell started
+        )
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(prompt.encode("utf-8")), self.timeout)
+        except asyncio.TimeoutError:
+            _kill(proc)
+            await proc.wait()
+            return Attempt(False, reason=f"timed out after {self.timeout:g}s")
+        except asyncio.CancelledError:  # interrupted: do not leave the agent running
+            _kill(proc)
+            raise
+        output = out.decode("utf-8", errors="replace")
+        if proc.returncode != 0:
+            tail = err.decode("utf-8", errors="replace").strip().splitlines()[-1:]
+            return Attempt(False, reason=f"exit {proc.returncode}" + "".join(f": {line}" for line in tail))
+        if not output.strip():
+            return Attempt(False, reason="no output on stdout")
+        return Attempt(True, output)
+
+
+def _kill(proc: asyncio.subprocess.Process) -> None:
+    """Kill the agent's whole process group: the shell may not have exec'd the command."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError):  # no process groups (Windows), or already gone
+        proc.kill()
+
+
+def drive(
+    coordinator: WorkflowCoordinator,
+    agent_cmd: str,
+    concurrency: int,
+    timeout: float,
+    retries: int,
+    max_tokens: Optional[int] = None,
+) -> None:
+    driver = PipelineDriver(coordinator, agent_cmd, concurrency, timeout, retries, max_tokens)
+    failed = asyncio.run(driver.run())
+    state = coordinator.store.load_state(coordinator.store.load_config())
+    driver.log(f"done; implementation signal {view.signal_line(state)}")
+    pending = [slot for slot, record in state.agents.items() if record.status != "submitted"]
+    if pending and not failed:
+        print(f"Stopped with {', '.join(pending)} not run: nothing left is ready.", file=sys.stderr)
+    if failed:
+        raise SystemExit("Failed: " + "; ".join(f"{slot} ({reason})" for slot, reason in failed.items()))
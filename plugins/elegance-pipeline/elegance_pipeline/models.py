@@ -1,18 +1,26 @@
 """Data model for the elegance pipeline workflow.
 
-Plain dataclasses plus the factory that seeds a fresh workflow:
-4 scouts -> 2 judges -> 1 planner -> 1 verifier -> 1 gated implementer.
+Plain dataclasses plus the factory that seeds a fresh workflow. The stage
+graph is fixed in shape but not in width: N scouts -> M judges -> 1 planner ->
+1 verifier -> 1 gated implementer, with N and M chosen at ``init`` (default 4
+and 2). A stage may also be set to open on a quorum of the previous stage
+rather than on all of it.
 """
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 SCOUT_COUNT = 4
 JUDGE_COUNT = 2
 
-SCOUT_SLOTS = [f"scout-{index}" for index in range(1, SCOUT_COUNT + 1)]
-JUDGE_SLOTS = [f"judge-{index}" for index in range(1, JUDGE_COUNT + 1)]
+
+def role_slots(role: str, count: int) -> Tuple[str, ...]:
+    return tuple(f"{role}-{index}" for index in range(1, count + 1))
+
+
+SCOUT_SLOTS = list(role_slots("scout", SCOUT_COUNT))
+JUDGE_SLOTS = list(role_slots("judge", JUDGE_COUNT))
 
 
 @dataclass
@@ -23,6 +31,7 @@ class AgentRecord:
     scope: Optional[str] = None
     output_file: Optional[str] = None
     submitted_at: Optional[str] = None
+    late: bool = False  # submitted after the next stage had opened on a quorum without it
 
 
 @dataclass
@@ -30,6 +39,34 @@ class WorkflowConfig:
     project_anchor: str
     scopes: List[str]
     project_root: str
+    scouts: int = SCOUT_COUNT
+    judges: int = JUDGE_COUNT
+    journal: bool = False
+    snapshot_every: int = 32
+    # role -> how many slots of the previous stage open it; roles not listed wait for all.
+    quorums: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One fan-out step. It opens once every slot of the previous stage has submitted
+    (``quorum`` of them, when set), or, with ``gate="signal"``, once the
+    implementation signal is on."""
+
+    role: str
+    slots: Tuple[str, ...]
+    gate: Optional[str] = None
+    quorum: Optional[int] = None
+
+
+def build_stages(cfg: WorkflowConfig) -> List[Stage]:
+    return [
+        Stage("scout", role_slots("scout", cfg.scouts)),
+        Stage("judge", role_slots("judge", cfg.judges), quorum=cfg.quorums.get("judge")),
+        Stage("planner", ("planner-1",), quorum=cfg.quorums.get("planner")),
+        Stage("verifier", ("verifier-1",)),
+        Stage("implementer", ("implementer-1",), gate="signal"),
+    ]
 
 
 @dataclass
@@ -37,30 +74,51 @@ class WorkflowState:
     implementation_signal: bool = False
     verifier_signal_source: Optional[str] = None
     agents: Dict[str, AgentRecord] = field(default_factory=dict)
+    stages: List[Stage] = field(default_factory=list)
+    # readiness.StageIndex over ``stages``, built on first use; see readiness.mark_submitted.
+    index: Any = field(default=None, repr=False, compare=False)
+
+    def slots(self, role: str) -> Tuple[str, ...]:
+        return next((stage.slots for stage in self.stages if stage.role == role), ())
 
     @property
     def signal_label(self) -> str:
         return "READY" if self.implementation_signal else "BLOCKED"
 
 
-def normalize_scopes(scopes: List[str]) -> List[str]:
-    """Trim blanks, require at least one scope, pad up to SCOUT_COUNT."""
+def normalize_scopes(scopes: List[str], count: int = SCOUT_COUNT) -> List[str]:
+    """Trim blanks, require at least one scope, deal them round-robin to ``count`` scouts."""
     cleaned = [scope.strip() for scope in scopes if scope.strip()]
     if not cleaned:
         raise SystemExit("At least one scope is required")
-    padding = [cleaned[-1]] * (SCOUT_COUNT - len(cleaned))
-    return (cleaned + padding)[:SCOUT_COUNT]
+    return [cleaned[index % len(cleaned)] for index in range(count)]
+
+
+def resolve_quorum(spec: str, count: int, flag: str) -> int:
+    """``"K/N"`` as the fraction K/N of ``count`` slots (rounded up), or ``"K"`` as K slots."""
+    try:
+        if "/" in spec:
+            part, whole = (int(value) for value in spec.split("/", 1))
+            if whole < 1 or not 0 < part <= whole:
+                raise ValueError(spec)
+            quorum = -(-count * part // whole)
+        else:
+            quorum = int(spec)
+    except ValueError:
+        raise SystemExit(f"{flag} must be K/N or a slot count, not {spec!r}") from None
+    if not 1 <= quorum <= count:
+        raise SystemExit(f"{flag} {spec} asks for {quorum} of {count} slots")
+    return quorum
 
 
 def build_fresh_state(cfg: WorkflowConfig) -> WorkflowState:
-    """Seed every pipeline slot in its initial pending state."""
+    """Seed every slot of the config's stage graph in its initial pending state."""
+    stages = build_stages(cfg)
     agents: Dict[str, AgentRecord] = {}
-    for index, slot in enumerate(SCOUT_SLOTS, start=1):
-        scope = cfg.scopes[index - 1] if index - 1 < len(cfg.scopes) else None
-        agents[slot] = AgentRecord(role="scout", slot=slot, scope=scope)
-    for slot in JUDGE_SLOTS:
-        agents[slot] = AgentRecord(role="judge", slot=slot)
-    for role in ("planner", "verifier", "implementer"):
-        slot = f"{role}-1"
-        agents[slot] = AgentRecord(role=role, slot=slot)
-    return WorkflowState(agents=agents)
+    for stage in stages:
+        for index, slot in enumerate(stage.slots):
+            scope = None
+            if stage.role == "scout" and index < len(cfg.scopes):
+                scope = cfg.scopes[index]
+            agents[slot] = AgentRecord(role=stage.role, slot=slot, scope=scope)
+    return WorkflowState(agents=agents, stages=stages)
@@ -8,9 +8,17 @@ command string keep working.
 """
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 TEMPLATE_DIR = SCRIPT_DIR / "templates"
 PIPELINE_SCRIPT = SCRIPT_DIR / "pipeline.py"
 DEFAULT_STATE_DIR = Path.cwd() / ".claude" / "elegance_pipeline" / "state"
+DEFAULT_SOCKET = DEFAULT_STATE_DIR.parent / "serve.sock"
+SOCKET_ENV = "ELEGANCE_PIPELINE_SOCKET"
+
+
+def socket_path() -> Path:
+    """Where ``serve`` listens and the CLI looks for it: one setting, so they always agree."""
+    return Path(os.environ.get(SOCKET_ENV) or DEFAULT_SOCKET).expanduser().resolve()
@@ -2,7 +2,8 @@
 """Elegance pipeline state manager for Claude Code.
 
 Manages persistent workflow state for the multi-agent elegance pipeline:
-4 scouts -> 2 judges -> 1 planner -> 1 verifier -> 1 gated implementer.
+N scouts -> M judges -> 1 planner -> 1 verifier -> 1 gated implementer
+(4 and 2 unless init says otherwise).
 
 Templates are bundled with the plugin (relative to this script).
 State is project-local at {cwd}/.claude/elegance_pipeline/state/.
@@ -10,18 +11,26 @@ State is project-local at {cwd}/.claude/elegance_pipeline/state/.
 This entry point owns argument parsing; the workflow logic lives in the
 sibling modules (models, store, renderer, readiness, prompts, coordinator),
 which import as flat names because the script's directory sits on sys.path.
+
+When ``pipeline.py serve`` is listening, every other verb except ``wait`` and
+``run`` is forwarded to it (see ``service``); ``--no-service`` runs the verb in this
+process regardless.
 """
 from __future__ import annotations
 
 import argparse
+import os
 import sys
 from pathlib import Path
 from typing import Optional
 
 from coordinator import WorkflowCoordinator
-from paths import DEFAULT_STATE_DIR
+from models import JUDGE_COUNT, SCOUT_COUNT
+from paths import DEFAULT_STATE_DIR, socket_path
 
 ROLES = ["scout", "judge", "planner", "verifier", "implementer"]
+# Verbs that block: forwarded, they would hold up the single-threaded service.
+LOCAL_ONLY = {"wait", "run"}
 
 
 def _read_submission_text(file_path: Optional[str], use_stdin: bool) -> str:
@@ -35,48 +44,182 @@ def _read_submission_text(file_path: Optional[str], use_stdin: bool) -> str:
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Elegance pipeline state manager")
     parser.add_argument("--state-dir")
+    parser.add_argument(
+        "--store", default="files", help="Where state lives: 'files' (default) or 'sqlite:PATH' for one shared database"
+    )
+    parser.add_argument(
+        "--no-service", action="store_true", help="Run in this process even if pipeline.py serve is listening"
+    )
     sub = parser.add_subparsers(dest="command", required=True)
 
     p_init = sub.add_parser("init", help="Initialize or reset the workflow")
     p_init.add_argument("--project-anchor", required=True)
     p_init.add_argument("--scope", action="append", default=[])
     p_init.add_argument("--project-root")
-
-    sub.add_parser("status", help="Show workflow status")
+    p_init.add_argument("--scouts", type=int, default=SCOUT_COUNT, help="Parallel scouts; scopes are dealt round-robin")
+    p_init.add_argument("--judges", type=int, default=JUDGE_COUNT, help="Parallel judges")
+    p_init.add_argument(
+        "--journal", action="store_true", help="Append submits and signals to events.jsonl instead of rewriting state"
+    )
+    p_init.add_argument("--snapshot-every", type=int, default=32, help="Journal events between state snapshots")
+    p_init.add_argument(
+        "--judge-quorum", metavar="K/N", help="Open the judges once K/N of the scouts (or K scouts) have submitted"
+    )
+    p_init.add_argument(
+        "--planner-quorum", metavar="K/N", help="Open the planner once K/N of the judges (or K judges) have submitted"
+    )
+
+    p_status = sub.add_parser("status", help="Show workflow status")
+    p_status.add_argument(
+        "--max-tokens", type=int, help="Also show how each ready slot's prompt fits this token budget"
+    )
 
     p_prompt = sub.add_parser("prompt", help="Render the prompt for a role and slot")
-    p_prompt.add_argument("--role", required=True, choices=ROLES)
-    p_prompt.add_argument("--slot", required=True)
+    p_prompt.add_argument("--role", choices=ROLES)
+    p_prompt.add_argument("--slot")
+    p_prompt.add_argument(
+        "--all-ready", action="store_true", help="Render every ready slot as JSON {slot: {role, prompt}}"
+    )
+    p_prompt.add_argument(
+        "--max-tokens", type=int, help="Fit injected outputs into about this many tokens (accounting on stderr)"
+    )
 
     p_submit = sub.add_parser("submit", help="Submit an agent result")
-    p_submit.add_argument("--role", required=True, choices=ROLES)
-    p_submit.add_argument("--slot", required=True)
+    p_submit.add_argument("--role", choices=ROLES)
+    p_submit.add_argument("--slot")
     p_submit.add_argument("--file")
     p_submit.add_argument("--stdin", action="store_true")
+    p_submit.add_argument("--dir", help="Submit every <slot>.md in this directory at once")
 
     p_signal = sub.add_parser("signal", help="Manually set implementation signal")
     p_signal.add_argument("value", choices=["on", "off"])
 
+    p_wait = sub.add_parser("wait", help="Block until a slot or stage is ready; prints one JSON line")
+    target = p_wait.add_mutually_exclusive_group(required=True)
+    target.add_argument("--slot", help="Wait for this slot, e.g. judge-1")
+    target.add_argument("--stage", choices=ROLES, help="Wait for any slot of this role")
+    p_wait.add_argument("--timeout", type=float, default=300.0, help="Seconds before giving up with exit 2")
+
+    p_run = sub.add_parser("run", help="Drive every ready slot through an agent command until the relay stops")
+    p_run.add_argument("--agent-cmd", required=True, help="Shell command; gets the prompt on stdin, prints the output")
+    p_run.add_argument("--concurrency", type=int, default=4, help="Agents running at once")
+    p_run.add_argument("--timeout", type=float, default=1800.0, help="Seconds per attempt before the agent is killed")
+    p_run.add_argument("--retries", type=int, default=1, help="Extra attempts for a failed slot")
+    p_run.add_argument("--max-tokens", type=int, help="Fit each prompt into about this many tokens")
+
+    sub.add_parser("history", help="List the journaled events of a --journal run")
+
+    p_runs = sub.add_parser("runs", help="List every run in a --store sqlite database and its ready slots")
+    p_runs.add_argument("--ready", choices=ROLES, help="Only runs with a ready slot of this role")
+
+    sub.add_parser(
+        "serve",
+        help="Keep state and templates in memory and answer the other verbs "
+        "(socket: .claude/elegance_pipeline/serve.sock or $ELEGANCE_PIPELINE_SOCKET)",
+    )
+
     return parser
 
 
+def _require_role_and_slot(args: argparse.Namespace, batch_flag: str) -> None:
+    if not (args.role and args.slot):
+        raise SystemExit(f"{args.command} needs --role and --slot, or {batch_flag}")
+
+
+def _resolve_inputs(args: argparse.Namespace) -> None:
+    """Validate and resolve everything tied to this process: cwd-relative paths and stdin.
+
+    Afterwards ``args`` means the same thing in any process, so it can be run here or by the service.
+    """
+    kind, _, target = args.store.partition(":")
+    if kind == "sqlite" and target:
+        args.store = f"sqlite:{Path(target).expanduser().resolve()}"
+    if args.command == "init":
+        args.project_root = args.project_root or os.getcwd()
+    elif args.command == "prompt" and not args.all_ready:
+        _require_role_and_slot(args, "--all-ready")
+    elif args.command == "submit":
+        if args.dir:
+            args.dir = str(Path(args.dir).resolve())
+        else:
+            _require_role_and_slot(args, "--dir")
+            args.text = _read_submission_text(args.file, args.stdin)
+        args.file = args.stdin = None
+
+
+def _prompt(coordinator: WorkflowCoordinator, args: argparse.Namespace) -> None:
+    if args.all_ready:
+        coordinator.prompt_all_ready(args.max_tokens)
+    else:
+        coordinator.prompt(args.role, args.slot, args.max_tokens)
+
+
+def _submit(coordinator: WorkflowCoordinator, args: argparse.Namespace) -> None:
+    if args.dir:
+        coordinator.submit_dir(Path(args.dir), args.role)
+    else:
+        coordinator.submit(args.role, args.slot, args.text)
+
+
+def _run(coordinator: WorkflowCoordinator, args: argparse.Namespace) -> None:
+    from driver import drive  # asyncio costs every other verb start-up time it never uses
+
+    drive(coordinator, args.agent_cmd, args.concurrency, args.timeout, args.retries, args.max_tokens)
+
+
 def _dispatch(coordinator: WorkflowCoordinator, args: argparse.Namespace) -> None:
     handlers = {
-        "init": lambda: coordinator.init(args.project_anchor, args.scope, args.project_root),
-        "status": coordinator.status,
-        "prompt": lambda: coordinator.prompt(args.role, args.slot),
-        "submit": lambda: coordinator.submit(
-            args.role, args.slot, _read_submission_text(args.file, args.stdin)
+        "init": lambda: coordinator.init(
+            args.project_anchor,
+            args.scope,
+            args.project_root,
+            args.scouts,
+            args.judges,
+            args.journal,
+            args.snapshot_every,
+            args.judge_quorum,
+            args.planner_quorum,
         ),
+        "status": lambda: coordinator.status(args.max_tokens),
+        "prompt": lambda: _prompt(coordinator, args),
+        "submit": lambda: _submit(coordinator, args),
         "signal": lambda: coordinator.signal(args.value == "on"),
+        "wait": lambda: coordinator.wait(args.slot, args.stage, args.timeout),
+        "run": lambda: _run(coordinator, args),
+        "history": coordinator.history,
+        "runs": lambda: coordinator.runs(args.ready),
     }
     handlers[args.command]()
 
 
 def main() -> None:
     args = build_parser().parse_args()
+    if args.command == "serve":
+        from service import serve
+
+        serve(_dispatch, socket_path())
+        return
+    _resolve_inputs(args)
     state_dir = Path(args.state_dir).expanduser().resolve() if args.state_dir else DEFAULT_STATE_DIR
-    coordinator = WorkflowCoordinator(state_dir=state_dir, explicit_state_dir=bool(args.state_dir))
+    if not args.no_service and args.command not in LOCAL_ONLY and socket_path().exists():
+        from service import forward  # socket and socketserver only when a service may be listening
+
+        request = {
+            "state_dir": str(state_dir),
+            "explicit": bool(args.state_dir),
+            "store": args.store,
+            "args": vars(args),
+        }
+        status = forward(socket_path(), request, sys.stdout.buffer)
+        if status is not None:
+            sys.stdout.flush()
+            sys.stderr.write(status["stderr"])
+            if status["exit"]:
+                raise SystemExit(status["exit"])
+            return
+    coordinator = WorkflowCoordinator(
+        state_dir=state_dir, explicit_state_dir=bool(args.state_dir), store_spec=args.store
+    )
     _dispatch(coordinator, args)
 
 
@@ -1,16 +1,32 @@
 """Build the substitution context handed to each role template.
 
 Pulls prior-stage outputs from the store and packages them, plus run state,
-into the flat ``{placeholder}`` dictionary the renderer expects.
+into the flat ``{placeholder}`` dictionary the renderer expects. Given the
+template's placeholder set, only those entries are built, so a scout prompt
+never reads the judges' outputs and a judge prompt never reads the planner's.
+Given a ``Budget``, the injected outputs are cut to fit it (see ``budget``).
+Outputs that a quorum-opened stage went ahead without are flagged: late ones
+where they appear, missing ones by a note in their place.
 """
 from __future__ import annotations
 
 import re
-from typing import Dict, List, Optional
+from typing import AbstractSet, Callable, Dict, List, Optional
 
-from models import JUDGE_SLOTS, SCOUT_SLOTS, AgentRecord, WorkflowConfig, WorkflowState
-from readiness import ready_agents
-from store import FileStore
+from budget import Budget, SlotUsage, allocate, estimate_tokens, fit, truncation_marker
+from models import AgentRecord, WorkflowConfig, WorkflowState
+from readiness import arrives_late, ready_agents, stage_index
+from store import StateStore
+
+
+# Entries that inject agent outputs: placeholder -> (role, heading when the role's slots are joined).
+OUTPUT_ENTRIES = {
+    "scout_outputs": ("scout", "Scout outputs"),
+    "judge_outputs": ("judge", "Judge outputs"),
+    "planner_output": ("planner", None),
+    "verifier_output": ("verifier", None),
+}
+JOIN_TOKENS = 4  # the "---" separator join_outputs puts between outputs
 
 
 def join_outputs(heading: str, chunks: List[str]) -> str:
@@ -29,25 +45,87 @@ def parse_signal(text: str) -> Optional[bool]:
 
 
 def build_context(
-    store: FileStore,
+    store: StateStore,
     cfg: WorkflowConfig,
     state: WorkflowState,
     record: AgentRecord,
     pipeline_cmd: str,
+    placeholders: Optional[AbstractSet[str]] = None,
+    budget: Optional[Budget] = None,
+    outputs: Optional[Dict[str, str]] = None,
 ) -> Dict[str, str]:
-    scout_outputs = [store.read_output(state, slot) for slot in SCOUT_SLOTS]
-    judge_outputs = [store.read_output(state, slot) for slot in JUDGE_SLOTS]
-    planner_output = store.read_output(state, "planner-1")
-    verifier_output = store.read_output(state, "verifier-1")
-    return {
-        "project_anchor": cfg.project_anchor,
-        "package_or_folder_scope": record.scope or "<assign a scope>",
-        "slot_name": record.slot,
-        "scout_outputs": join_outputs("Scout outputs", scout_outputs),
-        "judge_outputs": join_outputs("Judge outputs", judge_outputs),
-        "planner_output": planner_output or "<none yet>",
-        "verifier_output": verifier_output or "<none yet>",
-        "implementation_signal": state.signal_label,
-        "ready_agents": ", ".join(ready_agents(state)) or "<none>",
-        "pipeline_cmd": pipeline_cmd,
+    """The context for ``record``'s prompt; only ``placeholders`` when given, else every entry.
+
+    With a ``budget``, the outputs are fitted to it and its accounting is filled in.
+    ``outputs`` memoizes output reads by slot across calls (a batch of prompts).
+    """
+    outputs = {} if outputs is None else outputs
+
+    def read(slot: str) -> str:
+        if slot not in outputs:
+            outputs[slot] = store.read_output(state, slot)
+        return outputs[slot]
+
+    scalars: Dict[str, Callable[[], str]] = {
+        "project_anchor": lambda: cfg.project_anchor,
+        "package_or_folder_scope": lambda: record.scope or "<assign a scope>",
+        "slot_name": lambda: record.slot,
+        "implementation_signal": lambda: state.signal_label,
+        "ready_agents": lambda: ", ".join(ready_agents(state)) or "<none>",
+        "pipeline_cmd": lambda: pipeline_cmd,
+    }
+    wanted = scalars.keys() | OUTPUT_ENTRIES.keys() if placeholders is None else placeholders
+    context = {name: build() for name, build in scalars.items() if name in wanted}
+    entries = [name for name in OUTPUT_ENTRIES if name in wanted]
+    texts = {
+        slot: read(slot) for name in entries for slot in state.slots(OUTPUT_ENTRIES[name][0])
     }
+    if budget is not None:
+        texts = _fit_budget(store, state, texts, budget, dict(context, **dict.fromkeys(entries, "")))
+    for name in entries:
+        role, heading = OUTPUT_ENTRIES[name]
+        chunks = [_flag_quorum(state, slot, texts[slot]) for slot in state.slots(role)]
+        if heading is not None:
+            context[name] = join_outputs(heading, chunks)
+        else:
+            context[name] = (chunks[0] if chunks else "") or "<none yet>"
+    if budget is not None:
+        budget.total_tokens = estimate_tokens("".join(budget.template.pieces(context)))
+    return context
+
+
+def _flag_quorum(state: WorkflowState, slot: str, text: str) -> str:
+    """``text``, noting when the next stage opened on a quorum without ``slot``."""
+    record = state.agents[slot]
+    if not record.late and not arrives_late(state, slot):
+        return text
+    position = stage_index(state).stage_of[slot]
+    stage, upstream = state.stages[position + 1], state.stages[position]
+    later = stage.role + ("s" if len(stage.slots) > 1 else "")
+    if record.late:
+        return f"[{slot} came in late: the {later} had already opened without it.]\n\n{text}"
+    return (
+        f"[{slot} is not in yet: the {later} opened once {stage.quorum} of "
+        f"{len(upstream.slots)} {upstream.role}s had submitted.]"
+    )
+
+
+def _fit_budget(
+    store: StateStore, state: WorkflowState, texts: Dict[str, str], budget: Budget, skeleton: Dict[str, str]
+) -> Dict[str, str]:
+    """Cut each output to its fair share of what the template, small entries and quorum notes leave."""
+    budget.fixed_tokens = estimate_tokens("".join(budget.template.pieces(skeleton)))
+    needs = {slot: estimate_tokens(text) for slot, text in texts.items()}
+    notes = sum(estimate_tokens(_flag_quorum(state, slot, "")) for slot in texts)  # added after the cut
+    available = budget.max_tokens - budget.fixed_tokens - notes - JOIN_TOKENS * len(texts)
+    shares = allocate(needs, available)
+    fitted: Dict[str, str] = {}
+    for slot, text in texts.items():
+        kept, kept_tokens, kept_sections, sections = fit(text, shares[slot], needs[slot])
+        usage = SlotUsage(slot, needs[slot], shares[slot], kept_tokens, kept_sections, sections)
+        budget.slots.append(usage)
+        if usage.truncated:
+            location = store.location(state.agents[slot].output_file or "")
+            text = (kept.rstrip() + "\n\n" + truncation_marker(usage, location)).lstrip()
+        fitted[slot] = text
+    return fitted
@@ -1,44 +1,113 @@
 """Workflow gating: which agent slots are ready to run right now.
 
-The pipeline is a strict relay. Each stage unlocks only once every slot in
-the previous stage has submitted:
+The pipeline is a relay over the state's stage graph. Each stage unlocks once
+every slot in the previous stage has submitted, or a quorum of them when the
+run was initialised with one:
 
     scouts -> judges -> planner -> verifier -> (signal) -> implementer
+
+A slot that submits after its next stage opened without it is "late": it is
+still accepted, and flagged so later prompts can say so.
+
+``StageIndex`` keeps a submitted counter per stage, so the gate of a stage is
+one comparison however wide the fan-out, and a finished stage is never
+rescanned.
 """
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Optional
+
+from models import WorkflowState
+
+# What each role waits on, for stores that answer readiness in a query: the role
+# whose slots (all, or the run's quorum of them) must be submitted first,
+# "signal" for the gate, or None.
+ROLE_GATES: Dict[str, Optional[str]] = {
+    "scout": None,
+    "judge": "scout",
+    "planner": "judge",
+    "verifier": "planner",
+    "implementer": "signal",
+}
+
+
+class StageIndex:
+    """Slot -> stage position, plus the number of submitted slots in each stage."""
+
+    def __init__(self, state: WorkflowState) -> None:
+        self.stage_of: Dict[str, int] = {}
+        self.submitted: List[int] = []
+        for position, stage in enumerate(state.stages):
+            count = 0
+            for slot in stage.slots:
+                self.stage_of[slot] = position
+                count += state.agents[slot].status == "submitted"
+            self.submitted.append(count)
 
-from models import JUDGE_SLOTS, SCOUT_SLOTS, WorkflowState
 
-STAGES = [SCOUT_SLOTS, JUDGE_SLOTS, ["planner-1"], ["verifier-1"], ["implementer-1"]]
+def stage_index(state: WorkflowState) -> StageIndex:
+    if state.index is None:
+        state.index = StageIndex(state)
+    return state.index
 
 
-def _status(state: WorkflowState, slot: str) -> str:
-    return state.agents[slot].status
+def mark_submitted(state: WorkflowState, slot: str) -> None:
+    """Set ``slot`` submitted and keep its stage counter current."""
+    record = state.agents[slot]
+    if record.status != "submitted" and state.index is not None and slot in state.index.stage_of:
+        state.index.submitted[state.index.stage_of[slot]] += 1
+    record.status = "submitted"
 
 
-def _pending(state: WorkflowState, slots: List[str]) -> List[str]:
-    return [slot for slot in slots if _status(state, slot) == "pending"]
+def _stage_open(state: WorkflowState, index: StageIndex, position: int) -> bool:
+    stage = state.stages[position]
+    if stage.gate == "signal":
+        return state.implementation_signal
+    if position == 0:
+        return True
+    return index.submitted[position - 1] >= _needed(state, position)
 
 
-def _all_submitted(state: WorkflowState, slots: List[str]) -> bool:
-    return all(_status(state, slot) == "submitted" for slot in slots)
+def _needed(state: WorkflowState, position: int) -> int:
+    """How many slots of the stage before ``position`` must submit to open it."""
+    return state.stages[position].quorum or len(state.stages[position - 1].slots)
 
 
 def ready_agents(state: WorkflowState) -> List[str]:
-    ready = _pending(state, SCOUT_SLOTS)
-    if _all_submitted(state, SCOUT_SLOTS):
-        ready += _pending(state, JUDGE_SLOTS)
-    if _all_submitted(state, JUDGE_SLOTS):
-        ready += _pending(state, ["planner-1"])
-    if _all_submitted(state, ["planner-1"]):
-        ready += _pending(state, ["verifier-1"])
-    if state.implementation_signal:
-        ready += _pending(state, ["implementer-1"])
+    index = stage_index(state)
+    ready: List[str] = []
+    for position, stage in enumerate(state.stages):
+        if index.submitted[position] < len(stage.slots) and _stage_open(state, index, position):
+            ready += [slot for slot in stage.slots if state.agents[slot].status == "pending"]
     return ready
 
 
+def is_ready(state: WorkflowState, slot: str) -> bool:
+    index = stage_index(state)
+    position = index.stage_of.get(slot)
+    if position is None or state.agents[slot].status != "pending":
+        return False
+    return _stage_open(state, index, position)
+
+
+def not_ready_reason(state: WorkflowState, slot: str) -> str:
+    position = stage_index(state).stage_of.get(slot)
+    if position is None:
+        return "This slot is not ready yet."
+    if state.stages[position].gate == "signal":
+        return "Verifier must approve implementation first or set signal manually."
+    previous = state.stages[position - 1]
+    count = len(previous.slots)
+    needed = _needed(state, position)
+    if needed < count:
+        return f"{needed} of the {count} {previous.role}s must be submitted first (quorum)."
+    if count == 1:
+        return f"{previous.role.capitalize()} must be submitted first."
+    if count == 2:
+        return f"Both {previous.role}s must be submitted first."
+    return f"All {count} {previous.role}s must be submitted first."
+
+
 def downstream_submitted(state: WorkflowState, slot: str) -> bool:
     """True once any slot in a stage after ``slot``'s stage has submitted.
 
@@ -46,8 +115,20 @@ def downstream_submitted(state: WorkflowState, slot: str) -> bool:
     already advanced, which would otherwise silently invalidate later stages
     or flip an already-open gate shut.
     """
-    for index, slots in enumerate(STAGES):
-        if slot in slots:
-            later = [s for stage in STAGES[index + 1:] for s in stage]
-            return any(state.agents[s].status == "submitted" for s in later)
-    return False
+    index = stage_index(state)
+    position = index.stage_of.get(slot)
+    if position is None:
+        return False
+    return any(index.submitted[position + 1:])
+
+
+def arrives_late(state: WorkflowState, slot: str) -> bool:
+    """True if submitting ``slot`` now would be late: its next stage already opened on a quorum.
+
+    Call before the slot is marked submitted. A re-submit is never late in itself.
+    """
+    index = stage_index(state)
+    position = index.stage_of.get(slot)
+    if position is None or position + 1 >= len(state.stages) or state.agents[slot].status == "submitted":
+        return False
+    return state.stages[position + 1].gate != "signal" and _stage_open(state, index, position + 1)
@@ -1,21 +1,58 @@
 """Template rendering for agent prompts.
 
 Templates are bundled with the plugin under ``templates/`` and use simple
-``{placeholder}`` substitution.
+``{placeholder}`` substitution. Each template is parsed once into literal and
+placeholder segments (re-parsed when its mtime or size changes), and a render
+is one pass over those segments: substituted values are never scanned again, so
+a ``{placeholder}`` inside an agent's output stays literal. A ``{name}`` with no
+context value is left as written.
 """
 from __future__ import annotations
 
-from typing import Dict
+import re
+from typing import Dict, FrozenSet, List, Optional, TextIO, Tuple
 
 from paths import TEMPLATE_DIR
 
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class CompiledTemplate:
+    """Alternating segments: even indexes are literal text, odd ones placeholder names."""
+
+    def __init__(self, text: str) -> None:
+        self.segments: List[str] = _PLACEHOLDER.split(text)
+        self.placeholders: FrozenSet[str] = frozenset(self.segments[1::2])
+
+    def pieces(self, context: Dict[str, str]) -> List[str]:
+        out = self.segments[:]
+        for index in range(1, len(out), 2):
+            name = out[index]
+            value = context.get(name)
+            out[index] = "{" + name + "}" if value is None else value
+        return out
+
 
 class TemplateRenderer:
-    def render(self, name: str, context: Dict[str, str]) -> str:
+    def __init__(self) -> None:
+        self._cache: Dict[str, Tuple[int, int, CompiledTemplate]] = {}
+
+    def compile(self, name: str) -> CompiledTemplate:
         template_path = TEMPLATE_DIR / f"{name}.md"
-        if not template_path.exists():
-            raise SystemExit(f"Missing template: {template_path}")
-        text = template_path.read_text(encoding="utf-8")
-        for key, value in context.items():
-            text = text.replace("{" + key + "}", value)
-        return text
+        try:
+            info = template_path.stat()
+        except FileNotFoundError:
+            raise SystemExit(f"Missing template: {template_path}") from None
+        cached: Optional[Tuple[int, int, CompiledTemplate]] = self._cache.get(name)
+        if cached is not None and cached[:2] == (info.st_mtime_ns, info.st_size):
+            return cached[2]
+        template = CompiledTemplate(template_path.read_text(encoding="utf-8"))
+        self._cache[name] = (info.st_mtime_ns, info.st_size, template)
+        return template
+
+    def render(self, name: str, context: Dict[str, str]) -> str:
+        return "".join(self.compile(name).pieces(context))
+
+    def write(self, name: str, context: Dict[str, str], out: TextIO) -> None:
+        """Stream the rendered prompt to ``out`` without joining it into one string first."""
+        out.writelines(self.compile(name).pieces(context))
@@ -0,0 +1,162 @@
+"""``pipeline.py serve``: one long-lived process that answers the CLI's verbs.
+
+Each CLI call otherwise starts an interpreter, builds a coordinator, store and
+renderer, and parses the state from disk. The service keeps one coordinator per
+``(store, state dir)`` for as long as it runs. That keeps compiled templates
+in memory, along with the config, state and outputs each ``FileStore`` last
+saw. Writes still go straight through the store, under its lock, and any change
+made by another writer is caught by the store's file stamps.
+
+Transport is a Unix socket, ``.claude/elegance_pipeline/serve.sock`` by default
+or ``$ELEGANCE_PIPELINE_SOCKET``. Only the owner can connect to it. A request is
+one JSON object, and the client half-closes the socket when it has sent it:
+
+    {"state_dir": "/abs/dir", "explicit": true, "store": "files",
+     "args": {"command": "submit", "role": "scout", "slot": "scout-1", "text": "..."}}
+
+``args`` holds the parsed CLI arguments, with paths already resolved and any
+submission text already read. The reply is one JSON line, ``{"stderr": ...,
+"exit": ...}``, where ``exit`` is 0, a code, or the message a ``SystemExit``
+carried. The verb's stdout follows as raw UTF-8, because a prompt can run to
+megabytes and escaping it into JSON would cost more than it saves. While the socket
+accepts connections, the CLI forwards every verb through it. With
+``--no-service``, when nothing is listening, or when the service stalls or dies
+before its status line, the CLI runs the verb in its own process.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple
+
+from coordinator import WorkflowCoordinator
+from renderer import TemplateRenderer
+
+Dispatch = Callable[[WorkflowCoordinator, argparse.Namespace], None]
+REQUEST_TIMEOUT_S = 5.0  # to read a request; the CLI sends it whole, then half-closes
+CLIENT_TIMEOUT_S = 10.0  # a silent service this long is stalled: the CLI runs the verb itself
+
+
+class PipelineService:
+    """Runs requests against cached coordinators, capturing what each verb prints."""
+
+    def __init__(self, dispatch: Dispatch) -> None:
+        self.dispatch = dispatch
+        self.renderer = TemplateRenderer()  # shared: every run renders the same templates
+        self.coordinators: Dict[Tuple[str, str, bool], WorkflowCoordinator] = {}
+
+    def coordinator(self, store: str, state_dir: str, explicit: bool) -> WorkflowCoordinator:
+        key = (store, state_dir, explicit)
+        if key not in self.coordinators:
+            self.coordinators[key] = WorkflowCoordinator(Path(state_dir), explicit, store, self.renderer)
+        return self.coordinators[key]
+
+    def handle(self, request: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """``(status, stdout)`` of running one request."""
+        out, err = io.StringIO(), io.StringIO()
+        code: Any = 0
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                coordinator = self.coordinator(request["store"], request["state_dir"], request["explicit"])
+                self.dispatch(coordinator, argparse.Namespace(**request["args"]))
+            except SystemExit as exc:
+                code = exc.code
+            except Exception:  # a bug in one request must not take the service down
+                code = traceback.format_exc()
+        return {"stderr": err.getvalue(), "exit": code}, out.getvalue()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+    timeout = REQUEST_TIMEOUT_S  # one request at a time: a client that never half-closes must not wedge the rest
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.read())
+        except (ValueError, TimeoutError) as exc:
+            status: Dict[str, Any] = {"stderr": "", "exit": f"Bad request: {exc}"}
+            stdout = ""
+        else:
+            status, stdout = self.server.service.handle(request)
+        self.wfile.write(json.dumps(status).encode("utf-8") + b"\n")
+        self.wfile.write(stdout.encode("utf-8"))
+
+
+class _Server(socketserver.UnixStreamServer):
+    def __init__(self, path: Path, service: PipelineService) -> None:
+        self.service = service
+        super().__init__(str(path), _Handler)
+
+
+def serve(dispatch: Dispatch, path: Path) -> None:
+    """Answer requests on ``path`` one at a time until interrupted."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("serve needs Unix domain sockets")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        live = _connect(path)
+        if live is not None:
+            live.close()
+            raise SystemExit(f"Already serving on {path}")
+        path.unlink()  # left behind by a service that did not shut down cleanly
+    umask = os.umask(0o177)  # the socket is owner-only: whoever can connect can write state
+    try:
+        server = _Server(path, PipelineService(dispatch))
+    finally:
+        os.umask(umask)
+    print(f"Serving elegance pipeline on {path}", file=sys.stderr)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # unwind through the cleanup below
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+
+
+def _connect(path: Path) -> Optional[socket.socket]:
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:  # stale socket file: nobody is listening
+        sock.close()
+        return None
+    return sock
+
+
+def forward(path: Path, request: Dict[str, Any], out: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Run ``request`` on the service at ``path``, copying its stdout to ``out``.
+
+    Returns the reply's status, or None if no service answered there: nothing
+    listening, a stall of ``CLIENT_TIMEOUT_S``, or a service that died before its
+    status line. The caller then runs the verb itself.
+    """
+    sock = _connect(path)
+    if sock is None:
+        return None
+    with sock, sock.makefile("rb") as reply:
+        try:
+            sock.settimeout(CLIENT_TIMEOUT_S)
+            sock.sendall(json.dumps(request).encode("utf-8"))
+            sock.shutdown(socket.SHUT_WR)
+            status = json.loads(reply.readline())
+        except (OSError, ValueError):  # includes timeouts and an empty status line
+            return None
+        try:
+            shutil.copyfileobj(reply, out, 1 << 20)
+        except OSError as exc:  # the verb ran there: report the cut, do not run it again here
+            status["exit"] = f"Service reply cut short: {exc}"
+    return status
@@ -0,0 +1,247 @@
+"""SQLite-backed state store: many pipeline runs in one WAL-mode database.
+
+Selected with ``--store sqlite:PATH``. A run is keyed by its resolved
+``--state-dir`` (nothing is written there); the config, agent records, outputs
+(as blobs) and event history of every run share one database, so cross-run
+questions such as "which runs have ready judges?" are one indexed query
+instead of a crawl over state directories.
+
+Writes run in ``BEGIN IMMEDIATE`` transactions (the database's write lock plays
+the part of ``FileStore.lock()``); reads outside one run in a deferred
+transaction, so a load sees one consistent snapshot while writers proceed.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from models import AgentRecord, WorkflowConfig, WorkflowState, build_fresh_state
+from readiness import ROLE_GATES, ready_agents
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run TEXT PRIMARY KEY,
+    config TEXT NOT NULL,
+    implementation_signal INTEGER NOT NULL DEFAULT 0,
+    verifier_signal_source TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agents (
+    run TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    role TEXT NOT NULL,
+    status TEXT NOT NULL,
+    scope TEXT,
+    output_file TEXT,
+    submitted_at TEXT,
+    late INTEGER NOT NULL DEFAULT 0,
+    output BLOB,
+    PRIMARY KEY (run, slot)
+);
+CREATE INDEX IF NOT EXISTS agents_by_role_status ON agents (role, status, run);
+CREATE INDEX IF NOT EXISTS agents_by_run_role ON agents (run, role, status);
+CREATE TABLE IF NOT EXISTS events (
+    run TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    at TEXT NOT NULL,
+    event TEXT NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (run, seq)
+);
+"""
+
+_AGENT_COLUMNS = "slot, role, status, scope, output_file, submitted_at, late"
+
+
+class SqliteStore:
+    def __init__(self, path: Path, state_dir: Path) -> None:
+        self.path = path
+        self.state_dir = state_dir
+        self.run = str(state_dir)
+        self._depth = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30.0, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(agents)")}
+        if "late" not in columns:  # a database made before quorums
+            self._db.execute("ALTER TABLE agents ADD COLUMN late INTEGER NOT NULL DEFAULT 0")
+
+    @property
+    def spec(self) -> str:
+        return f"sqlite:{self.path}"
+
+    @contextmanager
+    def _transaction(self, immediate: bool) -> Iterator[None]:
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self._db.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        self._depth = 1
+        try:
+            yield
+        except BaseException:
+            self._depth = 0
+            self._db.execute("ROLLBACK")
+            raise
+        self._depth = 0
+        self._db.execute("COMMIT")
+
+    def lock(self) -> ContextManager[None]:
+        """Hold the database write lock; everything inside commits together. Re-entrant."""
+        return self._transaction(immediate=True)
+
+    def has_config(self) -> bool:
+        return self._db.execute("SELECT 1 FROM runs WHERE run = ?", (self.run,)).fetchone() is not None
+
+    def load_config(self) -> WorkflowConfig:
+        row = self._db.execute("SELECT config FROM runs WHERE run = ?", (self.run,)).fetchone()
+        if row is None:
+            raise SystemExit(f"No run {self.run} in {self.path}. Run init first.")
+        return WorkflowConfig(**json.loads(row[0]))
+
+    def load_state(self, cfg: WorkflowConfig) -> WorkflowState:
+        state = build_fresh_state(cfg)
+        with self._transaction(immediate=False):
+            row = self._db.execute(
+                "SELECT implementation_signal, verifier_signal_source FROM runs WHERE run = ?", (self.run,)
+            ).fetchone()
+            agents = self._db.execute(
+                f"SELECT {_AGENT_COLUMNS} FROM agents WHERE run = ?", (self.run,)
+            ).fetchall()
+        if row is not None:
+            state.implementation_signal, state.verifier_signal_source = bool(row[0]), row[1]
+        for slot, role, status, scope, output_file, submitted_at, late in agents:
+            state.agents[slot] = AgentRecord(role, slot, status, scope, output_file, submitted_at, bool(late))
+        return state
+
+    def start(self, cfg: WorkflowConfig, state: WorkflowState) -> None:
+        with self.lock():
+            for table in ("runs", "agents", "events"):
+                self._db.execute(f"DELETE FROM {table} WHERE run = ?", (self.run,))
+            self._db.execute(
+                "INSERT INTO runs (run, config, implementation_signal, verifier_signal_source, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.run, json.dumps(asdict(cfg)), state.implementation_signal,
+                 state.verifier_signal_source, _now()),
+            )
+            self._db.executemany(
+                f"INSERT INTO agents (run, {_AGENT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self.run, r.slot, r.role, r.status, r.scope, r.output_file, r.submitted_at, r.late)
+                 for r in state.agents.values()],
+            )
+            self._append(state, "init")
+
+    def record(self, cfg: WorkflowConfig, state: WorkflowState, event: str, *slots: str) -> None:
+        """Persist a change to ``state``: the agent ``slots`` (if any) and the implementation signal.
+
+        Every change is also an ``events`` row, so ``history`` works with or without ``--journal``.
+        """
+        with self.lock():
+            self._db.execute(
+                "UPDATE runs SET implementation_signal = ?, verifier_signal_source = ?, updated_at = ? WHERE run = ?",
+                (state.implementation_signal, state.verifier_signal_source, _now(), self.run),
+            )
+            self._db.executemany(
+                "UPDATE agents SET status = ?, scope = ?, output_file = ?, submitted_at = ?, late = ? "
+                "WHERE run = ? AND slot = ?",
+                [(r.status, r.scope, r.output_file, r.submitted_at, r.late, self.run, r.slot)
+                 for r in (state.agents[slot] for slot in slots)],
+            )
+            for slot in slots or [None]:
+                self._append(state, event, slot)
+
+    def events(self) -> List[Dict[str, Any]]:
+        rows = self._db.execute(
+            "SELECT seq, at, event, body FROM events WHERE run = ? ORDER BY seq", (self.run,)
+        ).fetchall()
+        return [dict(seq=seq, at=at, event=event, **json.loads(body)) for seq, at, event, body in rows]
+
+    def version(self) -> Any:
+        """A token that changes whenever the run's state does: its last update and event."""
+        return self._db.execute(
+            "SELECT updated_at, (SELECT MAX(seq) FROM events WHERE run = ?) FROM runs WHERE run = ?",
+            (self.run, self.run),
+        ).fetchone()
+
+    def read_output(self, state: WorkflowState, slot: str) -> str:
+        record = state.agents.get(slot)
+        if not record or not record.output_file:
+            return ""
+        row = self._db.execute(
+            "SELECT output FROM agents WHERE run = ? AND slot = ?", (self.run, slot)
+        ).fetchone()
+        return bytes(row[0]).decode("utf-8").strip() if row and row[0] is not None else ""
+
+    def write_output(self, slot: str, text: str) -> str:
+        self._db.execute(
+            "UPDATE agents SET output = ? WHERE run = ? AND slot = ?", (text.encode("utf-8"), self.run, slot)
+        )
+        return f"outputs/{slot}.md"
+
+    def location(self, output_file: str) -> str:
+        return f"{self.path} (run {self.run}: {output_file})"
+
+    def runs(self, ready_role: Optional[str] = None) -> List[Tuple[str, List[str]]]:
+        """``(run, ready slots)`` for every run, or only runs with a ready ``ready_role`` slot."""
+        if ready_role is not None:
+            return self._runs_ready_for(ready_role)
+        with self._transaction(immediate=False):
+            runs = self._db.execute("SELECT run, config, implementation_signal FROM runs ORDER BY run").fetchall()
+            rows = self._db.execute("SELECT run, slot, status FROM agents").fetchall()
+        states: Dict[str, WorkflowState] = {}
+        for run, config, signal in runs:
+            states[run] = build_fresh_state(WorkflowConfig(**json.loads(config)))
+            states[run].implementation_signal = bool(signal)
+        for run, slot, status in rows:
+            record = states[run].agents.get(slot)
+            if record is not None:
+                record.status = status
+        return [(run, ready_agents(state)) for run, state in states.items()]
+
+    def _runs_ready_for(self, role: str) -> List[Tuple[str, List[str]]]:
+        # Mirrors readiness.ready_agents: a pending slot is ready once the run's quorum for
+        # its role, or else every slot of the gating role, has submitted, and the
+        # implementer once the signal is on.
+        gate = ROLE_GATES[role]
+        sql = "SELECT a.run, a.slot FROM agents a JOIN runs r ON r.run = a.run WHERE a.role = ? AND a.status = 'pending'"
+        params: Tuple[Any, ...] = (role,)
+        if gate == "signal":
+            sql += " AND r.implementation_signal = 1"
+        elif gate is not None:
+            sql += (
+                " AND (SELECT COUNT(*) FROM agents g WHERE g.run = a.run AND g.role = ? AND g.status = 'submitted')"
+                " >= COALESCE(json_extract(r.config, '$.quorums.' || a.role),"
+                " (SELECT COUNT(*) FROM agents g WHERE g.run = a.run AND g.role = ?))"
+            )
+            params += (gate, gate)
+        # "<role>-<n>" by n, not as text, so scout-10 follows scout-9 as in ready_agents.
+        order = " ORDER BY a.run, CAST(substr(a.slot, length(a.role) + 2) AS INTEGER), a.slot"
+        found: Dict[str, List[str]] = {}
+        for run, slot in self._db.execute(sql + order, params):
+            found.setdefault(run, []).append(slot)
+        return list(found.items())
+
+    def _append(self, state: WorkflowState, kind: str, slot: Optional[str] = None) -> None:
+        body: Dict[str, Any] = {"signal": [state.implementation_signal, state.verifier_signal_source]}
+        if slot is not None:
+            body["agent"] = asdict(state.agents[slot])
+        self._db.execute(
+            "INSERT INTO events (run, seq, at, event, body) "
+            "SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ? FROM events WHERE run = ?",
+            (self.run, _now(), kind, json.dumps(body, separators=(",", ":")), self.run),
+        )
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
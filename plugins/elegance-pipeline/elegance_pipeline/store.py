@@ -2,19 +2,151 @@
 
 State is project-local at {cwd}/.claude/elegance_pipeline/state/ by default,
 or under an explicit --state-dir.
+
+Scouts and judges submit in parallel, so every read-modify-write of the state
+runs under ``FileStore.lock()`` (an ``fcntl`` lock on ``<state-dir>/.lock``),
+and every file is written to a temp file and renamed over the target, so a
+concurrent reader sees the old content or the new, never half of it.
+
+In journal mode (``init --journal``) a submit or signal change appends one
+event line to ``events.jsonl`` instead of rewriting the whole state document.
+Loading folds the events written since the last snapshot into it, and every
+``snapshot_every`` events the folded state is written back as the new snapshot.
+The journal itself is never rewritten, so it doubles as the run's audit trail.
+
+A ``FileStore`` keeps the last config, state and outputs it loaded or wrote,
+each stamped with its file's inode, mtime and size. A load whose files still
+carry those stamps is answered from memory, so a long-lived store (``serve``)
+skips the JSON parsing, while a change by any other writer is still seen.
+
+``StateStore`` is the interface the coordinator codes against; ``open_store``
+picks ``FileStore`` or, for ``--store sqlite:PATH``, ``sqlite_store.SqliteStore``.
 """
 from __future__ import annotations
 
 import json
+import os
+from contextlib import contextmanager
 from dataclasses import asdict
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Protocol, Sequence, Tuple
 
 from models import AgentRecord, WorkflowConfig, WorkflowState, build_fresh_state
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks; writes stay atomic, submits unserialized
+    fcntl = None
+
+
+class StateStore(Protocol):
+    """Where a run's config, state, outputs and events live."""
+
+    state_dir: Path
+
+    @property
+    def spec(self) -> str: ...
+
+    def lock(self) -> ContextManager[None]: ...
+
+    def has_config(self) -> bool: ...
+
+    def load_config(self) -> WorkflowConfig: ...
+
+    def load_state(self, cfg: WorkflowConfig) -> WorkflowState: ...
+
+    def start(self, cfg: WorkflowConfig, state: WorkflowState) -> None: ...
+
+    def record(self, cfg: WorkflowConfig, state: WorkflowState, event: str, *slots: str) -> None: ...
+
+    def events(self) -> List[Dict[str, Any]]: ...
+
+    def version(self) -> Any: ...
+
+    def read_output(self, state: WorkflowState, slot: str) -> str: ...
+
+    def write_output(self, slot: str, text: str) -> str: ...
+
+    def location(self, output_file: str) -> str: ...
+
+    def runs(self, ready_role: Optional[str] = None) -> List[Tuple[str, List[str]]]: ...
+
+
+def open_store(spec: str, state_dir: Path) -> StateStore:
+    """``files`` (the default) or ``sqlite:PATH``."""
+    if spec == "files":
+        return FileStore(state_dir)
+    kind, _, target = spec.partition(":")
+    if kind == "sqlite" and target:
+        from sqlite_store import SqliteStore
+
+        return SqliteStore(Path(target).expanduser().resolve(), state_dir)
+    raise SystemExit(f"Unknown --store {spec!r}; use 'files' or 'sqlite:PATH'")
+
+
+def atomic_write(path: Path, text: str) -> None:
+    """Write ``text`` to ``path`` via a temp file in the same directory and ``os.replace``."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+Stamp = Optional[Tuple[int, int, int]]
+
+
+def _stamp(path: Path) -> Stamp:
+    """``(inode, mtime_ns, size)`` of ``path``, or None if it is missing; every write renames a new inode in."""
+    try:
+        info = path.stat()
+    except FileNotFoundError:
+        return None
+    return info.st_ino, info.st_mtime_ns, info.st_size
+
 
 class FileStore:
     def __init__(self, state_dir: Path) -> None:
         self.state_dir = state_dir
+        self._lock_fd: Optional[int] = None
+        self._lock_depth = 0
+        # Journal position of the last load: events folded, the snapshot's share of
+        # them, and the byte offset just past the last complete event line.
+        self._seq = 0
+        self._snapshot_seq = 0
+        self._journal_end = 0
+        # The last config, state and outputs seen, keyed by the stamps of their files.
+        self._config: Optional[Tuple[Stamp, WorkflowConfig]] = None
+        self._state: Optional[Tuple[Tuple[Stamp, ...], WorkflowState]] = None
+        self._outputs: Dict[Path, Tuple[Stamp, str]] = {}
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Hold the state dir's exclusive lock; re-entrant within one store."""
+        if self._lock_depth == 0:
+            self.ensure_dirs()
+            fd = os.open(self.state_dir / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            self._lock_fd = fd
+        self._lock_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._state = None  # the command may have changed the state without recording it
+            raise
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0 and self._lock_fd is not None:
+                os.close(self._lock_fd)  # closing releases the lock
+                self._lock_fd = None
+
+    @property
+    def spec(self) -> str:
+        return "files"
 
     @property
     def config_path(self) -> Path:
@@ -24,26 +156,55 @@ class FileStore:
     def state_path(self) -> Path:
         return self.state_dir / "workflow_state.json"
 
+    @property
+    def journal_path(self) -> Path:
+        return self.state_dir / "events.jsonl"
+
     def ensure_dirs(self) -> None:
         self.state_dir.mkdir(parents=True, exist_ok=True)
         (self.state_dir / "outputs").mkdir(parents=True, exist_ok=True)
 
+    def has_config(self) -> bool:
+        return self.config_path.exists()
+
     def load_config(self) -> WorkflowConfig:
-        if not self.config_path.exists():
+        stamp = _stamp(self.config_path)
+        if stamp is None:
             raise SystemExit(f"Missing config: {self.config_path}. Run init first.")
-        data = json.loads(self.config_path.read_text(encoding="utf-8"))
-        return WorkflowConfig(**data)
+        if self._config is None or self._config[0] != stamp:
+            data = json.loads(self.config_path.read_text(encoding="utf-8"))
+            self._config = stamp, WorkflowConfig(**data)
+        return self._config[1]
 
     def save_config(self, cfg: WorkflowConfig) -> None:
         self.ensure_dirs()
-        self.config_path.write_text(json.dumps(asdict(cfg), indent=2), encoding="utf-8")
+        atomic_write(self.config_path, json.dumps(asdict(cfg), indent=2))
+        self._config = _stamp(self.config_path), cfg
 
     def load_state(self, cfg: WorkflowConfig) -> WorkflowState:
-        if not self.state_path.exists():
-            state = build_fresh_state(cfg)
-            self.save_state(state)
-            return state
-        raw = json.loads(self.state_path.read_text(encoding="utf-8"))
+        if self._state is not None and self._state[0] == self._state_stamps():
+            return self._state[1]
+        if cfg.journal:
+            state = self._load_journaled(cfg)
+        elif not self.state_path.exists():
+            with self.lock():
+                if not self.state_path.exists():  # not created by a racing writer meanwhile
+                    state = build_fresh_state(cfg)
+                    self.save_state(state)
+                    return state
+            return self.load_state(cfg)
+        else:
+            state = self._overlay(cfg, json.loads(self.state_path.read_text(encoding="utf-8")))
+        self._remember(state)
+        return state
+
+    def _state_stamps(self) -> Tuple[Stamp, ...]:
+        return _stamp(self.config_path), _stamp(self.state_path), _stamp(self.journal_path)
+
+    def _remember(self, state: WorkflowState) -> None:
+        self._state = self._state_stamps(), state
+
+    def _overlay(self, cfg: WorkflowConfig, raw: Dict[str, Any]) -> WorkflowState:
         # Start from a fresh state so every required slot exists, then overlay the persisted
         # records. A partial or stale state file can't drop slots that downstream code indexes.
         state = build_fresh_state(cfg)
@@ -57,29 +218,160 @@ class FileStore:
                 scope=value["scope"],
                 output_file=value["output_file"],
                 submitted_at=value["submitted_at"],
+                late=value.get("late", False),  # absent from state written before quorums
             )
         return state
 
     def save_state(self, state: WorkflowState) -> None:
         self.ensure_dirs()
-        payload = {
-            "implementation_signal": state.implementation_signal,
-            "verifier_signal_source": state.verifier_signal_source,
-            "agents": {key: asdict(value) for key, value in state.agents.items()},
-        }
-        self.state_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        atomic_write(self.state_path, json.dumps(_state_payload(state), indent=2))
+        self._remember(state)
+
+    def start(self, cfg: WorkflowConfig, state: WorkflowState) -> None:
+        """Write ``cfg`` and the fresh ``state`` of a new run, discarding any previous one."""
+        with self.lock():
+            self._state = None
+            self.save_config(cfg)
+            if not cfg.journal:
+                self.journal_path.unlink(missing_ok=True)
+                self.save_state(state)
+                return
+            self._seq = self._snapshot_seq = self._journal_end = 0
+            atomic_write(self.journal_path, "")
+            payload = dict(_state_payload(state), seq=0, journal_offset=0)
+            atomic_write(self.state_path, json.dumps(payload, separators=(",", ":")))
+            self._append(cfg, state, "init", ())
+
+    def record(self, cfg: WorkflowConfig, state: WorkflowState, event: str, *slots: str) -> None:
+        """Persist a change to ``state``: the agent ``slots`` (if any) and the implementation signal.
+
+        One write however many slots changed: a state rewrite, or one journal
+        append with an event per slot. Call under ``lock()``, after ``load_state``
+        under the same lock.
+        """
+        if cfg.journal:
+            self._append(cfg, state, event, slots)
+            self._remember(state)
+        else:
+            self.save_state(state)
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Every complete event in the journal, oldest first; empty outside journal mode."""
+        return self._read_events(0)[0]
+
+    def version(self) -> Any:
+        """A token that changes whenever the run's config or state does; three ``stat`` calls."""
+        return self._state_stamps()
+
+    # -- journal --------------------------------------------------------
+
+    def _load_journaled(self, cfg: WorkflowConfig) -> WorkflowState:
+        try:
+            raw = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:  # lost or never written: replay the whole journal
+            raw = {}
+        state = self._overlay(cfg, raw)
+        self._seq = self._snapshot_seq = raw.get("seq", 0)
+        events, self._journal_end = self._read_events(raw.get("journal_offset", 0))
+        for event in events:
+            _fold(state, event)
+            self._seq = event["seq"]
+        return state
+
+    def _read_events(self, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """``(events, end)`` for the complete lines from byte ``offset`` on.
+
+        Replay stops at the first line that is unterminated or unparsable (an
+        append cut short by a crash); ``end`` is where that line starts, and the
+        next append truncates the journal back to it.
+        """
+        try:
+            with open(self.journal_path, "rb") as fh:
+                fh.seek(offset)
+                data = fh.read()
+        except FileNotFoundError:
+            return [], offset
+        events, end = [], offset
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                break
+            end += len(line)
+        return events, end
+
+    def _append(self, cfg: WorkflowConfig, state: WorkflowState, kind: str, slots: Sequence[str]) -> None:
+        """Append one event per slot (one slotless event for none) in a single write."""
+        at = datetime.now(timezone.utc).isoformat()
+        lines = []
+        for slot in slots or [None]:
+            self._seq += 1
+            event: Dict[str, Any] = {
+                "seq": self._seq,
+                "at": at,
+                "event": kind,
+                "signal": [state.implementation_signal, state.verifier_signal_source],
+            }
+            if slot is not None:
+                event["agent"] = asdict(state.agents[slot])
+            lines.append(json.dumps(event, separators=(",", ":")) + "\n")
+        line = "".join(lines).encode("utf-8")
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            if os.fstat(fd).st_size != self._journal_end:
+                os.ftruncate(fd, self._journal_end)  # drop a torn tail before appending
+            os.write(fd, line)  # one write on an O_APPEND fd: readers see all of the lines or none
+        finally:
+            os.close(fd)
+        self._journal_end += len(line)
+        if self._seq - self._snapshot_seq >= cfg.snapshot_every:
+            payload = dict(_state_payload(state), seq=self._seq, journal_offset=self._journal_end)
+            atomic_write(self.state_path, json.dumps(payload, separators=(",", ":")))
+            self._snapshot_seq = self._seq
 
     def read_output(self, state: WorkflowState, slot: str) -> str:
         record = state.agents.get(slot)
         if not record or not record.output_file:
             return ""
         path = self.state_dir / record.output_file
-        if not path.exists():
+        stamp = _stamp(path)
+        if stamp is None:
             return ""
-        return path.read_text(encoding="utf-8").strip()
+        cached = self._outputs.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = self._outputs[path] = stamp, path.read_text(encoding="utf-8").strip()
+        return cached[1]
 
     def write_output(self, slot: str, text: str) -> str:
         self.ensure_dirs()
         output_rel = f"outputs/{slot}.md"
-        (self.state_dir / output_rel).write_text(text, encoding="utf-8")
+        path = self.state_dir / output_rel
+        atomic_write(path, text)
+        self._outputs[path] = _stamp(path), text.strip()
         return output_rel
+
+    def location(self, output_file: str) -> str:
+        return str(self.state_dir / output_file)
+
+    def runs(self, ready_role: Optional[str] = None) -> List[Tuple[str, List[str]]]:
+        raise SystemExit("runs queries every pipeline in one database; use --store sqlite:PATH")
+
+
+def _state_payload(state: WorkflowState) -> Dict[str, Any]:
+    return {
+        "implementation_signal": state.implementation_signal,
+        "verifier_signal_source": state.verifier_signal_source,
+        # vars() copy, not asdict(): the records are flat, and asdict's deep copy was most of
+        # a wide run's save time.
+        "agents": {key: dict(vars(value)) for key, value in state.agents.items()},
+    }
+
+
+def _fold(state: WorkflowState, event: Dict[str, Any]) -> None:
+    """Apply one journal event to ``state``; an ``init`` event carries no agent."""
+    state.implementation_signal, state.verifier_signal_source = event["signal"]
+    agent = event.get("agent")
+    if agent is not None:
+        state.agents[agent["slot"]] = AgentRecord(**agent)
@@ -7,11 +7,12 @@ from __future__ import annotations
 
 import shlex
 from pathlib import Path
+from typing import Any, Dict, List
 
 from models import AgentRecord, WorkflowConfig, WorkflowState
 from paths import PIPELINE_SCRIPT
 from readiness import ready_agents
-from store import FileStore
+from store import StateStore
 
 
 def signal_line(state: WorkflowState) -> str:
@@ -26,18 +27,33 @@ def state_dir_label(state_dir: Path, explicit: bool) -> str:
     return f"{state_dir} (default shared state)"
 
 
-def pipeline_cmd(state_dir: Path, explicit: bool) -> str:
-    script = shlex.quote(str(PIPELINE_SCRIPT))
+def pipeline_cmd(state_dir: Path, explicit: bool, store_spec: str = "files") -> str:
+    cmd = f"python {shlex.quote(str(PIPELINE_SCRIPT))}"
+    if store_spec != "files":
+        cmd += f" --store {shlex.quote(store_spec)}"
     if not explicit:
-        return f"python {script}"
-    return f"python {script} --state-dir {shlex.quote(str(state_dir))}"
+        return cmd
+    return f"{cmd} --state-dir {shlex.quote(str(state_dir))}"
 
 
 def agent_line(record: AgentRecord) -> str:
     extra = f" scope={record.scope}" if record.scope else ""
     out = f" output={record.output_file}" if record.output_file else ""
     when = f" at={record.submitted_at}" if record.submitted_at else ""
-    return f"- {record.slot}: {record.status}{extra}{out}{when}"
+    late = " late" if record.late else ""
+    return f"- {record.slot}: {record.status}{late}{extra}{out}{when}"
+
+
+def event_line(event: Dict[str, Any]) -> str:
+    agent = event.get("agent")
+    what = f" {agent['slot']}: {agent['status']}{' late' if agent.get('late') else ''}" if agent else ""
+    on, source = event["signal"]
+    gate = f" signal={'READY' if on else 'BLOCKED'}" + (f" (source: {source})" if source else "")
+    return f"#{event['seq']} {event['at']} {event['event']}{what}{gate}"
+
+
+def run_line(run: str, ready: List[str]) -> str:
+    return f"- {run}: ready {', '.join(ready) or '<none>'}"
 
 
 def print_ready(state: WorkflowState) -> None:
@@ -52,10 +68,14 @@ def report_init(cfg: WorkflowConfig, label: str) -> None:
     print("Scout scopes:")
     for index, scope in enumerate(cfg.scopes, start=1):
         print(f"  scout-{index}: {scope}")
+    print(f"Judges: {cfg.judges}")
+    for role, upstream, count in (("judge", "scouts", cfg.scouts), ("planner", "judges", cfg.judges)):
+        if role in cfg.quorums:
+            print(f"{role.capitalize()} quorum: {cfg.quorums[role]} of {count} {upstream}")
 
 
-def warn_on_shared_reuse(store: FileStore, explicit: bool) -> None:
-    reusing_shared = not explicit and store.config_path.exists()
+def warn_on_shared_reuse(store: StateStore, explicit: bool) -> None:
+    reusing_shared = not explicit and store.has_config()
     if reusing_shared:
         print(
             f"Warning: reusing default shared state at {store.state_dir}. "
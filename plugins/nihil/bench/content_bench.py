@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Timing benchmark for the secret check on Write/Edit/MultiEdit contents.
+
+Runs ``_nihil_rules.evaluate`` on large file-tool payloads — ordinary source,
+text dense with near-miss literals (``task-``, ``sk-short``, ``AKIA`` stubs,
+``-----BEGIN`` headers), long runs built to make a backtracking pattern retry,
+a key at the very end, and a MultiEdit whose many edits add up to the same
+size — and prints the worst time across the write-capable modes. ``--hook``
+also times the whole ``nihil-pretooluse.py`` process on each payload (stdin
+read, JSON parse, scan).
+
+    python3 bench/content_bench.py [--mib 10] [--hook]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+import _nihil_rules as rules  # noqa: E402
+
+MODES = ("implement", "release", "raze")  # review denies every write before reading it
+HOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "nihil-pretooluse.py")
+SOURCE = "def handler(event, context):\n    return {'status': 200, 'body': format(event)}  # task-42\n"
+NEAR_MISS = "task-runner sk-short AKIAshort ghp_x xoxq -----BEGIN CERTIFICATE----- oy2Q AIza "
+KEY = "ghp_" + "A1b2C3d4" * 5
+
+
+def _fill(unit, size, tail=""):
+    return (unit * (size // len(unit) + 1))[:max(size - len(tail), 0)] + tail
+
+
+# name -> builder(size in chars) returning (tool, tool_input)
+CASES = {
+    "Write, clean source": lambda n: ("Write", {"file_path": "app.py", "content": _fill(SOURCE, n)}),
+    "Write, near-miss literals": lambda n: ("Write", {"file_path": "a.txt", "content": _fill(NEAR_MISS, n)}),
+    "Write, key at the end": lambda n: ("Write", {"file_path": "a.py",
+                                                  "content": _fill(SOURCE, n, "TOKEN = '" + KEY + "'\n")}),
+    "Write, -----BEGIN + capitals": lambda n: ("Write", {"file_path": "a.txt",
+                                                        "content": "-----BEGIN " + "A" * n}),
+    "Write, repeated sk-": lambda n: ("Write", {"file_path": "a.txt", "content": _fill("sk-", n)}),
+    "Edit, near-miss new_string": lambda n: ("Edit", {"file_path": "a.txt", "old_string": "x",
+                                                      "new_string": _fill(NEAR_MISS, n)}),
+    "MultiEdit, 1000 edits": lambda n: ("MultiEdit", {"file_path": "a.py", "edits": [
+        {"old_string": "x", "new_string": _fill(NEAR_MISS, n // 1000)} for _ in range(1000)]}),
+}
+
+
+def worst(tool, tool_input):
+    slowest, verdict = 0.0, None
+    for mode in MODES:
+        start = time.perf_counter()
+        verdict = rules.evaluate(mode, tool, tool_input)[0]
+        slowest = max(slowest, time.perf_counter() - start)
+    return slowest, verdict
+
+
+def hook(tool, tool_input, mode="raze"):
+    """Wall time of one ``nihil-pretooluse.py`` process deciding this call."""
+    workdir = tempfile.mkdtemp(prefix="nihil-content-bench-")
+    env = dict(os.environ, CLAUDE_PLUGIN_DATA=workdir)
+    payload = json.dumps({"session_id": "bench", "tool_name": tool, "tool_input": tool_input}).encode("utf-8")
+    try:
+        subprocess.run([sys.executable, "-c", "import sys; sys.path.insert(0, sys.argv[1]); "
+                        "import _nihil_state; _nihil_state.write_mode('bench', sys.argv[2])",
+                        os.path.dirname(HOOK), mode], env=env, check=True)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, HOOK], input=payload, env=env, stdout=subprocess.DEVNULL, check=True)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mib", type=int, default=10, help="payload size (default 10 MiB)")
+    parser.add_argument("--hook", action="store_true", help="also time the whole hook process")
+    args = parser.parse_args()
+
+    size = args.mib * 1024 * 1024
+    print("%-30s %6s %10s %10s %10s  %s" % ("case", "MiB", "worst ms", "MiB/s", "hook ms", "verdict"))
+    for name, build in CASES.items():
+        tool, tool_input = build(size)
+        took, verdict = worst(tool, tool_input)
+        cell = "%.1f" % (hook(tool, tool_input) * 1e3) if args.hook else "-"
+        print("%-30s %6d %10.2f %10.0f %10s  %s" % (
+            name, args.mib, took * 1e3, args.mib / took if took else float("inf"), cell, verdict or "allow"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
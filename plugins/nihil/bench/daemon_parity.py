@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Parity check: the guard daemon path against the in-process PreToolUse hook.
+
+Starts ``nihil-daemon.py serve`` on a scratch ``$CLAUDE_PLUGIN_DATA`` with the
+``files`` store and runs ``nihil-pretooluse.py`` against it:
+
+  same store   the daemon answers (``ok``) and the hook prints exactly what it
+               prints with no daemon running.
+  other store  a hook with ``NIHIL_STATE_STORE=sqlite`` whose mode lives only in
+               the sqlite store. The daemon, reading ``files``, knows no mode for
+               the session; it must refuse (``err store mismatch``) so the hook
+               decides in-process and still denies, instead of allowing.
+  idle client  a connection that never sends its payload is closed after the
+               daemon's read timeout instead of holding a thread forever.
+
+    python3 bench/daemon_parity.py
+
+Exits 1 if any check fails.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+sys.path.insert(0, SCRIPTS)
+import _nihil_state as st  # noqa: E402
+
+IDLE_LIMIT = 10.0  # seconds; the daemon's read timeout is 5
+COMMANDS = ("ls -la", "git commit -m wip", "git push --force origin main", "npm publish", "rm -rf build")
+
+
+def run(script, env, payload=b"", *args):
+    return subprocess.run([sys.executable, os.path.join(SCRIPTS, script), *args],
+                          input=payload, env=env, capture_output=True, timeout=30)
+
+
+def set_mode(env, session, mode):
+    code = "import _nihil_state as st; st.write_mode(%r, %r)" % (session, mode)
+    subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS, env=env, check=True)
+
+
+def raw_reply(path, header, payload):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(path)
+        sock.sendall(header + payload)
+        sock.shutdown(socket.SHUT_WR)
+        return sock.makefile("rb").read()
+
+
+def payload(session, command):
+    return json.dumps({"session_id": session, "tool_name": "Bash", "tool_input": {"command": command}}).encode()
+
+
+def check(data_dir, failures):
+    files_env = dict(os.environ, CLAUDE_PLUGIN_DATA=data_dir, NIHIL_STATE_STORE="files")
+    files_env.pop("NIHIL_TELEMETRY", None)
+    sqlite_env = dict(files_env, NIHIL_STATE_STORE="sqlite")
+    set_mode(files_env, "s-files", "review")
+    set_mode(sqlite_env, "s-sqlite", "review")
+
+    expected = {}
+    for session, env in (("s-files", files_env), ("s-sqlite", sqlite_env)):
+        for command in COMMANDS:
+            expected[session, command] = run("nihil-pretooluse.py", env, payload(session, command)).stdout
+
+    daemon = subprocess.Popen([sys.executable, os.path.join(SCRIPTS, "nihil-daemon.py"), "serve"],
+                              env=files_env, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            if run("nihil-daemon.py", files_env, b"", "status").returncode == 0:
+                break
+            time.sleep(0.05)
+        else:
+            failures.append("daemon did not start")
+            return
+        os.environ.update(CLAUDE_PLUGIN_DATA=data_dir)
+        path = st.daemon_socket_path()
+        for store in ("files", "sqlite"):
+            os.environ[st.STORE_ENV] = store
+            reply = raw_reply(path, st.daemon_header(), payload("s-files", "npm publish"))
+            want = b"ok\n" if store == "files" else b"err store mismatch\n"
+            if not reply.startswith(want):
+                failures.append("%s client: daemon replied %.80r, expected %r" % (store, reply, want))
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle:
+            idle.settimeout(IDLE_LIMIT)
+            idle.connect(path)
+            try:
+                idle.recv(1)
+            except socket.timeout:
+                failures.append("idle client: still connected after %gs" % IDLE_LIMIT)
+        for session, env in (("s-files", files_env), ("s-sqlite", sqlite_env)):
+            for command in COMMANDS:
+                actual = run("nihil-pretooluse.py", env, payload(session, command)).stdout
+                if actual != expected[session, command]:
+                    failures.append("%s %r: %.80r with the daemon, %.80r without"
+                                    % (env["NIHIL_STATE_STORE"], command, actual, expected[session, command]))
+        if not any(expected["s-sqlite", command] for command in COMMANDS):
+            failures.append("sqlite client: nothing denied in-process, so the mismatch case proves nothing")
+    finally:
+        run("nihil-daemon.py", files_env, b"", "stop")
+        try:
+            daemon.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            daemon.kill()
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+    data_dir = tempfile.mkdtemp(prefix="nihil-daemon-")
+    failures = []
+    try:
+        check(data_dir, failures)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    for failure in failures:
+        print("FAIL: " + failure)
+    if failures:
+        return 1
+    print("OK: the daemon matches the in-process hook on its own store and refuses another store; idle clients are dropped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
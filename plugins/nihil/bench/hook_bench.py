@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""Per-invocation latency benchmark for the three Nihil hook entry points.
+
+Feeds synthetic hook payloads through ``nihil-mode.py``, ``nihil-pretooluse.py``
+and ``nihil-stop.py`` two ways:
+
+  cold        one fresh ``python3 -S -E <script>`` per call, as hooks.json runs it;
+              wall time, plus the child's own peak RSS from one extra call.
+  inprocess   the script re-run with ``runpy`` inside one warm worker process,
+              so interpreter start-up and imports drop out and only the hook's
+              own work (rule scan, state I/O, transcript read) is left.
+
+The matrix covers every mode, every guarded tool, Bash commands from 10 B to
+1 MB, and Stop transcripts from 1 KiB to 1 GiB (each read with no saved index
+and again resumed from one). Each case reports p50/p95/p99 wall time and peak
+RSS; import time of the helper modules (``-X importtime``) and bare interpreter
+start-up are reported alongside.
+
+    python3 bench/hook_bench.py [--runs 25] [--quick] [--only pretooluse]
+                                [--save BASELINE.json] [--compare BASELINE.json]
+
+``--save`` writes every number to a JSON baseline; ``--compare`` re-runs the
+same matrix and exits 1 if any case's p50 regressed by more than
+``--threshold`` (default 1.25x). Compare baselines taken on the same machine.
+The daemon is never started: PreToolUse numbers are the in-process path.
+"""
+
+import argparse
+import inspect
+import io
+import json
+import math
+import os
+import platform
+import resource
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = os.path.join(HERE, "..", "scripts")
+sys.path.insert(0, SCRIPTS)
+import _nihil_state as st  # noqa: E402
+
+MODES = st.VALID_MODES
+HELPERS = ("_nihil_state", "_nihil_rules", "_nihil_cache", "_nihil_transcript")
+FLAGS = ("-S", "-E")  # as hooks/hooks.json runs them
+COMMAND_SIZES = (10, 1000, 100 * 1000, 1000 * 1000)
+TRANSCRIPT_KIB = (1, 1024, 100 * 1024, 1024 * 1024)
+FILE_TOOLS = {
+    "Write": {"file_path": "src/app.py", "content": "print('hello')\n"},
+    "Edit": {"file_path": "src/app.py", "old_string": "hello", "new_string": "world"},
+    "MultiEdit": {"file_path": "src/app.py", "edits": [{"old_string": "a", "new_string": "b"}]},
+    "NotebookEdit": {"notebook_path": "nb.ipynb", "new_source": "x = 1"},
+}
+
+
+def _fill(unit, size):
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def bash_command(size):
+    """A harmless command of ``size`` bytes: no rule fires, so every rule is scanned."""
+    if size < 64:
+        return _fill("ls -la ", size)
+    head, tail = "cat > gen.py <<'EOF'\n", "\nEOF"
+    body = _fill("def f(x):\n    return format(x) + 1  # update docs\n", size - len(head) - len(tail))
+    return head + body + tail
+
+
+def _label(size):
+    for unit, scale in (("GiB", 1 << 30), ("MiB", 1 << 20), ("KiB", 1 << 10)):
+        if size >= scale and size % scale == 0:
+            return "%d%s" % (size // scale, unit)
+    for unit, scale in (("MB", 1000 * 1000), ("KB", 1000)):
+        if size >= scale and size % scale == 0:
+            return "%d%s" % (size // scale, unit)
+    return "%dB" % size
+
+
+def write_transcript(path, size):
+    """Write a JSONL transcript of about ``size`` bytes whose last assistant turn lacks Verification."""
+    user = json.dumps({"type": "user", "message": {"role": "user", "content": "continue with the next file"}})
+    tool = json.dumps({"type": "user", "message": {"role": "user", "content": [
+        {"type": "tool_result", "content": _fill("build output line ok\n", 700)}]}})
+    assistant = json.dumps({"type": "assistant", "message": {"role": "assistant", "content": [
+        {"type": "text", "text": "Edited the parser and re-ran the build."}]}})
+    unit = (user + "\n" + tool + "\n" + assistant + "\n").encode("utf-8")
+    block = unit * max(1, (1 << 20) // len(unit))
+    final = (json.dumps({"type": "assistant", "message": {"role": "assistant", "content": [
+        {"type": "text", "text": "Done."}]}}) + "\n").encode("utf-8")
+    with open(path, "wb") as fh:
+        left = max(0, size - len(final))
+        while left >= len(block):
+            fh.write(block)
+            left -= len(block)
+        fh.write(unit * (left // len(unit)))
+        fh.write(final)
+
+
+class Case:
+    """One benchmark row: a script plus ``prepare(i)``, which does untimed setup and returns the payload."""
+
+    def __init__(self, name, script, prepare):
+        self.name = name
+        self.script = os.path.join(SCRIPTS, script)
+        self.prepare = prepare
+
+
+def _payload(obj):
+    return json.dumps(obj).encode("utf-8")
+
+
+def build_cases(workdir, command_sizes, transcript_kib):
+    cases = []
+
+    def add(name, script, prepare):
+        cases.append(Case(name, script, prepare))
+
+    for mode in MODES:
+        add("mode/" + mode, "nihil-mode.py",
+            lambda i, m=mode: _payload({"session_id": "bench-mode", "command_name": "nihil:" + m}))
+    add("mode/not-nihil", "nihil-mode.py",
+        lambda i: _payload({"session_id": "bench-mode", "command_name": "review"}))
+
+    add("pretooluse/no-mode/Bash", "nihil-pretooluse.py",
+        lambda i: _payload({"session_id": "bench-none", "tool_name": "Bash",
+                            "tool_input": {"command": "git push"}}))
+    for mode in MODES:
+        sid = "bench-" + mode
+        st.write_mode(sid, mode)
+        for tool, tool_input in FILE_TOOLS.items():
+            add("pretooluse/%s/%s" % (mode, tool), "nihil-pretooluse.py",
+                lambda i, s=sid, t=tool, ti=tool_input: _payload(
+                    {"session_id": s, "tool_name": t, "tool_input": ti}))
+        for size in command_sizes:
+            payload = _payload({"session_id": sid, "tool_name": "Bash",
+                                "tool_input": {"command": bash_command(size)}})
+            add("pretooluse/%s/Bash/%s" % (mode, _label(size)), "nihil-pretooluse.py",
+                lambda i, p=payload: p)
+
+    for kib in transcript_kib:
+        path = os.path.join(workdir, "transcript-%d.jsonl" % kib)
+        if not os.path.exists(path):
+            write_transcript(path, kib * 1024)
+        label = _label(kib * 1024)
+
+        def cold(i, path=path, label=label):
+            sid = "bench-stop-cold-%s-%d-%d" % (label, os.getpid(), i)
+            st.write_mode(sid, "implement")
+            return _payload({"session_id": sid, "transcript_path": path})
+
+        def resumed(i, path=path, label=label):
+            sid = "bench-stop-resumed-" + label
+            if i == 0:
+                st.write_mode(sid, "implement")
+                st.write_transcript_index(sid, _index(path))
+            st.clear_stop_flag(sid)
+            return _payload({"session_id": sid, "transcript_path": path})
+
+        add("stop/implement/%s/no-index" % label, "nihil-stop.py", cold)
+        add("stop/implement/%s/resumed" % label, "nihil-stop.py", resumed)
+    return cases
+
+
+def _index(path):
+    import _nihil_transcript as tr
+
+    return tr.scan_last_assistant(path)[1]
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100.0 * len(ordered)) - 1)]  # nearest rank
+
+    return {"p50_ms": rank(50) * 1e3, "p95_ms": rank(95) * 1e3, "p99_ms": rank(99) * 1e3}
+
+
+# Peak RSS of a cold call. ``ru_maxrss`` from wait4/getrusage also counts the
+# forking parent's pages from before exec, so the child reports its own VmHWM.
+RSS_PROBE = (
+    "import runpy, sys\n"
+    "sys.argv = sys.argv[1:]\n"
+    "try:\n"
+    "    runpy.run_path(sys.argv[0], run_name='__main__')\n"
+    "finally:\n"
+    "    sys.stderr.write('\\nnihil-bench-rss %d\\n' % peak_rss_kib())\n"
+)
+
+
+def peak_rss_kib():
+    """This process's own peak RSS (Linux ``VmHWM``), else ``ru_maxrss``."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_cold(case, runs, env):
+    times = []
+    for i in range(runs):
+        payload = case.prepare(i)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *FLAGS, case.script], input=payload, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    probe = "import resource\n" + inspect.getsource(peak_rss_kib) + RSS_PROBE
+    proc = subprocess.run([sys.executable, *FLAGS, "-c", probe, case.script], input=case.prepare(runs),
+                          env=env, capture_output=True)
+    peak = None
+    for line in proc.stderr.decode("utf-8", "replace").splitlines():
+        if line.startswith("nihil-bench-rss "):
+            peak = int(line.split()[1])
+    return dict(percentiles(times), peak_rss_kib=peak)
+
+
+def run_inprocess(case, runs):
+    """Run in this process; the first call (imports, pattern compiles) is a discarded warm-up."""
+    times = []
+    saved = sys.stdin, sys.stdout, sys.argv, list(sys.path)
+    try:
+        for i in range(runs + 1):
+            payload = case.prepare(i)
+            sys.stdin = io.TextIOWrapper(io.BytesIO(payload), encoding="utf-8")
+            sys.stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+            sys.argv = [case.script]
+            start = time.perf_counter()
+            try:
+                runpy.run_path(case.script, run_name="__main__")
+            except SystemExit:
+                pass
+            if i:
+                times.append(time.perf_counter() - start)
+            sys.path[:] = saved[3]
+    finally:
+        sys.stdin, sys.stdout, sys.argv = saved[:3]
+    return dict(percentiles(times), peak_rss_kib=peak_rss_kib())
+
+
+def import_times(env):
+    """Cumulative ``-X importtime`` microseconds per helper, plus bare interpreter start-up."""
+    code = "import sys; sys.path.insert(0, %r); import %s" % (SCRIPTS, ", ".join(HELPERS))
+    proc = subprocess.run([sys.executable, *FLAGS, "-X", "importtime", "-c", code], env=env,
+                          capture_output=True, text=True)
+    result = {}
+    for line in proc.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] in HELPERS:
+            result[parts[2] + "_us"] = int(parts[1])
+    starts = []
+    for _ in range(10):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *FLAGS, "-c", "pass"], env=env)
+        starts.append(time.perf_counter() - start)
+    result["interpreter_startup_ms"] = sorted(starts)[len(starts) // 2] * 1e3
+    return result
+
+
+def worker(args):
+    """Hidden ``--worker``: run the in-process half for one case and print its JSON."""
+    cases = {case.name: case for case in build_cases(args.workdir, args.command_sizes, args.transcript_kib)}
+    print(json.dumps(run_inprocess(cases[args.worker], args.runs)))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=25, help="timed calls per case and method")
+    parser.add_argument("--quick", action="store_true",
+                        help="5 runs, commands up to 100 KB, transcripts up to 1 MiB")
+    parser.add_argument("--max-transcript-mib", type=int, default=1024)
+    parser.add_argument("--only", default="", help="run only cases whose name contains this")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail on p50 regressions against a baseline")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.runs = min(args.runs, 5)
+    args.command_sizes = [size for size in COMMAND_SIZES if not args.quick or size <= 100 * 1000]
+    args.transcript_kib = [kib for kib in TRANSCRIPT_KIB
+                           if kib <= (1024 if args.quick else args.max_transcript_mib * 1024)]
+    if args.worker:
+        return worker(args)
+
+    workdir = tempfile.mkdtemp(prefix="nihil-hook-bench-")
+    os.environ["CLAUDE_PLUGIN_DATA"] = os.path.join(workdir, "state")
+    env = dict(os.environ)
+    store = st.store().name
+    try:
+        cases = [case for case in build_cases(workdir, args.command_sizes, args.transcript_kib)
+                 if args.only in case.name]
+        imports = import_times(env)
+        results = {}
+        print("%-40s %9s %9s %9s %9s   %9s %9s %9s" % (
+            "case", "cold p50", "p95", "p99", "RSS KiB", "warm p50", "p95", "p99"))
+        for case in cases:
+            cold = run_cold(case, args.runs, env)
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", case.name,
+                                   "--workdir", workdir, "--runs", str(args.runs),
+                                   "--max-transcript-mib", str(args.max_transcript_mib)]
+                                  + (["--quick"] if args.quick else []),
+                                  env=env, capture_output=True, text=True, check=True)
+            warm = json.loads(proc.stdout)
+            results[case.name] = {"cold": cold, "inprocess": warm}
+            print("%-40s %9.2f %9.2f %9.2f %9s   %9.3f %9.3f %9.3f" % (
+                case.name, cold["p50_ms"], cold["p95_ms"], cold["p99_ms"], cold["peak_rss_kib"],
+                warm["p50_ms"], warm["p95_ms"], warm["p99_ms"]))
+        print("import (cumulative us): " + ", ".join(
+            "%s=%s" % (key[:-3], value) for key, value in imports.items() if key.endswith("_us")))
+        print("interpreter start-up: %.2f ms" % imports["interpreter_startup_ms"])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "store": store, "runs": args.runs, "quick": args.quick,
+                 "taken": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "imports": imports,
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print("saved baseline to " + args.save)
+    if args.compare:
+        return compare(report, args.compare, args.threshold)
+    return 0
+
+
+def compare(report, path, threshold):
+    with open(path, "r", encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    regressions = []
+    for name, methods in report["results"].items():
+        for method, now in methods.items():
+            before = baseline.get("results", {}).get(name, {}).get(method)
+            if before and before["p50_ms"] > 0 and now["p50_ms"] > before["p50_ms"] * threshold:
+                regressions.append("%s [%s] p50 %.3f -> %.3f ms (x%.2f)" % (
+                    name, method, before["p50_ms"], now["p50_ms"], now["p50_ms"] / before["p50_ms"]))
+    for line in regressions:
+        print("REGRESSION " + line)
+    print("%d regression(s) above x%.2f against %s" % (len(regressions), threshold, path))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
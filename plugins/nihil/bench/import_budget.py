@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Cold-start import budget for the Nihil hooks.
+
+Runs each hook entry point the way ``hooks/hooks.json`` does (``python3 -S -E``)
+under ``-X importtime`` and adds up what the hook itself imports — every
+top-level import that a bare ``python3 -S -E -c pass`` does not already make.
+The best of ``--runs`` is compared with the case's budget; the check fails if
+any case is over budget or loads a module on ``FORBIDDEN``, the expensive
+imports the hot paths are written to avoid.
+
+    python3 bench/import_budget.py [--runs 7] [--scale 1.0] [--bundle PYZ] [--verbose]
+
+``--bundle`` runs the zipapp built by ``scripts/nihil-build.py`` instead of the
+scripts, with ``BUNDLE_OVERHEAD_MS`` added to each budget. ``--scale`` multiplies every budget (for a slow CI machine). Exits 1 on
+any violation.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = os.path.join(HERE, "..", "scripts")
+FLAGS = ("-S", "-E")
+
+# Modules no hook case may import: each costs 1-5 ms and has a cheaper substitute
+# (deferred socket, O_EXCL temp names, _blake2, the file store).
+FORBIDDEN = ("socket", "tempfile", "hashlib", "random", "shutil", "subprocess", "sqlite3", "argparse")
+
+# Budgets in milliseconds of import time on top of interpreter start-up, ~1.5x a
+# single-core CI VM. Every hook parses its payload with ``json`` (~4 ms with the
+# ``re``/``enum`` it pulls in); a PreToolUse call that scans (a miss, a file write)
+# also loads the rule table.
+BUDGETS_MS = {
+    "mode/set": 6.5,
+    "pretooluse/no-mode": 6.5,
+    "pretooluse/Bash/miss": 7.0,
+    "pretooluse/Bash/hit": 6.5,
+    "pretooluse/Write": 7.0,
+    "stop/allow": 6.5,
+}
+BUNDLE_OVERHEAD_MS = 3.0  # ``python3 app.pyz`` always imports runpy (~2.5 ms) to run __main__
+TRANSCRIPT = [
+    {"type": "user", "message": {"role": "user", "content": "fix the parser"}},
+    {"type": "assistant", "message": {"role": "assistant", "content": [
+        {"type": "text", "text": "Fixed it.\n\n## Verification\n\nRan the parser tests: 42 passed."}]}},
+]
+
+
+def cases(workdir):
+    """``(name, hook, payload)`` in run order; later cases rely on the state earlier ones leave."""
+    transcript = os.path.join(workdir, "transcript.jsonl")
+    with open(transcript, "w", encoding="utf-8") as fh:
+        fh.write("".join(json.dumps(line) + "\n" for line in TRANSCRIPT))
+    bash = {"session_id": "budget", "tool_name": "Bash", "tool_input": {"command": "git commit -m wip"}}
+    return [
+        ("mode/set", "mode", {"session_id": "budget", "command_name": "nihil:implement"}),
+        ("pretooluse/no-mode", "pretooluse", dict(bash, session_id="budget-none")),
+        ("pretooluse/Bash/miss", "pretooluse", bash),
+        ("pretooluse/Bash/hit", "pretooluse", bash),
+        ("pretooluse/Write", "pretooluse", {"session_id": "budget", "tool_name": "Write",
+                                            "tool_input": {"file_path": "a.py", "content": "x = 1\n"}}),
+        ("stop/allow", "stop", {"session_id": "budget", "transcript_path": transcript}),
+    ]
+
+
+def parse_importtime(stderr):
+    """``({top-level module: cumulative_us}, {every module imported})`` from ``-X importtime``."""
+    top, loaded = {}, set()
+    for line in stderr.splitlines():
+        parts = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # not an import line, or the header
+        name = parts[2].rstrip()
+        loaded.add(name.strip())
+        if not name.startswith("  "):  # nested imports are inside their parent's cumulative time
+            top[name.strip()] = int(parts[1])
+    return top, loaded
+
+
+def command(hook, bundle):
+    if bundle:
+        return [sys.executable] + list(FLAGS) + ["-X", "importtime", bundle, hook]
+    return [sys.executable] + list(FLAGS) + ["-X", "importtime", os.path.join(SCRIPTS, "nihil-%s.py" % hook)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import budget for the Nihil hooks")
+    parser.add_argument("--runs", type=int, default=7, help="best of N per case (default 7)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    parser.add_argument("--bundle", metavar="PYZ", help="check the zipapp from scripts/nihil-build.py")
+    parser.add_argument("--verbose", action="store_true", help="list each case's imports")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="nihil-import-budget-")
+    env = {key: value for key, value in os.environ.items() if not key.startswith("NIHIL_")}
+    try:
+        baseline = parse_importtime(subprocess.run(
+            [sys.executable] + list(FLAGS) + ["-X", "importtime", "-c", "pass"],
+            capture_output=True, text=True).stderr)[1]
+        failures = 0
+        print("%-24s %10s %10s  %s" % ("case", "import ms", "budget ms", "result"))
+        for name, hook, payload in cases(workdir):
+            best, shown, loaded = None, {}, set()
+            for run in range(args.runs):
+                # Each run gets its own state dir copy so a "miss" stays a miss.
+                state = os.path.join(workdir, "state-%d" % run)
+                env["CLAUDE_PLUGIN_DATA"] = state
+                proc = subprocess.run(command(hook, args.bundle), input=json.dumps(payload).encode("utf-8"),
+                                      env=env, capture_output=True)
+                top, names = parse_importtime(proc.stderr.decode("utf-8", "replace"))
+                imports = {module: us for module, us in top.items() if module not in baseline}
+                if best is None or sum(imports.values()) < best:
+                    best, loaded = sum(imports.values()), names
+                    shown = imports
+            banned = [module for module in FORBIDDEN if module in loaded]
+            budget = (BUDGETS_MS[name] + (BUNDLE_OVERHEAD_MS if args.bundle else 0)) * args.scale
+            ok = best / 1e3 <= budget and not banned
+            failures += not ok
+            verdict = "ok" if ok else "OVER BUDGET" if not banned else "imports " + ", ".join(banned)
+            print("%-24s %10.2f %10.2f  %s" % (name, best / 1e3, budget, verdict))
+            if args.verbose:
+                for module, us in sorted(shown.items(), key=lambda item: -item[1]):
+                    print("    %-30s %8d us" % (module, us))
+        return 1 if failures else 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
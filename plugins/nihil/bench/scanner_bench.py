@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Adversarial timing benchmark for the Nihil PreToolUse scanner.
+
+Feeds pathological and large Bash commands through ``_nihil_rules.check`` under
+every mode and prints the worst time per input size. Linear scanning shows up as
+a flat ``us/KiB`` column; a quadratic pattern shows up as that column growing
+with the size. With ``--legacy`` the pre-0.6 patterns (whose gaps were rescanned
+once per leading word) run on the same inputs for comparison, up to the size
+where one case exceeds ``--legacy-limit`` seconds.
+
+    python3 bench/scanner_bench.py [--max-kib 1024] [--legacy]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+import _nihil_rules as rules  # noqa: E402
+
+MODES = ("review", "implement", "release", "raze")
+
+# The pre-0.6 SECRET is rules.SECRET_REDACT; these two were rewritten in place.
+LEGACY = {
+    "a secret": rules.SECRET_REDACT,
+    "a destructive command": re.compile(
+        r"\brm\s+-[a-zA-Z]*[rRfF]|\bgit\s+reset\s+--hard\b|\bgit\s+push\b[^\n]*(?:--force\b|--force-with-lease\b|\s-f\b)"
+        r"|\bgit\s+clean\s+-[a-zA-Z]*[fF]|\bmkfs\b|\bdd\s+if=|>\s*/dev/sd"
+    ),
+    "a catastrophic command": re.compile(
+        r"\brm\s+-[a-zA-Z]*[rR][a-zA-Z]*\s+(?:--?[a-zA-Z][\w-]*\s+)*"
+        r"(?:/|~|\$\{?HOME\}?)(?:/\*?|\*)?(?=\s|$|;|&|\|)"
+        r"|\bmkfs(?:\.\w+)?\b"
+        r"|\bdd\b[^\n]*\bof=/dev/[a-z]"
+        r"|>\s*/dev/sd[a-z]"
+        r"|:\(\)\s*\{\s*:\s*\|\s*:\s*&\s*\}\s*;\s*:"
+    ),
+}
+
+
+def _fill(unit, size, tail=""):
+    return (unit * (size // len(unit) + 1))[:max(size - len(tail), 0)] + tail
+
+
+# name -> builder(size in chars). Each one targets a gap or run that a backtracking
+# engine can rescan: many leading words on one line with no (or a late) target.
+CASES = {
+    "reader words, no target": lambda n: _fill("cat x ", n),
+    "printer words + $VAR run": lambda n: _fill("echo ", n // 2) + "$" + "A" * (n // 2),
+    "git add words, no target": lambda n: _fill("git add x ", n),
+    "git push words, no --force": lambda n: _fill("git push ", n),
+    "rm flag run": lambda n: "rm -" + "r" * n,
+    "dd words, no of=": lambda n: _fill("dd x ", n),
+    "PRIVATE KEY header run": lambda n: "-----BEGIN " + _fill("A ", n),
+    "heredoc source": lambda n: "cat > gen.py <<'EOF'\n"
+                                 + _fill("def f(x):\n    return format(x) + 1  # update\n", n) + "\nEOF",
+    "late secret (deny path)": lambda n: _fill("echo x ", n, " $GITHUB_TOKEN"),
+}
+
+
+def worst(fn, command, budget=None):
+    """Worst wall time of ``fn(mode, command)`` across modes, in seconds."""
+    slowest = 0.0
+    for mode in MODES:
+        start = time.perf_counter()
+        fn(mode, command)
+        slowest = max(slowest, time.perf_counter() - start)
+        if budget and slowest > budget:
+            break
+    return slowest
+
+
+def current(mode, command):
+    return rules.check(mode, "Bash", {"command": command})
+
+
+def legacy(mode, command):
+    for label in ("a secret",) + rules.POLICIES[mode]["rules"]:
+        if LEGACY.get(label, rules.RULES[label][0]).search(command):
+            return label
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-kib", type=int, default=1024)
+    parser.add_argument("--legacy", action="store_true", help="also time the pre-0.6 patterns")
+    parser.add_argument("--legacy-limit", type=float, default=2.0)
+    args = parser.parse_args()
+
+    sizes = []
+    kib = 1
+    while kib <= args.max_kib:
+        sizes.append(kib)
+        kib *= 4
+    print("%-28s %8s %12s %10s %14s" % ("case", "KiB", "worst ms", "us/KiB", "legacy ms"))
+    for build in CASES.values():  # warm up: compile each fused pattern outside the timings
+        worst(current, build(1024))
+    for name, build in CASES.items():
+        legacy_dead = not args.legacy
+        for kib in sizes:
+            command = build(kib * 1024)
+            took = worst(current, command)
+            cell = "-"
+            if not legacy_dead:
+                old = worst(legacy, command, args.legacy_limit)
+                cell = "%.2f" % (old * 1e3)
+                if old > args.legacy_limit:
+                    cell = ">" + cell
+                    legacy_dead = True
+            print("%-28s %8d %12.2f %10.1f %14s" % (name, kib, took * 1e3, took * 1e6 / kib, cell))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
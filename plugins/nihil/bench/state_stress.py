@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Concurrency stress check for the Nihil session store.
+
+Writer processes keep re-pinning one session's mode (``write_mode``, alternating
+``review`` / ``implement``) and re-arming its Stop flag, the way parallel
+subagents and a racing ``/nihil:*`` expansion do, while reader processes poll
+``read_mode`` as the PreToolUse hook would. Enforcement holds only if no read
+ever comes back empty: a ``None`` means a hook would have allowed everything.
+
+    python3 bench/state_stress.py [--seconds 5] [--writers 8] [--readers 8]
+                                  [--store files|sqlite] [--legacy]
+
+Exits 1 if any read dropped the mode. ``--legacy`` writes with the pre-0.6
+in-place ``open(path, "w")`` for comparison (files store only); it drops reads
+within a second or two on most machines. The scratch state directory is made
+with ``tempfile`` (set ``TMPDIR`` to compare filesystems).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+import _nihil_state as st  # noqa: E402
+
+SESSION = "stress"
+
+
+def _legacy_write(mode):
+    with open(st.FileStore(st.state_dir()).path("mode", SESSION), "w", encoding="utf-8") as fh:
+        json.dump({"mode": mode}, fh)
+
+
+def writer(deadline, legacy, counts):
+    modes = ("review", "implement")
+    n = 0
+    while time.monotonic() < deadline:
+        mode = modes[n % 2]
+        if legacy:
+            _legacy_write(mode)
+        else:
+            st.write_mode(SESSION, mode)
+            st.clear_stop_flag(SESSION)
+            st.mark_stop_blocked(SESSION)
+        n += 1
+    counts.put(("writes", n, 0))
+
+
+def reader(deadline, counts):
+    n = dropped = 0
+    while time.monotonic() < deadline:
+        if st.read_mode(SESSION) is None:
+            dropped += 1
+        n += 1
+    counts.put(("reads", n, dropped))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--store", choices=("files", "sqlite"), default="files")
+    parser.add_argument("--legacy", action="store_true", help="write in place, as before 0.6")
+    args = parser.parse_args()
+    if args.legacy and args.store != "files":
+        parser.error("--legacy applies to the files store only")
+
+    workdir = tempfile.mkdtemp(prefix="nihil-stress-")
+    os.environ["CLAUDE_PLUGIN_DATA"] = workdir
+    os.environ[st.STORE_ENV] = args.store
+    st.write_mode(SESSION, "review")  # a mode is pinned before anyone reads
+
+    counts = multiprocessing.Queue()
+    deadline = time.monotonic() + args.seconds
+    procs = [multiprocessing.Process(target=writer, args=(deadline, args.legacy, counts))
+             for _ in range(args.writers)]
+    procs += [multiprocessing.Process(target=reader, args=(deadline, counts))
+              for _ in range(args.readers)]
+    for proc in procs:
+        proc.start()
+    totals = {"writes": [0, 0], "reads": [0, 0]}
+    for _ in procs:
+        kind, n, dropped = counts.get()
+        totals[kind][0] += n
+        totals[kind][1] += dropped
+    for proc in procs:
+        proc.join()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    writes, (reads, dropped) = totals["writes"][0], totals["reads"]
+    print("store={} writers={} readers={} seconds={:g}{}".format(
+        args.store, args.writers, args.readers, args.seconds, " (legacy writes)" if args.legacy else ""))
+    print("  {} writes, {} reads, {} reads saw no mode".format(writes, reads, dropped))
+    if dropped:
+        print("FAIL: enforcement dropped under concurrent writes")
+        return 1
+    print("OK: every read saw a mode")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Parity check: the reverse transcript reader and its resume index against ``readlines()``.
+
+``reference()`` is the pre-0.6 Stop hook's ``last_assistant_text`` (the whole
+file read in text mode, then scanned last line first), kept here verbatim as the
+oracle. Three checks run on seeded random transcripts: user turns, tool results,
+assistant turns with string or block content, blank, non-JSON, and non-object
+lines, invalid UTF-8, and lines longer than one read block. Each transcript uses
+LF or CRLF endings and may end in an unterminated line.
+
+- Reverse reader. ``iter_lines_reversed`` with small, odd block sizes and
+  random floors must yield exactly the ``\\n``-split lines of the region, last
+  first, with their offsets.
+- Full scan. ``scan_last_assistant`` without an index must return the
+  reference's text, on small transcripts and on ``--mib`` large ones whose last
+  assistant turn sits far back.
+- Resumed scan. A transcript is grown step by step: complete lines, a
+  half-written line finished on the next step, and appends with and without an
+  assistant turn. It is also truncated, rewritten in place before the saved
+  offset, replaced by a new file (a new inode), and handed another path's
+  index. Two rewrites turn a line after the remembered assistant turn into a
+  newer one of the same length: in place across the bytes the index's mark
+  covers, and in a new file that keeps those bytes, so that only the inode
+  check can catch it. After every step the resumed ``scan_last_assistant`` must agree with
+  the reference and with a fresh full scan.
+
+    python3 bench/transcript_parity.py [--rounds 200] [--mib 16] [--seed 1]
+
+Exits 1 on the first mismatches (up to ten are printed).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+import _nihil_transcript as tr  # noqa: E402
+
+
+# -- the pre-0.6 reader, as the reference ------------------------------------
+
+
+def reference(transcript_path):
+    """The pre-0.6 ``last_assistant_text``."""
+    if not transcript_path or not os.path.exists(transcript_path):
+        return ""
+    try:
+        with open(transcript_path, "r", encoding="utf-8", errors="replace") as fh:
+            lines = fh.readlines()
+    except OSError:
+        return ""
+    for line in reversed(lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(obj, dict):
+            continue
+        message = obj.get("message") if isinstance(obj.get("message"), dict) else None
+        role = obj.get("role") or (message or {}).get("role")
+        if role != "assistant" and obj.get("type") != "assistant":
+            continue
+        content = (message or {}).get("content", obj.get("content"))
+        text = tr.extract_text(content)
+        if text:
+            return text
+    return ""
+
+
+# -- synthetic transcripts ------------------------------------------------------
+
+
+def _line(rng, turn, big=False):
+    """One raw transcript line (no terminator)."""
+    kind = rng.choice(("user", "tool", "assistant", "assistant", "blocks", "empty", "junk", "list", "blank",
+                       "mention", "bytes"))
+    if big:
+        kind = rng.choice(("tool", "assistant"))
+    filler = "x" * (rng.randint(70_000, 200_000) if big else rng.randint(0, 300))
+    if kind == "user":
+        obj = {"type": "user", "message": {"role": "user", "content": "turn %d %s" % (turn, filler)}}
+    elif kind == "tool":
+        obj = {"type": "user", "message": {"role": "user", "content": [
+            {"type": "tool_result", "content": "result %d %s" % (turn, filler)}]}}
+    elif kind == "assistant":
+        obj = {"type": "assistant", "message": {"role": "assistant", "content": "reply %d é %s" % (turn, filler)}}
+    elif kind == "blocks":
+        obj = {"role": "assistant", "content": [{"type": "text", "text": "part %d" % turn}, "loose",
+                                                {"type": "tool_use", "name": "Bash"}]}
+    elif kind == "empty":  # an assistant turn with no text: skipped by both readers
+        obj = {"type": "assistant", "message": {"role": "assistant", "content": [{"type": "tool_use"}]}}
+    elif kind == "junk":
+        return b'{"type": "assistant", "message": {"content": "cut off'
+    elif kind == "list":
+        return b'["assistant", %d]' % turn
+    elif kind == "blank":
+        return b"   "
+    elif kind == "mention":  # "assistant" in a user turn: must not be taken for one
+        obj = {"type": "user", "message": {"role": "user", "content": "ask the assistant %d" % turn}}
+    else:  # invalid UTF-8 inside an assistant turn
+        return b'{"type": "assistant", "message": {"content": "bad \xff\xfe bytes %d"}}' % turn
+    return json.dumps(obj).encode("utf-8")
+
+
+def transcript(rng, lines, big=0):
+    """``lines`` random lines (``big`` of them longer than a read block) with one line ending."""
+    eol = rng.choice((b"\n", b"\r\n"))
+    raw = [_line(rng, turn, big=turn < big) for turn in range(lines)]
+    rng.shuffle(raw)
+    body = eol.join(raw)
+    return body + (eol if rng.random() < 0.7 else b""), eol
+
+
+def large_transcript(path, size, rng):
+    """About ``size`` bytes whose last assistant turn is near the start, behind tool results."""
+    with open(path, "wb") as fh:
+        fh.write(json.dumps({"type": "assistant", "message": {"role": "assistant", "content": "the one"}}).encode()
+                 + b"\n")
+        chunk = json.dumps({"type": "user", "message": {"role": "user", "content": [
+            {"type": "tool_result", "content": "y" * 4000}]}}).encode() + b"\r\n"
+        written = 0
+        while written < size:
+            fh.write(chunk)
+            written += len(chunk)
+        if rng.random() < 0.5:
+            fh.write(b'{"type": "user", "message": {"content": "half')  # unterminated tail
+
+
+# -- checks -----------------------------------------------------------------------
+
+
+def check_reverse_reader(rng, workdir, rounds, failures):
+    for round_ in range(rounds):
+        path = os.path.join(workdir, "reverse-%d.jsonl" % round_)  # a new file: no truncating flush
+        data, _eol = transcript(rng, rng.randint(0, 30), big=rng.randint(0, 1))
+        with open(path, "wb") as fh:
+            fh.write(data)
+        floor = rng.choice((0, rng.randint(0, len(data))))
+        floor = data.rfind(b"\n", 0, floor) + 1 if floor else 0  # a line start, as the index keeps it
+        expected, offset = [], floor
+        for raw in data[floor:].split(b"\n"):
+            expected.append((offset, raw))
+            offset += len(raw) + 1
+        if floor == len(data):
+            expected.pop()  # an empty region yields nothing (after a final ``\n``, an empty last line)
+        expected.reverse()
+        block = rng.choice((1, 2, 3, 7, 64, 4096, tr.BLOCK))
+        with open(path, "rb") as fh:
+            got = list(tr.iter_lines_reversed(fh, len(data), floor, block))
+        if got != expected:
+            failures.append("reverse reader: block %d floor %d of %d bytes" % (block, floor, len(data)))
+
+
+def _compare(failures, what, path, text):
+    expected = reference(path)
+    if text != expected:
+        failures.append("%s: %.60r, expected %.60r" % (what, text, expected))
+
+
+def check_full_scan(rng, workdir, rounds, mib, failures):
+    for round_ in range(rounds):
+        path = os.path.join(workdir, "full-%d.jsonl" % round_)
+        data, _eol = transcript(rng, rng.randint(0, 40), big=rng.randint(0, 2))
+        with open(path, "wb") as fh:
+            fh.write(data)
+        _compare(failures, "full scan", path, tr.scan_last_assistant(path)[0])
+    if mib:
+        path = os.path.join(workdir, "large.jsonl")
+        large_transcript(path, mib * 1024 * 1024, rng)
+        start = time.perf_counter()
+        text = tr.scan_last_assistant(path)[0]
+        took = time.perf_counter() - start
+        _compare(failures, "full scan, %d MiB" % mib, path, text)
+        print("%d MiB transcript, last assistant turn at the start: %.2f s" % (mib, took))
+
+
+def _replace(path, data):
+    """Write ``data`` to a new file and move it over ``path``: a new inode."""
+    fresh = path + ".new"
+    with open(fresh, "wb") as fh:
+        fh.write(data)
+    os.replace(fresh, path)
+
+
+def _promote(data, index, near_offset):
+    """``data`` with one non-assistant line between the remembered assistant turn and the
+    saved offset rewritten as an assistant turn of the same length, or ``None``.
+
+    With ``near_offset`` the line reaches into the ``MARK`` bytes before the offset
+    (what the mark guards), otherwise it ends clear of them (what only the inode guards).
+    A resume that trusted the stale index would re-read the old turn and miss this one.
+    """
+    if not index:
+        return None
+    offset, last = index["offset"], index["last"]
+    start = 0
+    for raw in data[:offset].split(b"\n")[:-1]:  # complete lines only
+        end = start + len(raw)
+        if (last is None or start > last) and not tr.assistant_text(raw) and \
+                (end + 1 > offset - tr.MARK) == near_offset:
+            cr = b"\r" if raw.endswith(b"\r") else b""
+            turn = json.dumps({"type": "assistant", "message": {"content": ""}}).encode()
+            pad = len(raw) - len(cr) - len(turn)
+            if pad > 0:
+                turn = json.dumps({"type": "assistant", "message": {"content": "z" * pad}}).encode()
+                return data[:start] + turn + cr + data[end:]
+        start = end + 1
+    return None
+
+
+def check_resume(rng, workdir, rounds, failures):
+    for round_ in range(rounds):
+        path = os.path.join(workdir, "resume-%d.jsonl" % round_)
+        other = os.path.join(workdir, "other-%d.jsonl" % round_)
+        data, eol = transcript(rng, rng.randint(0, 10))
+        with open(path, "wb") as fh:
+            fh.write(data)
+        index = None
+        for step in range(12):
+            action = rng.choice(("append", "append", "append", "partial", "truncate", "rewrite", "replace",
+                                 "promote in place", "promote and replace", "foreign", "none"))
+            with open(path, "rb") as fh:
+                data = fh.read()
+            if action == "append":
+                extra, _ = transcript(rng, rng.randint(1, 4))
+                if data and not data.endswith(b"\n"):
+                    extra = eol + extra  # finish the half-written line first
+                with open(path, "ab") as fh:
+                    fh.write(extra)  # its own line ending: transcripts may mix them
+            elif action == "partial":  # a turn written in two pieces, scanned in between
+                whole = _line(rng, 100 + step)
+                cut = rng.randint(0, len(whole))
+                with open(path, "ab") as fh:
+                    fh.write((eol if data and not data.endswith(b"\n") else b"") + whole[:cut])
+                text, index = tr.scan_last_assistant(path, index)
+                _compare(failures, "round %d step %d half line" % (round_, step), path, text)
+                with open(path, "ab") as fh:
+                    fh.write(whole[cut:] + eol)
+            elif action == "truncate":
+                with open(path, "r+b") as fh:
+                    fh.truncate(rng.randint(0, len(data)))
+            elif action == "rewrite":  # same inode, bytes before the saved offset changed
+                if data:
+                    at = rng.randint(0, len(data) - 1)
+                    with open(path, "r+b") as fh:
+                        fh.seek(at)
+                        fh.write(b"{" if data[at:at + 1] != b"{" else b"[")
+            elif action == "replace":
+                _replace(path, transcript(rng, rng.randint(0, 10))[0])
+            elif action.startswith("promote"):
+                promoted = _promote(data, index, near_offset=action == "promote in place")
+                if promoted is None:
+                    action = "none"
+                elif action == "promote in place":
+                    with open(path, "r+b") as fh:
+                        fh.write(promoted)
+                else:
+                    _replace(path, promoted)
+            elif action == "foreign":
+                with open(other, "wb") as fh:
+                    fh.write(data)
+                index = tr.scan_last_assistant(other)[1]
+            text, index = tr.scan_last_assistant(path, index)
+            _compare(failures, "round %d step %d after %s" % (round_, step, action), path, text)
+            fresh = tr.scan_last_assistant(path)[0]
+            if fresh != text:
+                failures.append("round %d step %d after %s: resumed %.60r, full scan %.60r"
+                                % (round_, step, action, text, fresh))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--mib", type=int, default=16, help="size of the large transcript (0 skips it)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="nihil-transcript-")
+    failures = []
+    try:
+        check_reverse_reader(rng, workdir, args.rounds, failures)
+        check_full_scan(rng, workdir, args.rounds, args.mib, failures)
+        check_resume(rng, workdir, args.rounds, failures)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    for failure in failures[:10]:
+        print("FAIL: " + failure)
+    if failures:
+        print("%d mismatches" % len(failures))
+        return 1
+    print("OK: the reverse reader and resumed scans match readlines() on every transcript")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
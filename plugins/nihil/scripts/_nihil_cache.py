@@ -0,0 +1,159 @@
+"""Persistent decision cache for the Nihil PreToolUse hook.
+
+Agents re-run the same Bash commands all session (``git status``, ``git diff``,
+the test runner). On a hit the hook returns the stored decision without
+importing ``_nihil_rules`` — no pattern is compiled and nothing is scanned.
+
+One small JSON file per decision under ``<state dir>/decisions/<fingerprint>/``,
+named by a BLAKE2b hash of (mode, tool, normalized command). Neither the command
+nor any part of it is written to disk — only the hook's own output, whose denial
+reasons are already redacted. ``<fingerprint>`` hashes the ``_nihil_rules.py``
+source, so editing or upgrading the rule table starts a fresh directory and the
+old one is deleted at the next eviction pass: a stale rule can never answer.
+
+Least-recently-used eviction: a hit bumps the entry's mtime. Every ~64th store
+deletes entries older than ``MAX_AGE`` and then the oldest ones while the
+directory holds more than ``MAX_ENTRIES`` or ``MAX_BYTES``.
+
+Only Bash commands up to ``MAX_COMMAND`` characters are cached; surrounding
+whitespace is stripped first, which never changes a decision or its reason.
+``$NIHIL_DECISION_CACHE=0`` turns the cache off. Any I/O error is a miss.
+"""
+
+import os
+import time
+
+try:
+    from _blake2 import blake2b  # what hashlib.blake2b is, without loading OpenSSL (~2 ms)
+except ImportError:
+    from hashlib import blake2b
+
+import _nihil_state as st
+
+ENV = "NIHIL_DECISION_CACHE"
+MAX_COMMAND = 4096
+MAX_ENTRIES = 4096
+MAX_BYTES = 4 * 1024 * 1024
+MAX_AGE = 7 * 24 * 60 * 60
+EVICT_ONE_IN = 64
+RULES_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_nihil_rules.py")
+
+_fingerprint = None
+
+
+def enabled():
+    return (os.environ.get(ENV) or "").strip().lower() not in ("0", "false", "no", "off")
+
+
+def rules_fingerprint():
+    """Hash of the rule table's source; ``None`` if it cannot be read (then nothing is cached)."""
+    global _fingerprint
+    if _fingerprint is None:
+        try:
+            source = __loader__.get_data(RULES_SOURCE)  # a plain file, or inside the zipapp bundle
+            _fingerprint = blake2b(source, digest_size=8).hexdigest()
+        except OSError:
+            return None
+    return _fingerprint
+
+
+def _command(data):
+    tool_input = data.get("tool_input")
+    command = tool_input.get("command", "") if isinstance(tool_input, dict) else ""
+    return str(command).strip()
+
+
+def _entry_path(data, mode):
+    """Cache file for this call, or ``None`` if it is not cacheable."""
+    if not enabled() or data.get("tool_name") != "Bash":
+        return None
+    command = _command(data)
+    fingerprint = rules_fingerprint()
+    if len(command) > MAX_COMMAND or fingerprint is None:
+        return None
+    key = blake2b(b"\0".join((mode.encode("utf-8"), b"Bash", command.encode("utf-8", "surrogatepass"))),
+                  digest_size=16).hexdigest()
+    return os.path.join(st.state_dir(), "decisions", fingerprint, key + ".json")
+
+
+def lookup(data, mode):
+    """Return the cached ``(label, stdout)`` of ``_nihil_rules.decide(data, mode)``, or ``None``."""
+    path = _entry_path(data, mode)
+    if path is None:
+        return None
+    try:
+        with open(path, "rb") as fh:
+            entry = st.loads(fh.read())
+        os.utime(path)  # LRU: a hit is a use
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or not isinstance(entry.get("out"), str):
+        return None
+    return entry.get("label"), entry["out"]
+
+
+def store(data, mode, label, out):
+    """Remember a decision. Best effort: a lost entry only costs a rescan."""
+    path = _entry_path(data, mode)
+    if path is None:
+        return
+    import json
+
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp = path + ".%d.tmp" % os.getpid()
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"label": label, "out": out}, fh)
+        os.replace(tmp, path)  # atomic: a concurrent lookup never reads half an entry
+        if os.urandom(1)[0] < 256 // EVICT_ONE_IN:
+            evict(os.path.dirname(directory), os.path.basename(directory))
+    except OSError:
+        pass
+
+
+def evict(root, current):
+    """Drop other fingerprints' directories, then age and size out ``current``'s entries."""
+    now = time.time()
+    entries = []
+    with os.scandir(root) as dirs:
+        for entry in dirs:
+            if entry.name != current and entry.is_dir(follow_symlinks=False):
+                _remove_tree(entry.path)
+    with os.scandir(os.path.join(root, current)) as files:
+        for entry in files:
+            try:
+                info = entry.stat()
+            except OSError:
+                continue
+            if now - info.st_mtime > MAX_AGE:
+                _remove(entry.path)
+            else:
+                entries.append((info.st_mtime, info.st_size, entry.path))
+    if len(entries) <= MAX_ENTRIES and sum(item[1] for item in entries) <= MAX_BYTES:
+        return
+    entries.sort()
+    count, size = len(entries), sum(item[1] for item in entries)
+    for _, entry_size, path in entries:  # oldest first, down to 3/4 so this is not rerun at once
+        if count <= MAX_ENTRIES * 3 // 4 and size <= MAX_BYTES * 3 // 4:
+            break
+        _remove(path)
+        count -= 1
+        size -= entry_size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _remove_tree(path):
+    with os.scandir(path) as files:
+        for entry in files:
+            _remove(entry.path)
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
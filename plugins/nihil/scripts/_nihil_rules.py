@@ -0,0 +1,368 @@
+"""Rule tables for the Nihil PreToolUse guard.
+
+Shared by the per-call hook (``nihil-pretooluse.py``) and the resident guard
+daemon (``nihil-daemon.py``) so both paths compile the same patterns and return
+byte-identical decisions. Patterns compile on first use, not at import: a hook
+call needs at most a few of them (and a cached decision none), while the daemon
+compiles them all once at start-up with ``warm()``.
+
+Every pattern is written so one search is linear in the command length: no gap
+can be rescanned once per occurrence of its leading word (see ``_span``), and no
+run is split two ways. Adversarial timings: ``bench/scanner_bench.py``.
+
+Bash matching is a documented heuristic on the command string: precise enough to
+catch the named operations, deliberately not a sandbox. See README "What the
+PreToolUse hook does and does not catch".
+"""
+
+import json
+import re
+
+WRITE_TOOLS = {"Write", "Edit", "MultiEdit", "NotebookEdit"}
+
+# How much of a redacted command a denial or telemetry line shows.
+REDACT_SHOWN = 200
+
+
+class _Pattern:
+    """``re.compile(pattern)``, deferred until a method of the compiled pattern is used.
+
+    ``.pattern`` is available without compiling — ``RuleSet`` only needs the source.
+    """
+
+    __slots__ = ("pattern", "_compiled")
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self._compiled = None
+
+    def __getattr__(self, name):  # search, sub, finditer, ...
+        if self._compiled is None:
+            self._compiled = re.compile(self.pattern)
+        return getattr(self._compiled, name)
+
+
+def _span(lead, tail, stop):
+    """``lead`` followed later by ``tail``, with no ``stop`` character in between.
+
+    The gap refuses to run past another ``lead``: a failed attempt stops where the
+    next ``lead`` begins, and that later attempt covers the rest. Whether a match
+    exists is unchanged, but each character is crossed by at most one attempt, so
+    the scan stays linear instead of rescanning the line once per ``lead``.
+    """
+    return lead + "(?:(?!" + lead + ")[^" + stop + "])*?" + tail
+
+
+GIT_COMMIT = _Pattern(r"\bgit\s+commit\b")
+GIT_PUSH = _Pattern(r"\bgit\s+push\b")
+# tag mutation (create/delete/force) — the listing forms `git tag`, `git tag -l`,
+# `git tag --list`, `git tag -n` are read-only and pass.
+GIT_TAG_MUTATE = _Pattern(r"\bgit\s+tag\s+(?!(?:-l\b|--list\b|-n))\S")
+VERSION_BUMP = _Pattern(
+    r"\b(?:npm|pnpm|yarn)\s+version\b|\bhatch\s+version\b|\bbump2?version\b|\bpoetry\s+version\b"
+)
+PUBLISH = _Pattern(
+    r"\b(?:npm|pnpm|yarn)\s+publish\b|\bdotnet\s+nuget\s+push\b|\bnuget\s+push\b"
+    r"|\bgh\s+release\s+create\b|\btwine\s+upload\b|\bcargo\s+publish\b"
+)
+DEP_UPDATE = _Pattern(
+    r"\b(?:npm|pnpm|yarn)\s+(?:install|add|up|update|upgrade)\b|\bpip\s+install\b"
+    r"|\bdotnet\s+add\s+(?:package|reference)\b|\bnuget\s+(?:install|update)\b|\bcargo\s+(?:add|update)\b"
+)
+DESTRUCTIVE = _Pattern(
+    r"\brm\s+-[a-zA-Z]*[rRfF]|\bgit\s+reset\s+--hard\b"
+    r"|" + _span(r"\bgit\s+push\b", r"(?:--force\b|--force-with-lease\b|\s-f\b)", r"\n") +
+    r"|\bgit\s+clean\s+-[a-zA-Z]*[fF]|\bmkfs\b|\bdd\s+if=|>\s*/dev/sd"
+)
+
+# Secret / API-key exfiltration — the one guardrail that fires in EVERY mode,
+# raze included. Catches credential literals, printing secret files, env-var
+# echoes, committing key files, and inline --api-key/--password values. Heuristic,
+# case-sensitive on the literal token prefixes; never a substitute for a scanner.
+_KEY_LITERALS = (
+    r"AKIA[0-9A-Z]{16}"
+    r"|gh[posru]_[A-Za-z0-9]{20,}|github_pat_[A-Za-z0-9_]{20,}"
+    r"|oy2[a-z0-9]{43}"
+    r"|xox[abprs]-[A-Za-z0-9-]{10,}"
+    r"|sk-ant-[A-Za-z0-9_-]{20,}|sk-[A-Za-z0-9]{20,}|sk_live_[A-Za-z0-9]{16,}"
+    r"|AIza[0-9A-Za-z_-]{35}"
+    r"|-----BEGIN [A-Z ]*PRIVATE KEY-----"
+)
+_ENV_FILE = r"\.env(?!\.(?:example|sample|template|dist)\b)(?:\.[\w.]+)?"
+_READ_TARGET = r"(?:" + _ENV_FILE + r"|\.pem|\.p12|\.pfx|id_rsa|id_ed25519|credentials|\.npmrc|\.pypirc)\b"
+_ADD_TARGET = r"(?:" + _ENV_FILE + r"|\.pem|id_rsa|id_ed25519|credentials|\.pfx|\.p12)\b"
+_SECRET_VAR = r"\$\{?[A-Za-z_]*(?:SECRET|TOKEN|API_?KEY|PASSWORD|PASSWD|PRIVATE_KEY|ACCESS_KEY)"
+_READER = r"\b(?:cat|bat|less|more|head|tail|xxd|strings|nl)\b"
+_PRINTER = r"\b(?:echo|printenv|printf|env)\b"
+_GIT_ADD = r"\bgit\s+(?:add|commit)\b"
+_INLINE = r"--api[-_]?key[=\s]+\S+|--password[=\s]+\S+"
+
+# SECRET decides; SECRET_REDACT is the original single-pattern form, kept only to
+# redact the denial text so its spans (what gets replaced by ``[redacted]``) stay
+# exactly as before. Both match the same commands.
+SECRET = _Pattern(
+    _KEY_LITERALS
+    + "|" + _span(_READER, _READ_TARGET, r"\n|;&")
+    + "|" + _span(_PRINTER, _SECRET_VAR, r"\n")
+    + "|" + _span(_GIT_ADD, _ADD_TARGET, r"\n")
+    + "|" + _INLINE
+)
+SECRET_REDACT = _Pattern(
+    _KEY_LITERALS
+    + "|" + _READER + r"[^\n|;&]*?" + _READ_TARGET
+    + "|" + _PRINTER + r"[^\n]*" + _SECRET_VAR
+    + "|" + _GIT_ADD + r"[^\n]*" + _ADD_TARGET
+    + "|" + _INLINE
+)
+
+# File contents (Write/Edit/MultiEdit/NotebookEdit) are checked for the credential
+# literals only — ``cat .env`` or ``echo $TOKEN`` inside a file is a script, not a
+# leak. Every alternative is a literal prefix plus one character-class run with no
+# tail to backtrack into, so a single search is linear and allocation-free on
+# multi-megabyte contents (``bench/content_bench.py``: 10 MiB in well under 0.2 s).
+CONTENT_SECRET = _Pattern(_KEY_LITERALS)
+
+# Catastrophic, unrecoverable operations — raze's ONLY command brake besides
+# SECRET. Deliberately narrow: only disk-wipers that no reflog or remote can undo.
+# git reset/force-push/clean are NOT here — they are recoverable, and raze allows them.
+# (The flag word is "letters containing an r", checked by lookahead so a long flag
+# run is not re-split quadratically.)
+CATASTROPHIC = _Pattern(
+    r"\brm\s+-(?=[a-zA-Z]*[rR])[a-zA-Z]+\s+(?:--?[a-zA-Z][\w-]*\s+)*"
+    r"(?:/|~|\$\{?HOME\}?)(?:/\*?|\*)?(?=\s|$|;|&|\|)"
+    r"|\bmkfs(?:\.\w+)?\b"
+    r"|" + _span(r"\bdd\b", r"\bof=/dev/[a-z]", r"\n") +
+    r"|>\s*/dev/sd[a-z]"
+    r"|:\(\)\s*\{\s*:\s*\|\s*:\s*&\s*\}\s*;\s*:"
+)
+
+
+# Every Bash rule, keyed by the label a denial reports, with the literals that any
+# match must contain (case-sensitive). A rule none of whose literals occur in the
+# command cannot match, so it is skipped without running its pattern — most
+# commands clear every rule on a few substring searches. Modes refer to rules by
+# label; the secret brake is implicitly first in every mode (see ``RuleSet``).
+RULES = {
+    "a secret": (SECRET, (
+        "AKIA", "ghp_", "gho_", "ghs_", "ghr_", "ghu_", "github_pat_", "oy2", "xox", "sk-",
+        "sk_live_", "AIza", "-----BEGIN ", ".env", ".pem", ".p12", ".pfx", "id_rsa",
+        "id_ed25519", "credentials", ".npmrc", ".pypirc", "SECRET", "TOKEN", "API_KEY",
+        "APIKEY", "PASSWORD", "PASSWD", "PRIVATE_KEY", "ACCESS_KEY", "--api", "--password",
+    )),
+    "git commit": (GIT_COMMIT, ("commit",)),
+    "git push": (GIT_PUSH, ("push",)),
+    "git tag": (GIT_TAG_MUTATE, ("tag",)),
+    "a version bump": (VERSION_BUMP, ("version",)),
+    "package publishing": (PUBLISH, ("publish", "push", "release", "upload")),
+    "a dependency update": (DEP_UPDATE, ("install", "add", "up")),
+    "a destructive command": (DESTRUCTIVE, ("rm", "reset", "push", "clean", "mkfs", "dd", "/dev/sd")),
+    "a catastrophic command": (CATASTROPHIC, ("rm", "mkfs", "dd", "/dev/sd", ":()")),
+}
+
+SECRET_REASON = (
+    "Nihil blocks a possible secret / API-key exfiltration: `{redacted}`. "
+    "Do not print, echo, commit, or pass credentials inline — read them from the "
+    "environment or a secret store, and for NuGet use trusted publishing (OIDC)."
+)
+
+CONTENT_SECRET_REASON = (
+    "Nihil blocks writing a possible secret / API key into `{path}`: `{redacted}`. "
+    "Keep credentials out of files — read them from the environment or a secret store."
+)
+
+# What each mode denies, as data. ``tools``: non-Bash tools denied outright with
+# ``tool_reason``. ``rules``: Bash rule labels in priority order — when several match,
+# the earliest-listed label is reported, whatever its position in the command.
+# ``reason`` is formatted with ``{hit}`` (the label) and ``{snippet}``.
+POLICIES = {
+    "review": {
+        "tools": WRITE_TOOLS,
+        "tool_reason": ("Nihil Review Mode is read-only — file writes/edits are blocked. "
+                        "Switch to /nihil:implement to make changes."),
+        "rules": ("git commit", "git push", "git tag", "a version bump", "package publishing",
+                  "a dependency update", "a destructive command"),
+        "reason": ("Nihil Review Mode blocks {hit}: `{snippet}`. "
+                   "Review Mode reports findings only — no mutations, git writes, or release steps."),
+    },
+    # writes, edits, and git commit are allowed in implement mode
+    "implement": {
+        "rules": ("git push", "git tag", "package publishing", "a version bump",
+                  "a destructive command"),
+        "reason": ("Nihil Implementation Mode blocks {hit}: `{snippet}`. "
+                   "Push / tag / publish / version-bump are release steps — use /nihil:release."),
+    },
+    "release": {
+        "rules": ("a destructive command",),
+        "reason": ("Nihil Release Mode blocks an obviously destructive command: `{snippet}`. "
+                   "Release Mode permits release-like commands but not force-push / hard reset / rm -rf."),
+    },
+    # Root authority on a repo you own: writes, commits, pushes, tags, publishes,
+    # version bumps, public-API breaks, full rewrites, even git reset/force-push
+    # all flow. The secret brake always applies. Only the unrecoverable is left.
+    "raze": {
+        "rules": ("a catastrophic command",),
+        "reason": ("Nihil Raze Mode blocks one catastrophic, unrecoverable command: `{snippet}`. "
+                   "Raze frees everything else — writes, commit, push, tag, publish, reset, force-push — "
+                   "but rm -rf / or ~, mkfs, and dd of=/dev/... cannot be undone by any reflog or remote."),
+    },
+}
+
+
+class RuleSet:
+    """One mode's Bash rules, answered with as few linear scans as possible.
+
+    First a literal prefilter drops every rule whose required literals are absent.
+    The survivors are fused into one pattern — each rule a named group inside a
+    zero-width lookahead — and searched once: at the leftmost position where any
+    rule matches, the earliest-listed rule matching there is reported. Only rules
+    of higher priority than that hit can still change the answer, so the search
+    resumes just past it with those alone. Each round strictly raises the priority,
+    so there are at most as many scans as rules, and usually exactly one. The result
+    is the same label a rule-by-rule ``search`` in priority order returns first.
+    """
+
+    def __init__(self, labels):
+        self.labels = ("a secret",) + tuple(labels)
+        self._fused = {}
+
+    def _pattern(self, indexes):
+        pattern = self._fused.get(indexes)
+        if pattern is None:
+            pattern = re.compile("(?=" + "|".join(
+                "(?P<r%d>%s)" % (index, RULES[self.labels[index]][0].pattern) for index in indexes
+            ) + ")")
+            self._fused[indexes] = pattern
+        return pattern
+
+    def first_hit(self, command):
+        """Return the highest-priority matching label, or ``None``."""
+        live = tuple(index for index, label in enumerate(self.labels)
+                     if any(literal in command for literal in RULES[label][1]))
+        best, pos = None, 0
+        while live:
+            match = self._pattern(live).search(command, pos)
+            if match is None:
+                break
+            best = int(match.lastgroup[1:])
+            live = tuple(index for index in live if index < best)
+            pos = match.start() + 1
+        return None if best is None else self.labels[best]
+
+
+RULE_SETS = {mode: RuleSet(policy["rules"]) for mode, policy in POLICIES.items()}
+SECRET_ONLY = RuleSet(())
+
+
+def warm():
+    """Compile every pattern and each mode's full fused rule set now (for a long-lived process)."""
+    for pattern in [rule[0] for rule in RULES.values()] + [SECRET_REDACT, CONTENT_SECRET]:
+        pattern.search("")
+    for rule_set in list(RULE_SETS.values()) + [SECRET_ONLY]:
+        rule_set._pattern(tuple(range(len(rule_set.labels))))
+
+
+def bash_command(tool_input):
+    return str(tool_input.get("command", "")) if isinstance(tool_input, dict) else ""
+
+
+def written_text(tool_input):
+    """Yield every string a file tool call would write: ``content``, ``new_string``,
+    ``new_source``, and each ``edits[].new_string``."""
+    if not isinstance(tool_input, dict):
+        return
+    for key in ("content", "new_string", "new_source"):
+        if isinstance(tool_input.get(key), str):
+            yield tool_input[key]
+    edits = tool_input.get("edits")
+    if isinstance(edits, list):
+        for edit in edits:
+            if isinstance(edit, dict) and isinstance(edit.get("new_string"), str):
+                yield edit["new_string"]
+
+
+def content_secret(tool_input):
+    """Return the denial reason if a file tool call would write a credential, else ``None``."""
+    for text in written_text(tool_input):
+        match = CONTENT_SECRET.search(text)
+        if match is None:
+            continue
+        # Show only what precedes the key on its line; the key itself never leaves here.
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        prefix = text[max(line_start, match.start() - 80):match.start()].lstrip()
+        path = tool_input.get("file_path") or tool_input.get("notebook_path") or "a file"
+        return CONTENT_SECRET_REASON.format(path=str(path)[:200], redacted=prefix + "[redacted]")
+    return None
+
+
+def redact(command):
+    """First 200 characters of ``command`` with every secret span replaced by ``[redacted]``.
+
+    The same text as ``SECRET_REDACT.sub("[redacted]", command).strip()[:200]``, but
+    the (backtracking) pattern is only tried at the positions that can still reach
+    the shown characters. A span found there is followed to its real end, however
+    far into the command that is, so nothing inside it can leak. Each attempt is
+    linear, so a long command costs at most about ``REDACT_SHOWN`` passes over it
+    instead of the quadratic full ``sub``.
+    """
+    text = command.strip()
+    pieces, shown, done, pos = [], 0, 0, 0  # shown: length of pieces; text[done:pos] is kept as is
+    while pos < len(text) and shown + pos - done < REDACT_SHOWN:
+        match = SECRET_REDACT.match(text, pos)
+        if match is None:
+            pos += 1
+            continue
+        pieces += [text[done:pos], "[redacted]"]
+        shown += pos - done + len("[redacted]")
+        done = pos = match.end()
+    pieces.append(text[done:done + max(REDACT_SHOWN - shown, 0)])
+    return "".join(pieces)[:REDACT_SHOWN]
+
+
+def evaluate(mode, tool, tool_input):
+    """Return ``(label, reason)`` for this tool call under ``mode``; ``(None, None)`` allows it.
+
+    ``label`` names what matched: a ``RULES`` label, or ``"a file write"`` for a
+    tool the mode denies outright. Written file contents are checked for credential
+    literals in every mode (label ``"a secret"``).
+    """
+    policy = POLICIES.get(mode, {})
+    if tool in policy.get("tools", ()):
+        return "a file write", policy["tool_reason"]
+    if tool in WRITE_TOOLS:  # the secret brake also covers what file tools write
+        reason = content_secret(tool_input)
+        return ("a secret", reason) if reason else (None, None)
+    if tool != "Bash":
+        return None, None
+    command = bash_command(tool_input)
+    hit = RULE_SETS.get(mode, SECRET_ONLY).first_hit(command)
+    if hit is None:
+        return None, None
+    if hit == "a secret":
+        # Never echo the raw command here — it contains the matched secret. Redact every
+        # SECRET-matched span before interpolating, so the denial reason can't leak the value.
+        return hit, SECRET_REASON.format(redacted=redact(command))
+    return hit, policy["reason"].format(hit=hit, snippet=command.strip()[:200])
+
+
+def check(mode, tool, tool_input):
+    """Return the denial reason for this tool call under ``mode``, or ``None`` to allow."""
+    return evaluate(mode, tool, tool_input)[1]
+
+
+def decide(data, mode):
+    """Return ``(label, stdout)`` of the PreToolUse hook for ``data`` under ``mode`` (``""`` = allow)."""
+    label, reason = evaluate(mode, data.get("tool_name", ""), data.get("tool_input"))
+    if not reason:
+        return None, ""
+    return label, json.dumps({
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "deny",
+            "permissionDecisionReason": reason,
+        }
+    }) + "\n"
+
+
+def hook_output(data, mode):
+    """Return the PreToolUse hook's stdout for ``data`` under ``mode`` (``""`` = allow)."""
+    return decide(data, mode)[1]
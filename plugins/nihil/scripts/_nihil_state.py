@@ -1,80 +1,398 @@
 """Shared state for the Nihil hook scripts.
 
-Single source of truth for three things the three hook entrypoints all need:
-  * where per-session mode state is stored,
+Single source of truth for the things every hook entrypoint needs:
+  * where per-session mode state (and the guard daemon's socket) is stored,
   * how a session id becomes a safe filename (security-sensitive — it builds a
     filesystem path, so it must never diverge between scripts), and
-  * reading / writing the mode and the one-shot Stop flag.
+  * reading / writing the mode, the one-shot Stop flag, and the Stop hook's
+    transcript index (how far it has already parsed the session transcript).
 
 State location: ``$CLAUDE_PLUGIN_DATA`` (the documented per-plugin persistent
 data directory) when set, otherwise a temp directory. The temp fallback keeps
 the hooks working under ``claude --plugin-dir`` and in any context where the
 variable is not exported.
 
+Storage backend: ``$NIHIL_STATE_STORE`` picks how entries are kept in that
+directory. ``files`` (the default) writes one small file per session and entry;
+``sqlite`` keeps every entry in a single ``nihil-state.db`` (WAL journal) — use
+it on shared CI runners where thousands of sessions would otherwise pile up as
+files. Both record when a session was last written; sessions untouched for
+``$NIHIL_STATE_TTL_DAYS`` days (default 7, ``0`` = keep forever) are evicted by
+``gc()`` — run on demand by ``nihil-gc.py`` and at most once a day by
+``write_mode``.
+
+Telemetry (opt-in): with ``$NIHIL_TELEMETRY=1`` every hook invocation appends one
+compact JSON record (hook, mode, tool, matched rule, decision, elapsed µs, and for
+Bash a redacted command prefix) to ``telemetry.jsonl``. The file is rotated to
+``telemetry.jsonl.1`` past ``$NIHIL_TELEMETRY_MAX_KIB`` (default 1024), so the
+log never exceeds two generations. ``nihil-stats.py`` aggregates it.
+
 Every public helper degrades gracefully: a read returns ``None`` rather than
 raising, so a caller can always fail open and never trap a session.
 """
 
-import json
 import os
-import re
 import sys
-import tempfile
+import time
 
 VALID_MODES = ("review", "implement", "release", "raze")
 
+STORE_ENV = "NIHIL_STATE_STORE"
+TTL_ENV = "NIHIL_STATE_TTL_DAYS"
+DEFAULT_TTL_DAYS = 7.0
+GC_INTERVAL = 24 * 60 * 60  # seconds between automatic collections
+TELEMETRY_ENV = "NIHIL_TELEMETRY"
+TELEMETRY_MAX_ENV = "NIHIL_TELEMETRY_MAX_KIB"
+DEFAULT_TELEMETRY_MAX_KIB = 1024
+
+SESSION_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-")
+
+_state_dirs = {}  # $CLAUDE_PLUGIN_DATA -> resolved directory; a hook resolves it once
+
+
+def loads(raw):
+    """``json.loads(raw)``, importing ``json`` (and the ``re`` and ``enum`` it pulls in) on first use."""
+    import json
+
+    return json.loads(raw)
+
+
+def _temp_root():
+    """``tempfile.gettempdir()`` without importing ``tempfile`` (~2.5 ms) on POSIX.
+
+    Tries the same directories in the same order and, like it, skips any this
+    process cannot write to; when none qualifies, ``tempfile`` itself decides.
+    """
+    if os.name == "posix":
+        candidates = [os.environ.get(name) for name in ("TMPDIR", "TEMP", "TMP")]
+        for candidate in candidates + ["/tmp", "/var/tmp", "/usr/tmp"]:
+            if candidate and os.path.isdir(candidate) and os.access(candidate, os.W_OK | os.X_OK):
+                return os.path.abspath(candidate)
+    import tempfile
+
+    return tempfile.gettempdir()
+
 
 def state_dir():
     """Return a writable directory for Nihil state, creating it if needed."""
     base = (os.environ.get("CLAUDE_PLUGIN_DATA") or "").strip()
-    if not base:
-        base = os.path.join(tempfile.gettempdir(), "nihil-state")
-    try:
-        os.makedirs(base, exist_ok=True)
-        return base
-    except OSError:
-        return tempfile.gettempdir()
+    resolved = _state_dirs.get(base)
+    if resolved is None:
+        resolved = base or os.path.join(_temp_root(), "nihil-state")
+        try:
+            os.makedirs(resolved, exist_ok=True)
+        except OSError:
+            resolved = _temp_root()
+        _state_dirs[base] = resolved
+    return resolved
 
 
 def _safe_session(session_id):
-    sid = re.sub(r"[^A-Za-z0-9_-]", "_", str(session_id or "unknown"))
+    sid = "".join(ch if ch in SESSION_CHARS else "_" for ch in str(session_id or "unknown"))
     return sid[:128] or "unknown"
 
 
-def _mode_path(session_id):
-    return os.path.join(state_dir(), "mode-" + _safe_session(session_id) + ".json")
+def daemon_socket_path():
+    """Unix socket the resident guard daemon (``nihil-daemon.py``) listens on."""
+    return os.path.join(state_dir(), "nihild.sock")
+
+
+def daemon_header():
+    """First line of every daemon request: the sender's ``store_spec()``."""
+    return ("nihil-store %s\n" % store_spec()).encode("utf-8", "surrogateescape")
+
+
+class _WriteLock:
+    """Exclusive ``fcntl`` advisory lock on ``<dir>/.lock`` for the duration of a write.
+
+    Optional: without ``fcntl`` (or if the lock file cannot be opened) writes go
+    ahead unlocked — each one is still atomic on its own. Readers never take it.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, ".lock")
+        self.fd = None
+
+    def __enter__(self):
+        try:
+            import fcntl
+
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        except (ImportError, OSError):
+            self.__exit__()
+        return self
+
+    def __exit__(self, *exc):
+        if self.fd is not None:
+            os.close(self.fd)  # closing releases the lock
+            self.fd = None
+
+
+class FileStore:
+    """One file per session and entry kind: ``mode-<sid>.json``, ``stopblocked-<sid>``, ...
+
+    The mtime of each file is its last-touched time. Writes go to a temp file in
+    the same directory and are renamed over the target with ``os.replace``, so a
+    concurrent reader sees either the old content or the new, never a truncated
+    file; writers are serialized by ``_WriteLock``.
+    """
+
+    TEMP_PREFIX = ".tmp-"
+
+    name = "files"
+    KINDS = {
+        "mode": ("mode-", ".json"),
+        "stopblocked": ("stopblocked-", ""),
+        "transcript": ("transcript-", ".json"),
+    }
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, kind, session_id):
+        prefix, suffix = self.KINDS[kind]
+        return os.path.join(self.directory, prefix + _safe_session(session_id) + suffix)
+
+    def get(self, kind, session_id):
+        with open(self.path(kind, session_id), "r", encoding="utf-8") as fh:
+            return fh.read()
+
+    def put(self, kind, session_id, value):
+        with _WriteLock(self.directory):
+            tmp = os.path.join(self.directory, "%s%d-%s" % (self.TEMP_PREFIX, os.getpid(), os.urandom(6).hex()))
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    fh.write(value)
+                os.replace(tmp, self.path(kind, session_id))
+            except BaseException:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+
+    def delete(self, kind, session_id):
+        try:
+            os.remove(self.path(kind, session_id))
+        except FileNotFoundError:
+            pass
+
+    def stamp(self, kind, session_id):
+        info = os.stat(self.path(kind, session_id))
+        return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+    def gc(self, cutoff):
+        """Remove every entry of each session last touched before ``cutoff``; return how many."""
+        sessions = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(self.TEMP_PREFIX):  # left behind by a killed writer
+                    sessions[entry.name] = ([entry.path], _mtime(entry))
+                    continue
+                for prefix, suffix in self.KINDS.values():
+                    if entry.name.startswith(prefix) and entry.name.endswith(suffix):
+                        sid = entry.name[len(prefix):len(entry.name) - len(suffix)]
+                        paths, newest = sessions.get(sid, ([], 0.0))
+                        paths.append(entry.path)
+                        sessions[sid] = (paths, max(newest, _mtime(entry)))
+                        break
+        removed = 0
+        for paths, newest in sessions.values():
+            if newest >= cutoff:
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+def _mtime(entry):
+    try:
+        return entry.stat().st_mtime
+    except OSError:
+        return time.time()  # vanished or unreadable: treat as fresh, never evict blindly
+
+
+class SqliteStore:
+    """Every entry in one SQLite database (WAL journal), one row per session and kind.
+
+    Each row carries the time it was last written. ``sqlite3`` errors surface as
+    ``OSError`` so callers handle both backends the same way.
+    """
+
+    name = "sqlite"
+    FILENAME = "nihil-state.db"
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS entries (session TEXT NOT NULL, kind TEXT NOT NULL, "
+              "value TEXT NOT NULL, touched REAL NOT NULL, PRIMARY KEY (session, kind)) WITHOUT ROWID")
+
+    def __init__(self, directory):
+        import sqlite3  # deferred: the default file store never pays for it
+
+        self._sqlite3 = sqlite3
+        self.path = os.path.join(directory, self.FILENAME)
+
+    def _run(self, sql, params=(), create=False):
+        if not create and not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)  # reads never create the database
+        try:
+            db = self._sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            try:
+                if create:
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.execute(self.SCHEMA)
+                db.execute("PRAGMA synchronous=NORMAL")
+                cursor = db.execute(sql, params)
+                return cursor.fetchone() if cursor.description else cursor.rowcount
+            finally:
+                db.close()
+        except self._sqlite3.Error as exc:
+            raise OSError(str(exc)) from exc
+
+    def get(self, kind, session_id):
+        row = self._run("SELECT value FROM entries WHERE session = ? AND kind = ?",
+                        (_safe_session(session_id), kind))
+        if row is None:
+            raise FileNotFoundError(kind)
+        return row[0]
+
+    def put(self, kind, session_id, value):
+        self._run("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                  (_safe_session(session_id), kind, value, time.time()), create=True)
+
+    def delete(self, kind, session_id):
+        try:
+            self._run("DELETE FROM entries WHERE session = ? AND kind = ?",
+                      (_safe_session(session_id), kind))
+        except FileNotFoundError:
+            pass
+
+    def stamp(self, kind, session_id):
+        # Any committed write lands in the -wal file (or the database after a checkpoint).
+        stamps = []
+        for path in (self.path, self.path + "-wal"):
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                stamps.append(None)
+                continue
+            stamps.append((info.st_mtime_ns, info.st_size, info.st_ino))
+        if stamps[0] is None:
+            raise FileNotFoundError(self.path)
+        return tuple(stamps)
+
+    def gc(self, cutoff):
+        try:
+            return self._run("DELETE FROM entries WHERE session IN (SELECT session FROM entries "
+                             "GROUP BY session HAVING max(touched) < ?)", (cutoff,))
+        except FileNotFoundError:
+            return 0
+
+
+def store():
+    """Return the configured backend for the current state directory."""
+    if _wants_sqlite():
+        try:
+            return SqliteStore(state_dir())
+        except ImportError:  # Python built without sqlite3: keep working on files
+            pass
+    return FileStore(state_dir())
+
+
+def _wants_sqlite():
+    return (os.environ.get(STORE_ENV) or "").strip().lower() == SqliteStore.name
+
 
+def store_spec():
+    """``<backend>:<state dir>`` this process reads modes from, without opening the store.
 
-def _stop_flag_path(session_id):
-    return os.path.join(state_dir(), "stopblocked-" + _safe_session(session_id))
+    The guard daemon answers only clients whose spec matches its own: one started
+    with another ``$NIHIL_STATE_STORE`` would find no mode and allow everything.
+    """
+    return "%s:%s" % (SqliteStore.name if _wants_sqlite() else FileStore.name, state_dir())
+
+
+def ttl_days():
+    """Configured session TTL in days; ``0`` disables eviction."""
+    try:
+        return max(0.0, float(os.environ.get(TTL_ENV) or DEFAULT_TTL_DAYS))
+    except ValueError:
+        return DEFAULT_TTL_DAYS
+
+
+def gc(days=None, backend=None):
+    """Evict sessions not written for ``days`` (default: the configured TTL).
+
+    Returns the number of entries removed.
+    """
+    days = ttl_days() if days is None else days
+    if days <= 0:
+        return 0
+    return (backend or store()).gc(time.time() - days * 24 * 60 * 60)
+
+
+def maybe_gc(backend=None):
+    """Run ``gc()`` if the last automatic collection is more than a day old. Never raises."""
+    marker = os.path.join(state_dir(), "gc-stamp")
+    try:
+        if time.time() - os.path.getmtime(marker) < GC_INTERVAL:
+            return
+    except OSError:
+        pass
+    try:
+        with open(marker, "w", encoding="utf-8"):
+            pass
+        gc(backend=backend)
+    except OSError:
+        pass
 
 
 def read_mode(session_id):
     """Return the stored mode for this session, or ``None`` if none/invalid."""
     try:
-        with open(_mode_path(session_id), "r", encoding="utf-8") as fh:
-            mode = json.load(fh).get("mode")
-    except (OSError, ValueError):
+        mode = loads(store().get("mode", session_id)).get("mode")
+    except (OSError, ValueError, AttributeError):
         return None
     return mode if mode in VALID_MODES else None
 
 
+def mode_stamp(session_id):
+    """Cheap change marker for the stored mode, or ``None`` if there is none.
+
+    Lets a long-lived reader cache ``read_mode`` and re-read only when this changes.
+    """
+    try:
+        return store().stamp("mode", session_id)
+    except OSError:
+        return None
+
+
 def write_mode(session_id, mode):
     """Persist the active mode for this session. No-op for an unknown mode."""
     if mode not in VALID_MODES:
         return
-    with open(_mode_path(session_id), "w", encoding="utf-8") as fh:
-        json.dump({"mode": mode}, fh)
+    import json
+
+    backend = store()
+    backend.put("mode", session_id, json.dumps({"mode": mode}))
+    maybe_gc(backend)
 
 
 def stop_already_blocked(session_id):
-    return os.path.exists(_stop_flag_path(session_id))
+    try:
+        store().get("stopblocked", session_id)
+    except OSError:
+        return False
+    return True
 
 
 def mark_stop_blocked(session_id):
     try:
-        with open(_stop_flag_path(session_id), "w", encoding="utf-8") as fh:
-            fh.write("1")
+        store().put("stopblocked", session_id, "1")
     except OSError:
         pass
 
@@ -82,14 +400,94 @@ def mark_stop_blocked(session_id):
 def clear_stop_flag(session_id):
     """Re-arm the Stop guard. Called when a new mode cycle begins."""
     try:
-        os.remove(_stop_flag_path(session_id))
+        store().delete("stopblocked", session_id)
+    except OSError:
+        pass
+
+
+def read_transcript_index(session_id):
+    """Return the Stop hook's saved transcript position for this session, or ``None``."""
+    try:
+        index = loads(store().get("transcript", session_id))
+    except (OSError, ValueError):
+        return None
+    return index if isinstance(index, dict) else None
+
+
+def write_transcript_index(session_id, index):
+    """Persist the transcript position. Best effort: a lost index only costs a full scan."""
+    import json
+
+    try:
+        store().put("transcript", session_id, json.dumps(index))
     except OSError:
         pass
 
 
+def telemetry_enabled():
+    return (os.environ.get(TELEMETRY_ENV) or "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def telemetry_path():
+    return os.path.join(state_dir(), "telemetry.jsonl")
+
+
+def record(hook, data, mode=None, rule=None, decision="allow", started=None):
+    """Append one telemetry record for a hook invocation. No-op unless enabled; never raises.
+
+    ``data`` is the hook payload; ``started`` a ``time.perf_counter()`` taken when the
+    hook began. A Bash command is stored only as ``_nihil_rules.redact`` leaves it.
+    """
+    if not telemetry_enabled():
+        return
+    import json
+
+    try:
+        data = data if isinstance(data, dict) else {}
+        entry = {"ts": round(time.time(), 3), "hook": hook, "sid": _safe_session(data.get("session_id")),
+                 "mode": mode, "tool": data.get("tool_name"), "rule": rule, "decision": decision}
+        if started is not None:
+            entry["us"] = int((time.perf_counter() - started) * 1e6)
+        if data.get("tool_name") == "Bash":
+            import _nihil_rules as rules  # already loaded by the PreToolUse paths that get here
+
+            entry["cmd"] = rules.redact(rules.bash_command(data.get("tool_input")))
+        line = json.dumps({key: value for key, value in entry.items() if value is not None},
+                          separators=(",", ":")) + "\n"
+        _append_telemetry(line.encode("utf-8"))
+    except (OSError, ImportError, ValueError, TypeError):
+        pass
+
+
+def _append_telemetry(line):
+    path = telemetry_path()
+    try:
+        cap = float(os.environ.get(TELEMETRY_MAX_ENV) or DEFAULT_TELEMETRY_MAX_KIB) * 1024
+    except ValueError:
+        cap = DEFAULT_TELEMETRY_MAX_KIB * 1024
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, line)  # one O_APPEND write per record: concurrent hooks never interleave
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    if size > cap:
+        with _WriteLock(os.path.dirname(path)):
+            if os.path.getsize(path) > cap:  # not already rotated by a racing hook
+                os.replace(path, path + ".1")
+
+
+def parse_payload(raw):
+    """Parse a hook payload (``str`` or ``bytes``). ``None`` on any failure."""
+    try:
+        return loads(raw or "{}")
+    except ValueError:
+        return None
+
+
 def load_stdin_json():
     """Read and parse the hook payload from stdin. ``None`` on any failure."""
     try:
-        return json.loads(sys.stdin.read() or "{}")
-    except (ValueError, OSError):
+        return parse_payload(sys.stdin.read())
+    except OSError:
         return None
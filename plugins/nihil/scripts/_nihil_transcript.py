@@ -0,0 +1,154 @@
+"""Read the session transcript (JSONL) for the Nihil hooks without loading it whole.
+
+Transcripts of long sessions reach hundreds of megabytes, and the Stop hook only
+needs the last assistant message. ``iter_lines_reversed`` seeks from the end of
+the file in fixed-size blocks and yields complete lines last-first, so the cost
+depends on how far back that message is, not on the transcript length. Memory is
+bounded by the block size plus the longest line actually assembled.
+
+Lines are split on ``\\n`` as raw bytes and decoded one at a time (UTF-8, errors
+replaced) — the same text a whole-file ``readlines()`` in text mode produced.
+
+``scan_last_assistant`` also returns an index (offset, inode, where the last
+assistant message sits) that the Stop hook keeps per session in ``_nihil_state``;
+handing it back makes the next call parse only what was appended since.
+"""
+
+import os
+
+from _nihil_state import loads
+
+BLOCK = 64 * 1024
+MARK = 64  # bytes before a saved offset that must be unchanged to resume from it
+
+
+def extract_text(content):
+    if isinstance(content, str):
+        return content
+    if not isinstance(content, list):
+        return ""
+    parts = []
+    for piece in content:
+        if isinstance(piece, str):
+            parts.append(piece)
+        elif isinstance(piece, dict) and piece.get("type") == "text":
+            parts.append(piece.get("text", ""))
+    return "\n".join(parts)
+
+
+def assistant_text(raw):
+    """Return the text of one raw transcript line if it is an assistant message, else ``""``."""
+    if b"assistant" not in raw:  # cheap skip: never decode or parse tool results and user turns
+        return ""
+    line = raw.decode("utf-8", "replace").strip()
+    if not line:
+        return ""
+    try:
+        obj = loads(line)
+    except ValueError:
+        return ""
+    if not isinstance(obj, dict):
+        return ""
+    message = obj.get("message") if isinstance(obj.get("message"), dict) else None
+    role = obj.get("role") or (message or {}).get("role")
+    if role != "assistant" and obj.get("type") != "assistant":
+        return ""
+    content = (message or {}).get("content", obj.get("content"))
+    return extract_text(content)
+
+
+def iter_lines_reversed(fh, end, floor=0, block=BLOCK):
+    """Yield ``(offset, raw_line)`` for the lines of ``fh[floor:end]``, last line first.
+
+    ``fh`` must be opened in binary mode. A line is assembled only once its start
+    is found, so a long line costs one join, not one copy per block.
+    """
+    pos = end
+    pieces = []  # the current, still incomplete line, as blocks in reverse order
+    while pos > floor:
+        size = min(block, pos - floor)
+        pos -= size
+        fh.seek(pos)
+        chunk = fh.read(size)
+        cut = len(chunk)
+        newline = chunk.rfind(b"\n", 0, cut)
+        while newline != -1:
+            pieces.append(chunk[newline + 1:cut])
+            yield pos + newline + 1, b"".join(reversed(pieces))
+            pieces = []
+            cut = newline
+            newline = chunk.rfind(b"\n", 0, cut)
+        pieces.append(chunk[:cut])
+    if pieces:
+        yield floor, b"".join(reversed(pieces))
+
+
+def _resume_point(fh, info, transcript_path, index):
+    """Return ``(floor, last)`` from a previous ``index``, or ``(0, None)`` to scan it all.
+
+    The index is trusted only for the same path and inode, a file at least as long
+    as what was already parsed, and unchanged bytes just before that point — so a
+    replaced, truncated, or rewritten transcript falls back to a full scan.
+    """
+    if not isinstance(index, dict) or index.get("path") != transcript_path:
+        return 0, None
+    offset = index.get("offset")
+    if index.get("inode") != info.st_ino or not isinstance(offset, int) or not 0 <= offset <= info.st_size:
+        return 0, None
+    start = max(0, offset - MARK)
+    fh.seek(start)
+    if fh.read(offset - start).hex() != index.get("mark"):
+        return 0, None
+    last = index.get("last")
+    return offset, last if isinstance(last, int) and 0 <= last < offset else None
+
+
+def _line_at(fh, offset):
+    fh.seek(offset)
+    return fh.readline().rstrip(b"\n")
+
+
+def scan_last_assistant(transcript_path, index=None):
+    """Return ``(text, index)``: the last assistant message and a position to resume from.
+
+    Pass the ``index`` returned by the previous call on the same transcript and only
+    the bytes appended since are parsed; when none of them is an assistant message,
+    the one found last time is re-read by offset. The returned index points just past
+    the last complete line, so a line still being written is parsed again next time.
+    """
+    if not transcript_path or not os.path.exists(transcript_path):
+        return "", None
+    try:
+        with open(transcript_path, "rb") as fh:
+            info = os.fstat(fh.fileno())
+            end = info.st_size
+            floor, last = _resume_point(fh, info, transcript_path, index)
+            text, found, tail = "", None, None
+            for offset, raw in iter_lines_reversed(fh, end, floor):
+                if tail is None:
+                    tail = offset  # start of the final, possibly unterminated line
+                line_text = assistant_text(raw)
+                if not line_text:
+                    continue
+                if found is None:
+                    text, found = line_text, offset
+                if offset < tail:  # a complete line: safe to remember for next time
+                    last = offset
+                    break
+            tail = end if tail is None else tail
+            if found is None and last is not None:
+                text = assistant_text(_line_at(fh, last))
+                if not text:  # the remembered line no longer holds a message: rescan
+                    return scan_last_assistant(transcript_path)
+            start = max(0, tail - MARK)
+            fh.seek(start)
+            mark = fh.read(tail - start).hex()
+    except OSError:
+        return "", None
+    return text, {"path": transcript_path, "inode": info.st_ino, "offset": tail,
+                  "mark": mark, "last": last}
+
+
+def last_assistant_text(transcript_path):
+    """Return the text of the most recent assistant message in the JSONL transcript."""
+    return scan_last_assistant(transcript_path)[0]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Build the start-up-optimized form of the Nihil hooks.
+
+    nihil-build.py [--zipapp PATH] [--no-zipapp]
+
+1. Precompiles every hook helper (``_nihil_*.py``) into ``__pycache__`` next to
+   it, so no hook invocation ever compiles a module — not even the first one, or
+   one running from a read-only plugin directory where Python cannot cache.
+2. Writes a zipapp (default ``dist/nihil-hooks.pyz`` in the plugin) holding the
+   three hook entry points and their helpers, source plus unchecked-hash bytecode,
+   stored uncompressed so an import is one seek and a ``marshal.loads``:
+
+       python3 -S -E nihil-hooks.pyz mode|pretooluse|stop
+
+   An unknown hook name exits 0 (fail open). A ``python3`` whose bytecode magic
+   differs from the build's falls back to the bundled source.
+
+The hooks are ``-S -E`` clean either way (no ``site``, no ``PYTHON*`` variables):
+they only need the standard library and ``$CLAUDE_PLUGIN_DATA``. Re-run after
+editing any script; ``bench/import_budget.py --bundle`` checks the result.
+"""
+
+import argparse
+import compileall
+import importlib.util
+import marshal
+import os
+import sys
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ZIPAPP = os.path.join(HERE, "..", "dist", "nihil-hooks.pyz")
+HELPERS = ("_nihil_state", "_nihil_rules", "_nihil_cache", "_nihil_transcript")
+HOOKS = {"mode": "nihil-mode", "pretooluse": "nihil-pretooluse", "stop": "nihil-stop"}
+
+MAIN = '''import sys
+
+HOOKS = %r
+
+hook = HOOKS.get(sys.argv[1] if len(sys.argv) > 1 else "")
+if hook is None:  # unknown entry point: fail open like every hook
+    sys.exit(0)
+sys.argv[1:2] = []
+__import__(hook)  # each hook module runs main() when imported
+''' % {name: script.replace("-", "_") for name, script in HOOKS.items()}
+
+
+def precompile():
+    """Write ``__pycache__`` bytecode for every helper. Returns ``False`` on a compile error."""
+    paths = [os.path.join(HERE, helper + ".py") for helper in HELPERS]
+    return all(compileall.compile_file(path, quiet=1) for path in paths)
+
+
+def _pyc(source, filename):
+    """Unchecked-hash bytecode: valid regardless of zip timestamps, never re-validated."""
+    code = compile(source, filename, "exec", dont_inherit=True)
+    flags = (0b01).to_bytes(4, "little")  # hash-based, check_source off
+    return importlib.util.MAGIC_NUMBER + flags + importlib.util.source_hash(source) + marshal.dumps(code)
+
+
+def build_zipapp(target):
+    modules = {helper: helper + ".py" for helper in HELPERS}
+    modules.update({script.replace("-", "_"): script + ".py" for script in HOOKS.values()})
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    tmp = target + ".tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED) as archive:
+        for module, filename in sorted(modules.items()):
+            with open(os.path.join(HERE, filename), "rb") as fh:
+                source = fh.read()
+            archive.writestr(module + ".py", source)
+            archive.writestr(module + ".pyc", _pyc(source, module + ".py"))
+        main = MAIN.encode("utf-8")
+        archive.writestr("__main__.py", main)
+        archive.writestr("__main__.pyc", _pyc(main, "__main__.py"))
+    os.replace(tmp, target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the start-up-optimized Nihil hooks")
+    parser.add_argument("--zipapp", default=DEFAULT_ZIPAPP, metavar="PATH",
+                        help="where to write the bundle (default: dist/nihil-hooks.pyz)")
+    parser.add_argument("--no-zipapp", action="store_true", help="only precompile the helpers")
+    args = parser.parse_args()
+
+    if not precompile():
+        print("nihil-build: a helper failed to compile", file=sys.stderr)
+        return 1
+    if not args.no_zipapp:
+        build_zipapp(args.zipapp)
+        print("nihil-build: wrote " + os.path.normpath(args.zipapp))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Opt-in resident guard daemon for the Nihil PreToolUse hook.
+
+Every guarded tool call otherwise spawns a fresh interpreter that compiles the
+whole rule table and re-reads the mode file before exiting. This daemon keeps
+the compiled rules (``_nihil_rules``) and each session's mode in memory and
+answers the hook over a Unix socket at ``_nihil_state.daemon_socket_path()``;
+``nihil-pretooluse.py`` becomes a thin client that forwards the raw payload.
+
+    nihil-daemon.py serve [--idle-timeout SECONDS]   run in the foreground
+    nihil-daemon.py status                           exit 0 if a daemon answers
+    nihil-daemon.py stop                             ask a running daemon to exit
+
+Nothing depends on it: with no daemon listening, or one that errors or stalls,
+the hook falls back to its in-process check and decides exactly the same way.
+The socket is created owner-only (0600). Restart the daemon after updating the
+plugin so it picks up the new rule table.
+
+Wire format: the client sends ``_nihil_state.daemon_header()`` (its store
+backend and state directory), then the hook payload, and half-closes; the
+daemon replies ``ok\\n`` followed by the hook's stdout (empty = allow). Any
+other reply means "decide locally" — including ``err store mismatch`` when the
+client's store is not the one this daemon reads modes from. A payload of
+``{"nihil_daemon": "ping" | "stop"}`` is a control request and is answered
+whatever the store.
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import _nihil_rules as rules  # noqa: E402
+import _nihil_state as st  # noqa: E402
+
+MAX_PAYLOAD = 64 * 1024 * 1024  # refuse absurd payloads; the client then decides locally
+READ_TIMEOUT = 5.0  # seconds to receive a payload; clients give up after 2 s anyway
+
+
+class ModeCache:
+    """Per-session mode, re-read only when the store's stamp for it changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, session_id):
+        stamp = st.mode_stamp(session_id)
+        key = str(session_id)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] == stamp:
+                return cached[1]
+        mode = st.read_mode(session_id) if stamp else None
+        with self._lock:
+            self._entries[key] = (stamp, mode)
+        return mode
+
+
+class GuardHandler(socketserver.StreamRequestHandler):
+    timeout = READ_TIMEOUT  # an abandoned connection must not pin its thread for the daemon's lifetime
+
+    def handle(self):
+        try:
+            raw = self.rfile.read(MAX_PAYLOAD + 1)
+        except OSError:  # timed out or reset: the client has long since decided locally
+            return
+        if len(raw) > MAX_PAYLOAD:
+            return  # no "ok" header: the client falls back in-process
+        header, _, payload = raw.partition(b"\n")
+        try:
+            out = self.server.answer(header + b"\n", payload)
+        except Exception:  # never let one bad payload take the daemon down
+            return
+        if out is None:  # another store: its modes are not ours to judge
+            self.wfile.write(b"err store mismatch\n")
+            return
+        self.wfile.write(b"ok\n" + out.encode("utf-8"))
+        if self.server.stopping:  # only after the reply is out, or the client sees no answer
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class GuardServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        self.modes = ModeCache()
+        self.last_request = time.monotonic()
+        self.stopping = False
+        self.header = st.daemon_header()
+        super().__init__(path, GuardHandler)
+
+    def answer(self, header, raw):
+        """Hook stdout for one request, or ``None`` if the client reads another store."""
+        self.last_request = time.monotonic()
+        data = st.parse_payload(raw)
+        control = data.get("nihil_daemon") if isinstance(data, dict) else None
+        if control == "ping":
+            return "pong\n"
+        if control == "stop":
+            self.stopping = True
+            return "stopping\n"
+        if header != self.header:
+            return None
+        if not isinstance(data, dict):
+            return ""
+        started = time.perf_counter()
+        mode = self.modes.get(data.get("session_id"))
+        label, out = rules.decide(data, mode) if mode else (None, "")
+        st.record("pretooluse", data, mode, label, "deny" if out else "allow", started)
+        return out
+
+
+def request(path, control, timeout=2.0):
+    """Send one control request; return the reply body, or ``None`` if nobody answers."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(st.daemon_header() + json.dumps({"nihil_daemon": control}).encode("utf-8"))
+            sock.shutdown(socket.SHUT_WR)
+            reply = sock.makefile("rb").read()
+    except OSError:
+        return None
+    return reply[3:].decode("utf-8").strip() if reply.startswith(b"ok\n") else None
+
+
+def serve(path, idle_timeout):
+    if request(path, "ping") is not None:
+        print("nihil-daemon: already running on " + path, file=sys.stderr)
+        return 1
+    try:
+        os.unlink(path)  # stale socket from a daemon that died without cleanup
+    except OSError:
+        pass
+    rules.warm()  # compile the rule table before the first call, not during it
+    old_umask = os.umask(0o177)
+    try:
+        server = GuardServer(path)
+    finally:
+        os.umask(old_umask)
+    print("nihil-daemon: listening on " + path, file=sys.stderr)
+    if idle_timeout:
+        threading.Thread(target=_exit_when_idle, args=(server, idle_timeout), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return 0
+
+
+def _exit_when_idle(server, idle_timeout):
+    while True:
+        remaining = idle_timeout - (time.monotonic() - server.last_request)
+        if remaining <= 0:
+            server.shutdown()
+            return
+        time.sleep(remaining)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident Nihil PreToolUse guard daemon")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="Run the daemon in the foreground")
+    p_serve.add_argument("--idle-timeout", type=float, default=0,
+                         help="Exit after this many idle seconds (0 = never)")
+    sub.add_parser("status", help="Exit 0 if a daemon answers, 1 otherwise")
+    sub.add_parser("stop", help="Ask a running daemon to exit")
+    args = parser.parse_args()
+
+    path = st.daemon_socket_path()
+    if args.command == "serve":
+        return serve(path, args.idle_timeout)
+    reply = request(path, "ping" if args.command == "status" else "stop")
+    if reply is None:
+        print("nihil-daemon: not running (" + path + ")")
+        return 1
+    print("nihil-daemon: " + ("running on " + path if args.command == "status" else reply))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
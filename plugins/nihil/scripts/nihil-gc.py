@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Evict stale Nihil session state.
+
+    nihil-gc.py [--ttl-days DAYS]
+
+Removes every entry (mode, Stop flag, transcript index) of each session that has
+not been written for ``DAYS`` days — by default ``$NIHIL_STATE_TTL_DAYS``, or 7.
+Works on whichever backend ``$NIHIL_STATE_STORE`` selects. ``write_mode`` already
+does this at most once a day; run it by hand (or from a CI cleanup step) to
+collect immediately.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import _nihil_state as st  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evict stale Nihil session state")
+    parser.add_argument("--ttl-days", type=float, default=None,
+                        help="Evict sessions idle for this many days "
+                             "(default: $" + st.TTL_ENV + ", or {:g})".format(st.DEFAULT_TTL_DAYS))
+    args = parser.parse_args()
+
+    days = st.ttl_days() if args.ttl_days is None else args.ttl_days
+    if days <= 0:
+        print("nihil-gc: TTL is 0, nothing evicted")
+        return 0
+    backend = st.store()
+    try:
+        removed = st.gc(days, backend)
+    except OSError as exc:
+        print("nihil-gc: " + str(exc), file=sys.stderr)
+        return 1
+    print("nihil-gc: removed {} entr{} older than {:g} day(s) from the {} store in {}".format(
+        removed, "y" if removed == 1 else "ies", days, backend.name, st.state_dir()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
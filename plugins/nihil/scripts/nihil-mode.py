@@ -12,9 +12,13 @@ not depend on that banner — the PreToolUse and Stop hooks read the persisted m
 directly — so a dropped banner only loses the reminder, never the guardrail.
 """
 
-import json
-import os
-import sys
+import time
+
+STARTED = time.perf_counter()
+
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 try:
@@ -83,6 +87,7 @@ def main():
 
     mode = nihil_mode(data.get("command_name"))
     if not mode:  # not a Nihil command: do not invent a mode
+        st.record("mode", data, decision="ignore", started=STARTED)
         sys.exit(0)
 
     session_id = data.get("session_id")
@@ -91,6 +96,7 @@ def main():
         st.clear_stop_flag(session_id)  # new mode cycle re-arms the Stop guard
     except OSError:
         pass  # filesystem unavailable: enforcement degrades, but still inject the banner
+    st.record("mode", data, mode, decision="set", started=STARTED)
 
     print(json.dumps({
         "hookSpecificOutput": {
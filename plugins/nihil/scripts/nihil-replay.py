@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Replay recorded tool calls against the Nihil PreToolUse rules, offline.
+
+    nihil-replay.py [--against REF_OR_FILE] [--jobs N] [--json] PATH ...
+
+Every ``PATH`` is a session transcript (``.jsonl``) or a directory searched
+recursively for them. Each ``Bash`` / ``Write`` / ``Edit`` / ``MultiEdit`` /
+``NotebookEdit`` tool call found in them is evaluated under every mode in
+``VALID_MODES`` and counted into a decision matrix (tool × mode, and which rule
+label denied). With ``--against``, each call is also evaluated by another
+version of the rule table — a ``_nihil_rules.py`` file, or a git ref whose copy
+of it is used — and every call whose decision differs is reported, so a rule
+change is measured on real history before it ships.
+
+Transcripts are streamed line by line (a line is parsed only if it holds a
+``tool_use``) and spread over a process pool, one transcript per task; only
+counters and a few examples per difference travel back. Commands in the output
+are redacted like denial reasons.
+"""
+
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+import _nihil_rules as rules  # noqa: E402
+import _nihil_state as st  # noqa: E402
+
+TOOLS = ("Bash", "Write", "Edit", "MultiEdit", "NotebookEdit")
+EXAMPLES = 5  # kept per (mode, change, old label, new label)
+
+_baseline = None  # the --against rule module, loaded once per worker
+
+
+def load_rules(path):
+    spec = importlib.util.spec_from_file_location("_nihil_rules_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "check"):
+        raise SystemExit("nihil-replay: " + path + " has no check(mode, tool, tool_input)")
+    return module
+
+
+def resolve_baseline(ref):
+    """Return a file path for ``--against``: the file itself, or the rule table at a git ref."""
+    if os.path.isfile(ref):
+        return ref
+    proc = subprocess.run(["git", "-C", HERE, "show", ref + ":./_nihil_rules.py"],
+                          capture_output=True)
+    if proc.returncode != 0:
+        raise SystemExit("nihil-replay: no file or git ref " + repr(ref) + ": "
+                         + proc.stderr.decode("utf-8", "replace").strip())
+    fd, path = tempfile.mkstemp(prefix="nihil-rules-", suffix=".py")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(proc.stdout)
+    return path
+
+
+def _init_worker(baseline_path):
+    global _baseline
+    _baseline = load_rules(baseline_path) if baseline_path else None
+
+
+def iter_tool_calls(path):
+    """Yield ``(tool, tool_input)`` for each guarded tool call in one transcript, streaming."""
+    with open(path, "rb") as fh:
+        for raw in fh:
+            if b'"tool_use"' not in raw:  # most lines: skip without decoding
+                continue
+            try:
+                obj = json.loads(raw)
+            except ValueError:
+                continue
+            message = obj.get("message") if isinstance(obj, dict) else None
+            content = message.get("content") if isinstance(message, dict) else None
+            if not isinstance(content, list):
+                continue
+            for piece in content:
+                if (isinstance(piece, dict) and piece.get("type") == "tool_use"
+                        and piece.get("name") in TOOLS and isinstance(piece.get("input"), dict)):
+                    yield piece["name"], piece["input"]
+
+
+def _describe(tool, tool_input):
+    if tool == "Bash":
+        return rules.redact(rules.bash_command(tool_input))
+    return str(tool_input.get("file_path") or tool_input.get("notebook_path") or "")[:200]
+
+
+def replay_file(path):
+    """Worker task: the counters for one transcript (picklable plain data)."""
+    matrix, labels, changes, examples = {}, {}, {}, {}
+    calls = 0
+    try:
+        for tool, tool_input in iter_tool_calls(path):
+            calls += 1
+            for mode in st.VALID_MODES:
+                label, reason = rules.evaluate(mode, tool, tool_input)
+                cell = matrix.setdefault(tool + "\t" + mode, [0, 0])
+                cell[0] += 1
+                if reason:
+                    cell[1] += 1
+                    key = mode + "\t" + label
+                    labels[key] = labels.get(key, 0) + 1
+                if _baseline is None:
+                    continue
+                before = _baseline.check(mode, tool, tool_input)
+                if before == reason:
+                    continue
+                kind = ("newly denied" if not before else "newly allowed" if not reason
+                        else "reason changed")
+                key = "\t".join((mode, kind, tool, label or "-"))
+                changes[key] = changes.get(key, 0) + 1
+                seen = examples.setdefault(key, [])
+                text = _describe(tool, tool_input)
+                if len(seen) < EXAMPLES and text not in seen:
+                    seen.append(text)
+    except OSError as exc:
+        return {"path": path, "error": str(exc)}
+    return {"path": path, "calls": calls, "matrix": matrix, "labels": labels,
+            "changes": changes, "examples": examples}
+
+
+def transcripts(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.endswith(".jsonl"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def merge(results):
+    total = {"transcripts": 0, "calls": 0, "errors": [], "matrix": {}, "labels": {},
+             "changes": {}, "examples": {}}
+    for result in results:
+        total["transcripts"] += 1
+        if "error" in result:
+            total["errors"].append(result["path"] + ": " + result["error"])
+            continue
+        total["calls"] += result["calls"]
+        for key, (seen, denied) in result["matrix"].items():
+            cell = total["matrix"].setdefault(key, [0, 0])
+            cell[0] += seen
+            cell[1] += denied
+        for field in ("labels", "changes"):
+            for key, count in result[field].items():
+                total[field][key] = total[field].get(key, 0) + count
+        for key, texts in result["examples"].items():
+            seen = total["examples"].setdefault(key, [])
+            seen.extend(text for text in texts if text not in seen)
+            del seen[EXAMPLES:]
+    return total
+
+
+def as_json(total, baseline):
+    return {
+        "transcripts": total["transcripts"], "calls": total["calls"], "errors": total["errors"],
+        "against": baseline,
+        "matrix": [{"tool": key.split("\t")[0], "mode": key.split("\t")[1], "calls": seen, "denied": denied}
+                   for key, (seen, denied) in sorted(total["matrix"].items())],
+        "denials": [{"mode": key.split("\t")[0], "rule": key.split("\t")[1], "count": count}
+                    for key, count in sorted(total["labels"].items())],
+        "changes": [dict(zip(("mode", "change", "tool", "rule"), key.split("\t")), count=count,
+                         examples=total["examples"].get(key, []))
+                    for key, count in sorted(total["changes"].items())],
+    }
+
+
+def print_report(report):
+    modes = st.VALID_MODES
+    print("%d transcript(s), %d guarded tool call(s)" % (report["transcripts"], report["calls"]))
+    for error in report["errors"]:
+        print("  unreadable: " + error)
+    print("\ndenied / calls" + "".join("%16s" % mode for mode in modes))
+    cells = {(row["tool"], row["mode"]): row for row in report["matrix"]}
+    for tool in TOOLS:
+        if not any((tool, mode) in cells for mode in modes):
+            continue
+        print("%-14s" % tool + "".join(
+            "%16s" % ("%d / %d" % (cells[tool, mode]["denied"], cells[tool, mode]["calls"]))
+            for mode in modes))
+    print("\nrule" + " " * 24 + "".join("%12s" % mode for mode in modes))
+    counts = {(row["rule"], row["mode"]): row["count"] for row in report["denials"]}
+    for rule in sorted({row["rule"] for row in report["denials"]}):
+        print("%-28s" % rule + "".join("%12d" % counts.get((rule, mode), 0) for mode in modes))
+    if report["against"] is None:
+        return
+    print("\nagainst %s: %d changed decision(s)" % (
+        report["against"], sum(row["count"] for row in report["changes"])))
+    for row in report["changes"]:
+        print("  %-10s %-15s %-13s %-26s %6d" % (row["mode"], row["change"], row["tool"], row["rule"], row["count"]))
+        for text in row["examples"]:
+            print("      e.g. " + text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded tool calls against the Nihil rules")
+    parser.add_argument("paths", nargs="+", help="transcript .jsonl files or directories")
+    parser.add_argument("--against", metavar="REF_OR_FILE",
+                        help="previous rule table: a _nihil_rules.py file or a git ref")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    baseline_path = resolve_baseline(args.against) if args.against else None
+    if baseline_path:
+        load_rules(baseline_path)  # fail here, not once per worker
+    files = list(transcripts(args.paths))
+    if args.jobs > 1 and len(files) > 1:
+        with multiprocessing.Pool(args.jobs, _init_worker, (baseline_path,)) as pool:
+            total = merge(pool.imap_unordered(replay_file, files, chunksize=8))
+    else:
+        _init_worker(baseline_path)
+        total = merge(map(replay_file, files))
+    if baseline_path and baseline_path != args.against:
+        os.remove(baseline_path)  # the temp copy of a git ref
+
+    report = as_json(total, args.against)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Summarize the opt-in Nihil hook telemetry log.
+
+    nihil-stats.py [--json] [FILE ...]
+
+Reads ``telemetry.jsonl`` and its rotated ``telemetry.jsonl.1`` from the state
+directory (or the given files) — written when ``$NIHIL_TELEMETRY=1`` — and
+prints, per hook, the call count and p50/p95/p99/max latency, then how often
+each rule denied or blocked, per mode, with the number of sessions it hit.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import _nihil_state as st  # noqa: E402
+
+
+def read_records(paths):
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:  # a torn line at a rotation boundary
+                        continue
+                    if isinstance(entry, dict):
+                        yield entry
+        except OSError:
+            continue
+
+
+def percentile(ordered, p):
+    return ordered[max(0, math.ceil(p / 100.0 * len(ordered)) - 1)] if ordered else 0
+
+
+def summarize(records):
+    latency = {}  # hook -> [us]
+    denials = {}  # (hook, rule, mode) -> [count, sessions]
+    sessions = set()
+    for entry in records:
+        hook = entry.get("hook") or "?"
+        sessions.add(entry.get("sid"))
+        if isinstance(entry.get("us"), int):
+            latency.setdefault(hook, []).append(entry["us"])
+        if entry.get("decision") in ("deny", "block"):
+            key = (hook, entry.get("rule") or "?", entry.get("mode") or "?")
+            slot = denials.setdefault(key, [0, set()])
+            slot[0] += 1
+            slot[1].add(entry.get("sid"))
+    hooks = {}
+    for hook, samples in sorted(latency.items()):
+        samples.sort()
+        hooks[hook] = {"calls": len(samples), "p50_us": percentile(samples, 50),
+                       "p95_us": percentile(samples, 95), "p99_us": percentile(samples, 99),
+                       "max_us": samples[-1]}
+    rules = [{"hook": hook, "rule": rule, "mode": mode, "count": count, "sessions": len(sids)}
+             for (hook, rule, mode), (count, sids) in sorted(denials.items(), key=lambda item: -item[1][0])]
+    return {"sessions": len(sessions), "hooks": hooks, "denials": rules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the Nihil hook telemetry log")
+    parser.add_argument("files", nargs="*", help="telemetry files (default: the state directory's log)")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    paths = args.files or [st.telemetry_path() + ".1", st.telemetry_path()]
+    summary = summarize(read_records(paths))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+    if not summary["hooks"]:
+        print("nihil-stats: no telemetry in " + ", ".join(paths)
+              + " (set " + st.TELEMETRY_ENV + "=1 to record)")
+        return 0
+    print("%d session(s)\n" % summary["sessions"])
+    print("%-12s %8s %10s %10s %10s %10s" % ("hook", "calls", "p50 us", "p95 us", "p99 us", "max us"))
+    for hook, row in summary["hooks"].items():
+        print("%-12s %8d %10d %10d %10d %10d" % (
+            hook, row["calls"], row["p50_us"], row["p95_us"], row["p99_us"], row["max_us"]))
+    print("\n%-12s %-28s %-10s %8s %9s" % ("hook", "rule", "mode", "denials", "sessions"))
+    for row in summary["denials"]:
+        print("%-12s %-28s %-10s %8d %9d" % (row["hook"], row["rule"], row["mode"], row["count"], row["sessions"]))
+    if not summary["denials"]:
+        print("(none)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,69 +14,40 @@ AND keeps a one-shot per-session flag, so it blocks at most once per mode cycle.
 ``nihil-mode.py`` clears that flag whenever a new ``/nihil:*`` command runs, which
 re-arms the guard for the next cycle.
 
+The transcript is read backwards from its end (``_nihil_transcript.py``), and a
+per-session index in ``_nihil_state`` remembers how far it was parsed, so each
+Stop check only reads what the session appended since the previous one.
+
 Anything it cannot read (no mode, unreadable transcript) fails open: the agent is
 allowed to stop. The guard nudges format; it never traps a session.
 """
 
-import json
-import os
-import sys
+import time
+
+STARTED = time.perf_counter()
+
+import os  # noqa: E402
+import sys  # noqa: E402
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 try:
     import _nihil_state as st
+    import _nihil_transcript as tr
 except ImportError:  # helper missing: fail open so the agent can always stop
     sys.exit(0)
 
 
-def block(reason, session_id):
-    st.mark_stop_blocked(session_id)
-    print(json.dumps({"decision": "block", "reason": reason}))
+def done(data, mode=None, rule=None, decision="allow"):
+    st.record("stop", data, mode, rule, decision, STARTED)
     sys.exit(0)
 
 
-def extract_text(content):
-    if isinstance(content, str):
-        return content
-    if not isinstance(content, list):
-        return ""
-    parts = []
-    for piece in content:
-        if isinstance(piece, str):
-            parts.append(piece)
-        elif isinstance(piece, dict) and piece.get("type") == "text":
-            parts.append(piece.get("text", ""))
-    return "\n".join(parts)
-
-
-def last_assistant_text(transcript_path):
-    """Return the text of the most recent assistant message in the JSONL transcript."""
-    if not transcript_path or not os.path.exists(transcript_path):
-        return ""
-    try:
-        with open(transcript_path, "r", encoding="utf-8", errors="replace") as fh:
-            lines = fh.readlines()
-    except OSError:
-        return ""
-    for line in reversed(lines):
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            obj = json.loads(line)
-        except ValueError:
-            continue
-        if not isinstance(obj, dict):
-            continue
-        message = obj.get("message") if isinstance(obj.get("message"), dict) else None
-        role = obj.get("role") or (message or {}).get("role")
-        if role != "assistant" and obj.get("type") != "assistant":
-            continue
-        content = (message or {}).get("content", obj.get("content"))
-        text = extract_text(content)
-        if text:
-            return text
-    return ""
+def block(reason, data, mode, rule):
+    import json
+
+    st.mark_stop_blocked(data.get("session_id"))
+    print(json.dumps({"decision": "block", "reason": reason}))
+    done(data, mode, rule, "block")
 
 
 FINDING_FORMAT = (
@@ -114,29 +85,32 @@ def main():
     session_id = data.get("session_id")
     mode = st.read_mode(session_id)
     if not mode:
-        sys.exit(0)
+        done(data)
 
     # loop guards: honor the runtime flag if present, and our own one-shot flag
     if data.get("stop_hook_active") is True or st.stop_already_blocked(session_id):
-        sys.exit(0)
+        done(data, mode, decision="skip")
 
-    text = last_assistant_text(data.get("transcript_path"))
+    index = st.read_transcript_index(session_id)
+    text, new_index = tr.scan_last_assistant(data.get("transcript_path"), index)
+    if new_index and new_index != index:
+        st.write_transcript_index(session_id, new_index)
     low = text.lower()
 
     if mode == "review":
         reason = review_block_reason(text)
         if reason:
-            block(reason, session_id)
+            block(reason, data, mode, "malformed findings")
     elif mode == "implement":
         if "verification" not in low:
             block("Nihil Implementation output is missing a Verification section. Add a "
                   "'## Verification' section listing the checks you ran (build / tests / running the "
-                  "artifact) and their results before stopping.", session_id)
+                  "artifact) and their results before stopping.", data, mode, "missing verification")
     elif mode == "release":
         if not any(key in low for key in ("release readiness", "blocker", "publishing decision")):
             block("Nihil Release output is missing a release readiness / blockers section. Add "
                   "'## Release Readiness', '## Publishing Decision', and '## Blockers' before stopping.",
-                  session_id)
+                  data, mode, "missing release readiness")
     elif mode == "raze":
         # Raze frees the work but not the honesty: a transformation must report what it
         # changed and that it was verified. This is the only discipline raze keeps.
@@ -144,9 +118,9 @@ def main():
             block("Nihil Raze output is missing a Verification section. Raze runs write-capable and "
                   "end-to-end, so before stopping add a '## Verification' section: what you changed and "
                   "the checks you actually ran (build / tests / running the artifact) with their results.",
-                  session_id)
+                  data, mode, "missing verification")
 
-    sys.exit(0)
+    done(data, mode)
 
 
 main()